@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+archive_batch.py
+----------------
+Parse les PDF contenus dans une archive zip ou tar (gz/bz2/xz) sans les
+extraire sur disque : chaque membre est lu en mémoire et passé en octets
+aux parsers (cf. pdf_source), la famille étant donnée par --family ou
+devinée sur la première page (router.classify).
+
+• Les tar sont lus en flux (mode "r|*") : l'archive peut venir de stdin ou
+  d'un pipe, un seul passage, pas de seek.
+• Au plus 2 × workers PDF sont en mémoire à la fois.
+• Les sorties suivent les conventions habituelles (output/<famille>/).
+
+Usage :
+    python archive_batch.py syllabi.zip
+    python archive_batch.py export.tar.gz --family syllabus_projet --workers 4
+    ssh serveur 'tar cz -C depot .' | python archive_batch.py -
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterator, Optional, Set, Tuple
+import argparse, os, sys, tarfile, time, zipfile
+
+from batch_runner import INPUT_DIRS, OUTPUT_DIRS
+
+UNREADABLE = "illisible"
+
+
+# ── Lecture des archives ──────────────────────────────────────────────────────
+def _is_pdf(name: str) -> bool:
+    base = PurePosixPath(name).name
+    return base.lower().endswith(".pdf") and not base.startswith(("._", "."))
+
+
+def iter_archive(archive: str) -> Iterator[Tuple[str, bytes]]:
+    """Renvoie (nom du membre, octets) pour chaque PDF d'un zip ou d'un tar ("-" = tar sur stdin)."""
+    if archive != "-" and zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and _is_pdf(info.filename):
+                    with zf.open(info) as f:
+                        yield info.filename, f.read()
+        return
+
+    fileobj = sys.stdin.buffer if archive == "-" else None
+    with tarfile.open(archive if fileobj is None else None, mode="r|*", fileobj=fileobj) as tf:
+        for member in tf:
+            if member.isfile() and _is_pdf(member.name):
+                f = tf.extractfile(member)
+                yield member.name, f.read()
+
+
+# ── Côté worker ───────────────────────────────────────────────────────────────
+def parse_member(family: Optional[str], name: str, data: bytes, use_cache: bool = False) -> Tuple[str, str]:
+    """Parse un PDF reçu en octets ; renvoie (famille, chemin du JSON écrit)."""
+    if family is None:
+        from router import classify
+        family = classify(data)
+    if family == UNREADABLE:
+        raise ValueError("PDF illisible")
+
+    out_dir = OUTPUT_DIRS[family]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    base = PurePosixPath(name).name
+    if family == "cours":
+        import parser_cours
+        return family, str(parser_cours.pdf_to_json(data, name=base))
+    if family == "syllabus_matiere":
+        import parser_syllabus_matiere
+        return family, str(parser_syllabus_matiere.process_pdf(data, out_dir, use_cache, name=base))
+    import parser_syllabus_projet
+    json_path, _ = parser_syllabus_projet.process_pdf(data, str(out_dir), use_cache, name=base)
+    return family, json_path
+
+
+# ── Orchestration ─────────────────────────────────────────────────────────────
+def run(archive: str, family: Optional[str], workers: int, use_cache: bool = False) -> int:
+    """Parse toute l'archive ; renvoie le nombre d'erreurs."""
+    errors = done = 0
+    pending: Dict[Future, str] = {}
+
+    def collect(futures: Set[Future]) -> None:
+        nonlocal errors, done
+        for fut in futures:
+            name = pending.pop(fut)
+            try:
+                fam, out = fut.result()
+                done += 1
+                print(f"✅ {name}  [{fam}]  →  {out}")
+            except Exception as err:
+                errors += 1
+                print(f"⛔ Erreur avec {name} : {err}")
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, data in iter_archive(archive):
+            if len(pending) >= 2 * workers:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            pending[pool.submit(parse_member, family, name, data, use_cache)] = name
+        collect(set(wait(pending)[0]))
+    print(f"Terminé : {done} PDF en {time.perf_counter() - t0:.1f}s, {errors} erreur(s)")
+    return errors
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Parsing des PDF d'une archive zip/tar, sans extraction")
+    ap.add_argument("archive", help="fichier .zip / .tar[.gz|.bz2|.xz], ou - pour un tar sur stdin")
+    ap.add_argument("--family", choices=list(INPUT_DIRS), default=None,
+                    help="famille de tous les PDF (sinon devinée sur la première page)")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    ap.add_argument("--cache", action="store_true", help="syllabus : cache de mise en page (layout_cache)")
+    args = ap.parse_args()
+    if args.archive != "-" and not Path(args.archive).is_file():
+        sys.exit(f"❌ Archive introuvable : {args.archive}")
+    sys.exit(1 if run(args.archive, args.family, args.workers, args.cache) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+atomic_io.py
+------------
+Écriture atomique des sorties : le contenu est écrit dans un fichier
+temporaire du même dossier puis renommé (os.replace). Un lecteur — ou un
+autre worker sur le même partage NFS — voit soit l'ancien fichier, soit le
+nouveau complet, jamais un JSON tronqué.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+import os, tempfile
+
+# mkstemp crée le fichier en 0600 : on rétablit les droits habituels (0666 & ~umask)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_open(path, mode: str = "w", encoding: Optional[str] = "utf-8"):
+    """
+    Fichier ouvert en écriture sur un temporaire du même dossier, renommé en
+    `path` à la sortie du bloc ; supprimé si le bloc lève une exception.
+    Pour les sorties écrites au fil de l'eau (mode "wb" : encoding ignoré).
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent or ".")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path, text: str, encoding: str = "utf-8") -> None:
+    with atomic_open(path, "w", encoding) as f:
+        f.write(text)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+batch_runner.py
+---------------
+Lance les trois parsers en parallèle sur data/cours, data/syllabus_matiere
+et data/syllabus_projet.
+
+• Les pages de chaque PDF sont comptées d'abord (``len(fitz.open(p))``,
+  quasi gratuit) pour estimer le coût de chaque document.
+• Les documents sont ordonnancés du plus long au plus court (LPT) : le
+  gros cours Spark part en premier au lieu de finir seul en fin de run.
+• Les cours trop longs sont découpés en tranches de pages traitées par des
+  workers différents puis recollées (les syllabus, courts et dont les
+  tableaux peuvent chevaucher deux pages, ne sont jamais découpés).
+• Le nombre de workers dépend de la mémoire disponible et de la taille du
+  plus gros document à traiter par pdfplumber.
+• Avec --timeout / --max-rss, chaque job tourne sous surveillance
+  (supervisor.py) : un PDF qui dépasse son budget est tué, mis en
+  quarantaine avec un rapport, et le batch continue.
+
+Usage :
+    python batch_runner.py                 # tout
+    python batch_runner.py --dry-run       # affiche le plan seulement
+    python batch_runner.py --families cours syllabus_projet --workers 4
+    python batch_runner.py --timeout 120 --max-rss 1500
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import argparse, os, sys, time
+
+from supervisor import QUARANTINE_DIR, Budget, Outcome, SupervisedPool, quarantine
+
+# ── Familles de documents ─────────────────────────────────────────────────────
+INPUT_DIRS = {
+    "cours": Path("data/cours"),
+    "syllabus_matiere": Path("data/syllabus_matiere"),
+    "syllabus_projet": Path("data/syllabus_projet"),
+}
+OUTPUT_DIRS = {
+    "cours": Path("output/cours"),
+    "syllabus_matiere": Path("output/syllabus_matiere"),
+    "syllabus_projet": Path("output/syllabus_projet"),
+}
+
+# Coût relatif d'une page : fitz.get_text est bien plus rapide que les
+# extract_tables / crop(...).extract_text(layout=True) de pdfplumber.
+PAGE_COST = {"cours": 1.0, "syllabus_matiere": 8.0, "syllabus_projet": 12.0}
+# Mémoire (Mio) retenue par page ouverte ; pdfplumber garde les objets de page.
+PAGE_MB = {"cours": 0.5, "syllabus_matiere": 4.0, "syllabus_projet": 6.0}
+WORKER_BASE_MB = 150          # interpréteur + imports pdfplumber/fitz/ftfy
+MEMORY_FRACTION = 0.7         # part de la mémoire disponible qu'on s'autorise
+SHARD_PAGES = 100             # taille max d'une tranche de cours
+
+
+@dataclass
+class Job:
+    family: str
+    pdf: Path
+    pages: int
+    start: int = 0
+    stop: Optional[int] = None   # None = document entier
+    use_cache: bool = False      # syllabus : relit pdfplumber depuis layout_cache
+
+    @property
+    def cost(self) -> float:
+        span = (self.stop if self.stop is not None else self.pages) - self.start
+        return span * PAGE_COST[self.family]
+
+    @property
+    def sharded(self) -> bool:
+        return self.stop is not None
+
+    def label(self) -> str:
+        if self.sharded:
+            return f"{self.pdf.name}[{self.start + 1}-{self.stop}]"
+        return self.pdf.name
+
+
+# ── Planification ─────────────────────────────────────────────────────────────
+def page_count(pdf: Path) -> int:
+    """Nombre de pages via fitz (n'analyse pas le contenu) ; 1 si illisible."""
+    import fitz
+    try:
+        with fitz.open(pdf) as doc:
+            return len(doc)
+    except Exception:
+        return 1
+
+
+def discover(families: List[str]) -> List[Tuple[str, Path]]:
+    found = []
+    for fam in families:
+        found += [(fam, p) for p in sorted(INPUT_DIRS[fam].glob("*.pdf"))]
+    return found
+
+
+def plan_jobs(files: List[Tuple[str, Path]], shard_pages: int = SHARD_PAGES) -> List[Job]:
+    """Construit les jobs (tranches comprises) triés par coût décroissant."""
+    jobs: List[Job] = []
+    for fam, pdf in files:
+        n = page_count(pdf)
+        if fam == "cours" and shard_pages and n > shard_pages:
+            jobs += [Job(fam, pdf, n, s, min(s + shard_pages, n)) for s in range(0, n, shard_pages)]
+        else:
+            jobs.append(Job(fam, pdf, n))
+    jobs.sort(key=lambda j: j.cost, reverse=True)
+    return jobs
+
+
+def available_memory_mb() -> float:
+    """Mémoire disponible (Mio) : /proc/meminfo, sinon sysconf."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (ValueError, OSError, AttributeError):
+        return float("inf")
+
+
+def choose_workers(jobs: List[Job], requested: Optional[int] = None) -> int:
+    """Nombre de workers borné par les CPU et par la mémoire du plus gros job."""
+    if requested:
+        return max(1, requested)
+    if not jobs:
+        return 1
+    cpus = os.cpu_count() or 1
+    worst = max(WORKER_BASE_MB + ((j.stop or j.pages) - j.start) * PAGE_MB[j.family] for j in jobs)
+    by_memory = int(available_memory_mb() * MEMORY_FRACTION // worst)
+    return max(1, min(cpus, by_memory, len(jobs)))
+
+
+# ── Exécution (côté worker) ───────────────────────────────────────────────────
+def _warm() -> None:
+    """Initialisation d'un worker surveillé : imports lourds une seule fois, hors budget."""
+    import importlib
+    for name in ("fitz", "pdfplumber", "ftfy",
+                 "parser_cours", "parser_syllabus_matiere", "parser_syllabus_projet"):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass          # l'erreur remontera au job concerné
+
+
+def run_job(job: Job) -> Tuple[Job, Any, float]:
+    """Exécute un job dans un worker ; renvoie (job, résultat, durée)."""
+    t0 = time.perf_counter()
+    if job.family == "cours":
+        import parser_cours
+        if job.sharded:
+            result = parser_cours.extract_pages(job.pdf, job.start, job.stop)
+        else:
+            result = parser_cours.pdf_to_json(job.pdf)
+    elif job.family == "syllabus_matiere":
+        import parser_syllabus_matiere
+        OUTPUT_DIRS[job.family].mkdir(parents=True, exist_ok=True)
+        result = parser_syllabus_matiere.process_pdf(job.pdf, OUTPUT_DIRS[job.family], job.use_cache)
+    else:
+        import parser_syllabus_projet
+        OUTPUT_DIRS[job.family].mkdir(parents=True, exist_ok=True)
+        result, _ = parser_syllabus_projet.process_pdf(str(job.pdf), str(OUTPUT_DIRS[job.family]),
+                                                       job.use_cache)
+    return job, result, time.perf_counter() - t0
+
+
+# ── Orchestration ─────────────────────────────────────────────────────────────
+def _outcomes(jobs: List[Job], workers: int, budget: Optional[Budget],
+              skip: Callable[[Job], bool]) -> Iterator[Outcome]:
+    """Résultats des jobs dans l'ordre de fin : pool surveillé si budget, ProcessPoolExecutor sinon."""
+    if budget:
+        with SupervisedPool(workers, budget, initializer=_warm) as pool:
+            yield from pool.run(run_job, jobs, skip)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Soumission dans l'ordre LPT : le pool dépile en FIFO
+        futures = {pool.submit(run_job, j): j for j in jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                yield Outcome(job, "ok", fut.result())
+            except Exception as err:
+                yield Outcome(job, "error", error=str(err))
+
+
+def run(jobs: List[Job], workers: int, budget: Optional[Budget] = None,
+        quarantine_dir: Path = QUARANTINE_DIR) -> int:
+    """
+    Exécute les jobs ; renvoie le nombre d'erreurs. Avec un budget, un PDF
+    qui le dépasse est mis en quarantaine et ses autres tranches sont sautées.
+    """
+    shards: Dict[Path, Dict[int, List[Dict[str, Any]]]] = {}
+    expected = {}
+    for j in jobs:
+        if j.sharded:
+            expected[j.pdf] = expected.get(j.pdf, 0) + 1
+    failed_docs = set()
+    quarantined = set()
+    errors = 0
+
+    for outcome in _outcomes(jobs, workers, budget, lambda j: j.pdf in quarantined):
+        job = outcome.job
+        if outcome.breached:
+            errors += 1
+            failed_docs.add(job.pdf)
+            if job.pdf not in quarantined:
+                quarantined.add(job.pdf)
+                report = quarantine(job.pdf, job.family, outcome, budget, job.pages, quarantine_dir)
+                print(f"⛔ {job.label()} : {outcome.status} ({outcome.error}) → quarantaine, rapport {report}")
+            continue
+        if outcome.status != "ok":
+            errors += 1
+            failed_docs.add(job.pdf)
+            print(f"⛔ Erreur avec {job.label()} : {outcome.error}")
+            continue
+
+        _, result, elapsed = outcome.result
+        if not job.sharded:
+            print(f"✅ {job.label()}  ({job.pages} p., {elapsed:.1f}s)  →  {result}")
+            continue
+
+        parts = shards.setdefault(job.pdf, {})
+        parts[job.start] = result
+        print(f"   {job.label()}  ({elapsed:.1f}s)")
+        if len(parts) == expected[job.pdf] and job.pdf not in failed_docs:
+            import parser_cours
+            pages = [p for start in sorted(parts) for p in parts[start]]
+            out = parser_cours.write_json(job.pdf, pages)
+            print(f"✅ {job.pdf.name}  ({job.pages} p., {len(parts)} tranches)  →  {out}")
+            del shards[job.pdf]
+
+    return errors
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Parsing parallèle LPT des PDF")
+    ap.add_argument("--families", nargs="+", choices=list(INPUT_DIRS), default=list(INPUT_DIRS))
+    ap.add_argument("--workers", type=int, default=None, help="force le nombre de workers")
+    ap.add_argument("--shard-pages", type=int, default=SHARD_PAGES,
+                    help="taille max d'une tranche de cours (0 = pas de découpage)")
+    ap.add_argument("--dry-run", action="store_true", help="affiche le plan sans l'exécuter")
+    ap.add_argument("--cache", action="store_true", help="syllabus : utilise le cache layout_cache")
+    ap.add_argument("--timeout", type=float, default=None,
+                    help="secondes max par job ; au-delà le PDF part en quarantaine")
+    ap.add_argument("--max-rss", type=float, default=None,
+                    help="mémoire résidente max d'un worker (Mio) ; au-delà le PDF part en quarantaine")
+    ap.add_argument("--quarantine", type=Path, default=QUARANTINE_DIR)
+    args = ap.parse_args()
+
+    files = discover(args.families)
+    if not files:
+        sys.exit("❌ Aucun PDF trouvé")
+
+    jobs = plan_jobs(files, args.shard_pages)
+    for j in jobs:
+        j.use_cache = args.cache
+    workers = choose_workers(jobs, args.workers)
+    print(f"{len(files)} PDF, {len(jobs)} jobs, {workers} workers "
+          f"({available_memory_mb():.0f} Mio disponibles)")
+
+    if args.dry_run:
+        for j in jobs:
+            print(f"  {j.cost:8.1f}  {j.family:<17} {j.label()}")
+        return
+
+    t0 = time.perf_counter()
+    errors = run(jobs, workers, Budget(args.timeout, args.max_rss), args.quarantine)
+    print(f"Terminé en {time.perf_counter() - t0:.1f}s, {errors} erreur(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+chunk_store.py
+--------------
+Stockage compact des chunks produits par les trois chunkers
+(chunking_cours, chunking_syllabus_matière, chunking_syllabus_projet).
+
+Structure d'un store (un dossier) :
+    manifest.json        : version, génération, compression, fichiers, nombre de chunks
+    g<N>-strings.json    : dictionnaire des chaînes de métadonnées (clés + valeurs)
+    g<N>-index.json      : {chunk_id: [shard, offset, longueur]}
+    g<N>-shard-00000.bin : enregistrements binaires concaténés
+                           (compressés en bloc si gzip / lzma)
+
+Chaque build écrit une nouvelle génération N à côté de l'ancienne, bascule
+manifest.json (écriture atomique) en dernier, puis supprime les fichiers
+qu'il ne cite plus : un build interrompu laisse le store précédent intact.
+
+Un enregistrement =
+    varint len(content) | content UTF-8 | varint nb_meta |
+    nb_meta × (varint id_clé | tag | valeur)
+avec tag : 0 = chaîne (varint id dans strings.json), 1 = entier (varint zigzag),
+           2 = None, 3 = autre (JSON compact, préfixé de sa longueur).
+
+Les métadonnées répétées ("Syllabus projet", titre de section, "" …) ne sont
+ainsi écrites qu'une fois dans strings.json.
+
+Identifiant de chunk : "<famille>/<nom du fichier source sans _chunks>:<rang>",
+la famille étant le dossier parent du dossier chunks (cours, syllabus_matiere,
+syllabus_projet) — projetannuel existe par exemple dans deux familles.
+Si un <nom>_parents.json (chunk_tree, mode --hierarchical) accompagne le
+fichier, ses chunks de section sont ajoutés sous leur parent_id
+("<famille>/<nom>#<section>").
+
+Usage :
+    python chunk_store.py build output/chunk_store output/*/chunks/*_chunks.json --compression lzma
+    python chunk_store.py get   output/chunk_store "syllabus_projet/docker:3"
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import OrderedDict
+import argparse, gzip, json, lzma, mmap, re, sys
+
+from atomic_io import atomic_open, atomic_write_text
+from chunk_tree import parents_path_for
+
+VERSION = 1
+DEFAULT_SHARD_BYTES = 4 * 1024 * 1024   # taille (non compressée) visée par shard
+# Fichiers de données d'un store, toutes générations (et ancien format sans préfixe)
+STORE_FILE = re.compile(r"(g\d+-)?(shard-\d+\.bin|strings\.json|index\.json)")
+COMPRESSORS = {
+    None: (lambda b: b, lambda b: b),
+    "gzip": (gzip.compress, gzip.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+TAG_STR, TAG_INT, TAG_NONE, TAG_JSON = 0, 1, 2, 3
+
+
+# ── Varints ───────────────────────────────────────────────────────────────────
+def _put_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(buf, pos: int) -> Tuple[int, int]:
+    shift = result = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63) if n < 0 else n << 1
+
+
+def _unzigzag(n: int) -> int:
+    return (n >> 1) ^ -(n & 1)
+
+
+LEGACY_CHUNKS = "all_chunks.json"     # ancien export (text / metadata.type_document), capté par *_chunks.json
+
+
+def chunker_files(paths: Iterable[Path]) -> List[Path]:
+    """Fichiers de chunks des chunkers : l'ancien all_chunks.json est écarté (signalé sur stderr)."""
+    files = []
+    for path in map(Path, paths):
+        if path.name == LEGACY_CHUNKS:
+            print(f"⚠ {path} ignoré : ancien format, hors sorties des chunkers", file=sys.stderr)
+            continue
+        files.append(path)
+    return files
+
+
+def chunk_id_for(source: Path, rank: int) -> str:
+    """Identifiant stable d'un chunk dans un fichier *_chunks.json."""
+    source = Path(source)
+    stem = source.stem
+    if stem.endswith("_chunks"):
+        stem = stem[: -len("_chunks")]
+    return f"{source.parent.parent.name}/{stem}:{rank}"
+
+
+# ── Écriture ──────────────────────────────────────────────────────────────────
+class ChunkStoreWriter:
+    """
+    Écrit un store de chunks.
+
+        with ChunkStoreWriter(Path("output/chunk_store"), compression="gzip") as w:
+            w.add("syllabus_projet/docker:0", chunk)
+    """
+
+    def __init__(self, root: Path, compression: Optional[str] = None,
+                 shard_bytes: int = DEFAULT_SHARD_BYTES):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Compression inconnue : {compression}")
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.root / "manifest.json"
+        previous = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+        self.generation = previous.get("generation", 0) + 1
+        self.compression = compression
+        self.shard_bytes = shard_bytes
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._index: Dict[str, List[int]] = {}
+        self._shards: List[str] = []
+        self._buf = bytearray()
+
+    def __enter__(self) -> "ChunkStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def _name(self, name: str) -> str:
+        return f"g{self.generation}-{name}"
+
+    def _sid(self, s: str) -> int:
+        sid = self._string_ids.get(s)
+        if sid is None:
+            sid = self._string_ids[s] = len(self._strings)
+            self._strings.append(s)
+        return sid
+
+    def _encode(self, chunk: Dict[str, Any]) -> bytes:
+        out = bytearray()
+        content = chunk.get("content", "").encode("utf-8")
+        _put_varint(out, len(content))
+        out += content
+        meta = chunk.get("metadata") or {}
+        _put_varint(out, len(meta))
+        for key, val in meta.items():
+            _put_varint(out, self._sid(key))
+            if isinstance(val, str):
+                out.append(TAG_STR)
+                _put_varint(out, self._sid(val))
+            elif isinstance(val, int) and not isinstance(val, bool):
+                out.append(TAG_INT)
+                _put_varint(out, _zigzag(val))
+            elif val is None:
+                out.append(TAG_NONE)
+            else:
+                raw = json.dumps(val, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                out.append(TAG_JSON)
+                _put_varint(out, len(raw))
+                out += raw
+        return bytes(out)
+
+    def add(self, chunk_id: str, chunk: Dict[str, Any]) -> None:
+        if chunk_id in self._index:
+            raise KeyError(f"Identifiant de chunk en double : {chunk_id}")
+        record = self._encode(chunk)
+        self._index[chunk_id] = [len(self._shards), len(self._buf), len(record)]
+        self._buf += record
+        if len(self._buf) >= self.shard_bytes:
+            self._flush()
+
+    def add_file(self, path: Path) -> int:
+        """Ajoute tous les chunks d'un fichier *_chunks.json (et ses parents) ; renvoie leur nombre."""
+        with Path(path).open(encoding="utf-8") as f:
+            chunks = json.load(f)
+        if chunks and chunk_id_for(path, 0) in self._index:
+            raise KeyError(f"Fichier déjà ajouté : {path}")
+        for rank, chunk in enumerate(chunks):
+            self.add(chunk_id_for(path, rank), chunk)
+        parents_path = parents_path_for(path)
+        if parents_path.exists():
+            parents = json.loads(parents_path.read_text(encoding="utf-8"))
+            for pid, parent in parents.items():
+                self.add(pid, parent)
+            return len(chunks) + len(parents)
+        return len(chunks)
+
+    def _flush(self) -> None:
+        if not self._buf:
+            return
+        name = self._name(f"shard-{len(self._shards):05d}.bin")
+        compress, _ = COMPRESSORS[self.compression]
+        with atomic_open(self.root / name, "wb") as f:
+            f.write(compress(bytes(self._buf)))
+        self._shards.append(name)
+        self._buf = bytearray()
+
+    def close(self) -> None:
+        self._flush()
+        dump = lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        strings, index = self._name("strings.json"), self._name("index.json")
+        atomic_write_text(self.root / strings, dump(self._strings))
+        atomic_write_text(self.root / index, dump(self._index))
+        manifest = {
+            "version": VERSION,
+            "generation": self.generation,
+            "compression": self.compression,
+            "strings": strings,
+            "index": index,
+            "shards": self._shards,
+            "count": len(self._index),
+        }
+        atomic_write_text(self.root / "manifest.json", json.dumps(manifest, indent=2))  # bascule
+        keep = {strings, index, *self._shards}
+        for path in self.root.iterdir():
+            if STORE_FILE.fullmatch(path.name) and path.name not in keep:
+                path.unlink()
+
+    def _discard(self) -> None:
+        """Build abandonné : supprime les shards de la génération en cours, le manifest n'a pas bougé."""
+        for name in self._shards:
+            (self.root / name).unlink(missing_ok=True)
+
+
+# ── Lecture ───────────────────────────────────────────────────────────────────
+class ChunkStore:
+    """
+    Lecture d'un store : accès ponctuel par identifiant et parcours complet.
+
+    Les shards non compressés sont lus via mmap ; les shards compressés sont
+    décompressés entiers à la première lecture et gardés dans un petit cache LRU.
+    """
+
+    def __init__(self, root: Path, cache_shards: int = 4):
+        self.root = Path(root)
+        manifest = json.loads((self.root / "manifest.json").read_text(encoding="utf-8"))
+        if manifest.get("version") != VERSION:
+            raise ValueError(f"Version de store non supportée : {manifest.get('version')}")
+        self.compression = manifest["compression"]
+        self._shard_names: List[str] = manifest["shards"]
+        strings, index = manifest.get("strings", "strings.json"), manifest.get("index", "index.json")
+        self._strings: List[str] = json.loads((self.root / strings).read_text(encoding="utf-8"))
+        self._index: Dict[str, List[int]] = json.loads((self.root / index).read_text(encoding="utf-8"))
+        self._cache: "OrderedDict[int, Any]" = OrderedDict()
+        self._cache_size = max(1, cache_shards)
+
+    def __enter__(self) -> "ChunkStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for buf in self._cache.values():
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._index
+
+    def ids(self) -> Iterable[str]:
+        return self._index.keys()
+
+    def _shard(self, n: int):
+        buf = self._cache.get(n)
+        if buf is not None:
+            self._cache.move_to_end(n)
+            return buf
+        path = self.root / self._shard_names[n]
+        if self.compression is None:
+            with path.open("rb") as fh:        # mmap garde son propre descripteur : rien à garder ouvert
+                buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            _, decompress = COMPRESSORS[self.compression]
+            buf = decompress(path.read_bytes())
+        self._cache[n] = buf
+        if len(self._cache) > self._cache_size:
+            _, old = self._cache.popitem(last=False)
+            if isinstance(old, mmap.mmap):
+                old.close()
+        return buf
+
+    def _decode(self, buf, pos: int) -> Dict[str, Any]:
+        strings = self._strings
+        n, pos = _get_varint(buf, pos)
+        content = bytes(buf[pos:pos + n]).decode("utf-8")
+        pos += n
+        count, pos = _get_varint(buf, pos)
+        meta = {}
+        for _ in range(count):
+            kid, pos = _get_varint(buf, pos)
+            tag = buf[pos]
+            pos += 1
+            if tag == TAG_STR:
+                vid, pos = _get_varint(buf, pos)
+                val = strings[vid]
+            elif tag == TAG_INT:
+                raw, pos = _get_varint(buf, pos)
+                val = _unzigzag(raw)
+            elif tag == TAG_NONE:
+                val = None
+            else:
+                n, pos = _get_varint(buf, pos)
+                val = json.loads(bytes(buf[pos:pos + n]).decode("utf-8"))
+                pos += n
+            meta[strings[kid]] = val
+        return {"content": content, "metadata": meta}
+
+    def get(self, chunk_id: str) -> Dict[str, Any]:
+        """Renvoie le chunk (format JSON d'origine) ; KeyError si absent."""
+        shard, offset, _ = self._index[chunk_id]
+        return self._decode(self._shard(shard), offset)
+
+    def scan(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Parcourt tous les chunks, shard par shard, dans l'ordre d'écriture."""
+        by_shard: Dict[int, List[Tuple[int, str]]] = {}
+        for cid, (shard, offset, _) in self._index.items():
+            by_shard.setdefault(shard, []).append((offset, cid))
+        for shard in sorted(by_shard):
+            buf = self._shard(shard)
+            for offset, cid in sorted(by_shard[shard]):
+                yield cid, self._decode(buf, offset)
+
+
+def _store_size(root: Path) -> int:
+    return sum(p.stat().st_size for p in Path(root).iterdir() if p.is_file())
+
+
+# ── Point d'entrée ────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Store compact de chunks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Construit un store depuis des fichiers *_chunks.json")
+    b.add_argument("store", type=Path)
+    b.add_argument("files", nargs="+", type=Path)
+    b.add_argument("--compression", choices=["gzip", "lzma"], default=None)
+    b.add_argument("--shard-bytes", type=int, default=DEFAULT_SHARD_BYTES)
+    g = sub.add_parser("get", help="Affiche un chunk par identifiant")
+    g.add_argument("store", type=Path)
+    g.add_argument("ids", nargs="+")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        src_bytes = total = 0
+        with ChunkStoreWriter(args.store, args.compression, args.shard_bytes) as writer:
+            for path in chunker_files(args.files):
+                try:
+                    total += writer.add_file(path)
+                    src_bytes += path.stat().st_size
+                except Exception as err:
+                    print(f"⛔ Erreur avec {path.name} : {err}")
+        size = _store_size(args.store)
+        ratio = size / src_bytes if src_bytes else 0
+        print(f"✔ {total} chunks → {args.store}  ({src_bytes} → {size} octets, {ratio:.1%})")
+    else:
+        with ChunkStore(args.store) as store:
+            for cid in args.ids:
+                if cid not in store:
+                    print(f"⚠ Chunk introuvable : {cid}", file=sys.stderr)
+                    continue
+                print(json.dumps(store.get(cid), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+chunk_tree.py
+-------------
+Chunks à deux niveaux pour les syllabus (mode --hierarchical des chunkers
+chunking_syllabus_matière et chunking_syllabus_projet) :
+
+    • enfants : les chunks « Champ: valeur » habituels, indexés pour la
+      recherche, avec en plus metadata["parent_id"] ;
+    • parents : un chunk par section (tout « Détails du syllabus », tout
+      « 3 Détails du projet »…), précalculé et rangé par identifiant dans
+      <nom>_parents.json à côté de <nom>_chunks.json.
+
+Identifiant de parent : "<famille>/<nom>#<section>", même préfixe que les
+identifiants de chunk_store ("<famille>/<nom>:<rang>") ; chunk_store.py
+range aussi les parents, donc l'élargissement de contexte est une lecture
+par clé, sans relire le JSON source.
+
+Usage :
+    python chunk_tree.py output/syllabus_projet/chunks/docker_chunks.json 3   # enfant n°3 + son parent
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json, sys
+
+from atomic_io import atomic_write_text
+
+PARENTS_SUFFIX = "_parents.json"
+CHUNKS_SUFFIX = "_chunks.json"
+
+
+def parent_id_for(family: str, stem: str, section: str) -> str:
+    return f"{family}/{stem}#{section}"
+
+
+def parents_path_for(chunks_path: Path) -> Path:
+    """<nom>_chunks.json → <nom>_parents.json (même dossier)."""
+    chunks_path = Path(chunks_path)
+    stem = chunks_path.name[: -len(CHUNKS_SUFFIX)] if chunks_path.name.endswith(CHUNKS_SUFFIX) else chunks_path.stem
+    return chunks_path.with_name(stem + PARENTS_SUFFIX)
+
+
+# Métadonnées propres à chaque chunk ; les autres (matiere, document_path…) sont celles du document
+_CHUNK_KEYS = ("titre_document", "numero_page", "titre_section", "parent_id")
+
+
+def make_parent(section: str, children: List[Dict[str, Any]], titre_document: str) -> Dict[str, Any]:
+    """Chunk de section : titre puis contenu de chaque enfant, une ligne par champ."""
+    pages = [c["metadata"]["numero_page"] for c in children if isinstance(c["metadata"].get("numero_page"), int)]
+    doc = {k: v for k, v in children[0]["metadata"].items() if k not in _CHUNK_KEYS}
+    return {
+        "content": "\n".join([section] + [c["content"] for c in children]),
+        "metadata": {
+            "titre_document": titre_document,
+            "numero_page": min(pages) if pages else None,
+            "titre_section": section,
+            **doc,
+            "nb_enfants": len(children),
+        },
+    }
+
+
+def link_sections(sections: Iterable[Tuple[str, List[Dict[str, Any]]]], family: str, stem: str,
+                  titre_document: str) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    (section, chunks de la section)… → (enfants à plat, {parent_id: parent}).
+    Les enfants reçoivent metadata["parent_id"] ; une section sans chunk n'a pas de parent.
+    """
+    children: List[Dict[str, Any]] = []
+    parents: Dict[str, Dict[str, Any]] = {}
+    for section, chunks in sections:
+        if not chunks:
+            continue
+        pid = parent_id_for(family, stem, section)
+        for c in chunks:
+            c["metadata"]["parent_id"] = pid
+        parents[pid] = make_parent(section, chunks, titre_document)
+        children.extend(chunks)
+    return children, parents
+
+
+def write_parents(chunks_path: Path, parents: Dict[str, Dict[str, Any]]) -> Path:
+    out = parents_path_for(chunks_path)
+    atomic_write_text(out, json.dumps(parents, ensure_ascii=False, indent=2))
+    return out
+
+
+def clear_parents(chunks_path: Path) -> None:
+    """Supprime un <nom>_parents.json laissé par un run hiérarchique (ParentIndex le chargerait encore)."""
+    parents_path_for(chunks_path).unlink(missing_ok=True)
+
+
+class ParentIndex:
+    """Tous les parents d'un ou plusieurs dossiers de chunks, en mémoire : expand() en O(1)."""
+
+    def __init__(self, dirs: Iterable[Path] = ()):
+        self.parents: Dict[str, Dict[str, Any]] = {}
+        for d in dirs:
+            for path in sorted(Path(d).glob(f"*{PARENTS_SUFFIX}")):
+                self.add_file(path)
+
+    def add_file(self, path: Path) -> None:
+        self.parents.update(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def get(self, parent_id: str) -> Optional[Dict[str, Any]]:
+        return self.parents.get(parent_id)
+
+    def expand(self, chunk: Dict[str, Any]) -> Dict[str, Any]:
+        """Le parent du chunk s'il en a un, sinon le chunk lui-même."""
+        pid = chunk.get("metadata", {}).get("parent_id")
+        return self.parents.get(pid, chunk) if pid else chunk
+
+
+def main() -> None:
+    if len(sys.argv) != 3:
+        sys.exit("Usage : chunk_tree.py <fichier _chunks.json> <rang>")
+    path, rank = Path(sys.argv[1]), int(sys.argv[2])
+    child = json.loads(path.read_text(encoding="utf-8"))[rank]
+    index = ParentIndex()
+    if parents_path_for(path).exists():
+        index.add_file(parents_path_for(path))
+    print("── Enfant ──")
+    print(child["content"])
+    parent = index.expand(child)
+    if parent is child:
+        print("⚠ Pas de parent (chunks générés sans --hierarchical ?)")
+        return
+    print(f"── Parent {child['metadata']['parent_id']} ──")
+    print(parent["content"])
+
+
+if __name__ == "__main__":
+    main()
@@ -10,62 +10,109 @@ Structure de chaque chunk :
             "titre_document": "Cours",
             "numero_page": <int>,
             "titre_section": "",
-            "matiere": "",
-            "document_path": ""
+            "matiere": "<nom du document>",
+            "document_path": "data/cours/<fichier>.pdf"
         }
     }
-Entrée :  output/cours/*.json
+Entrée :  output/cours/*.json  (ou store colonnaire *.pages.idx, cf. page_store.py)
 Sortie :  output/cours/chunk/*_chunks.json
 """
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from atomic_io import atomic_write_text
+from page_store import INDEX_SUFFIX, PageStore
 
 INPUT_DIR = Path("output/cours")
 OUTPUT_DIR = INPUT_DIR / "chunk"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+PDF_DIR = Path("data/cours")
+
+
+def document_metadata(stem: str, source_pdf: Optional[str] = None) -> Dict[str, str]:
+    """Métadonnées communes à tous les chunks d'un cours (matière = nom du document)."""
+    return {"matiere": stem, "document_path": str(PDF_DIR / (source_pdf or f"{stem}.pdf"))}
 
 
-def make_chunk(page_text: str, page_num: int) -> Dict[str, Any]:
+def make_chunk(page_text: str, page_num: int, doc: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
     """Construit un chunk au format cible."""
+    doc = doc or {}
     return {
         "content": page_text.strip(),
         "metadata": {
             "titre_document": "Cours",
             "numero_page": page_num,
             "titre_section": "",
-            "matiere": "",
-            "document_path": "",
+            "matiere": doc.get("matiere", ""),
+            "document_path": doc.get("document_path", ""),
         },
     }
 
 
+def build_chunks(pages: Iterable[Tuple[int, str]], doc: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Construit les chunks à partir d'un itérable (numéro_page, texte)."""
+    chunks: List[Dict[str, Any]] = []
+    for num, text in pages:
+        text = text.strip()
+        if text:
+            chunks.append(make_chunk(text, num, doc))
+    return chunks
+
+
+def write_chunks(stem: str, chunks: List[Dict[str, Any]], src_name: str) -> None:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = OUTPUT_DIR / f"{stem}_chunks.json"
+    atomic_write_text(out_path, json.dumps(chunks, ensure_ascii=False, indent=2))
+
+    print(f"✔  {src_name} → {out_path}  ({len(chunks)} chunks)")
+
+
 def process_file(path: Path) -> None:
     with path.open(encoding="utf-8") as f:
         data = json.load(f)
 
-    chunks: List[Dict[str, Any]] = []
+    pages = ((page.get("page"), page.get("text", "")) for page in data.get("pages", []))
+    doc = document_metadata(path.stem, data.get("meta", {}).get("source"))
+    write_chunks(path.stem, build_chunks(pages, doc), path.name)
 
-    for page in data.get("pages", []):
-        text = page.get("text", "").strip()
-        num = page.get("page")
-        if text:
-            chunks.append(make_chunk(text, num))
 
-    out_path = OUTPUT_DIR / f"{path.stem}_chunks.json"
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(chunks, f, ensure_ascii=False, indent=2)
+def process_store(idx_path: Path, start: int = 0, stop: int = None) -> None:
+    """
+    Variante pour le store colonnaire : les pages sont lues une à une
+    depuis le mmap, sans charger le document entier. ``start``/``stop``
+    permettent de ne découper qu'une tranche de pages (positions 0-based).
+    """
+    stem = idx_path.name[: -len(INDEX_SUFFIX)]
+    with PageStore(idx_path) as store:
+        chunks = build_chunks(store.iter_pages(start, stop), document_metadata(stem))
+    write_chunks(stem, chunks, idx_path.name)
+
 
-    print(f"✔  {path.name} → {out_path.relative_to(Path.cwd())}  ({len(chunks)} chunks)")
+def store_is_fresh(idx_path: Path) -> bool:
+    """
+    Vrai si le store n'est pas plus ancien que <nom>.json : parser_cours sans
+    --store réécrit le JSON seul, un store antérieur est alors périmé.
+    """
+    json_path = idx_path.with_name(idx_path.name[: -len(INDEX_SUFFIX)] + ".json")
+    return not json_path.exists() or idx_path.stat().st_mtime_ns >= json_path.stat().st_mtime_ns
 
 
 def main():
-    json_files = list(INPUT_DIR.glob("*.json"))
-    if not json_files:
+    store_files = [p for p in INPUT_DIR.glob(f"*{INDEX_SUFFIX}") if store_is_fresh(p)]
+    stored = {p.name[: -len(INDEX_SUFFIX)] for p in store_files}
+    # Un document disponible en store colonnaire (à jour) n'est pas relu depuis le JSON
+    json_files = [p for p in INPUT_DIR.glob("*.json") if p.stem not in stored]
+    if not json_files and not store_files:
         print(f"Aucun fichier JSON trouvé dans {INPUT_DIR}")
         return
 
+    for file_path in store_files:
+        try:
+            process_store(file_path)
+        except Exception as err:
+            print(f"⛔  Erreur sur {file_path.name} : {err}")
+
     for file_path in json_files:
         try:
             process_file(file_path)
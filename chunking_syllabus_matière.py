@@ -10,23 +10,37 @@ selon le schéma :
             "titre_document": "Syllabus matière",
             "numero_page": <int>,
             "titre_section": "<Titre de la section>",
-            "matiere": "",
-            "document_path": ""
+            "matiere": "<Matière, ou nom du fichier si vide>",
+            "document_path": "data/syllabus_matiere/<fichier>.pdf",
+            "code": "<Code>", "cursus": "<Cursus>", "semestre": "<Semestre>"
         }
     }
 
 - Source :  output/syllabus_matiere/*.json
 - Sortie :  output/syllabus_matiere/chunks/<fichier>_chunks.json
+- Valeur trop longue (> MAX_TOKENS tokens estimés) : découpée aux phrases et
+  puces (text_splitter), un chunk par partie avec "partie" / "nb_parties"
+- Avec --hierarchical : chaque chunk reçoit metadata["parent_id"] et les
+  chunks de section sont écrits dans <fichier>_parents.json (cf. chunk_tree)
 """
 
-import json
+import json, sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+from atomic_io import atomic_write_text
+from chunk_tree import clear_parents, link_sections, write_parents
+from text_splitter import DEFAULT_MAX_TOKENS, split_field
 
 # Répertoires
 INPUT_DIR = Path("output/syllabus_matiere")
 OUTPUT_DIR = INPUT_DIR / "chunks"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+PDF_DIR = Path("data/syllabus_matiere")
+
+# Champs de « Détails du syllabus » recopiés dans les métadonnées de chaque chunk
+DOCUMENT_FIELDS = {"Code": "code", "Cursus": "cursus", "Semestre": "semestre"}
+UNKNOWN_VALUES = ("", "N.C")
+MAX_TOKENS = DEFAULT_MAX_TOKENS     # 0 : pas de découpage
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -39,32 +53,56 @@ def _to_str(value: Any) -> str:
     return str(value)
 
 
+def _field(details: Dict[str, Any], name: str) -> str:
+    """Valeur d'un champ {'value', 'page'} ; "" si absent ou non communiqué."""
+    value = str((details.get(name) or {}).get("value", "")).strip()
+    return "" if value in UNKNOWN_VALUES else value
+
+
+def document_metadata(data: Dict[str, Any], stem: Optional[str] = None) -> Dict[str, str]:
+    """Métadonnées communes à tous les chunks d'un syllabus (Détails du syllabus + chemin du PDF)."""
+    source = data.get("_meta", {}).get("source_pdf") or (f"{stem}.pdf" if stem else "")
+    stem = stem or Path(source).stem
+    details = data.get("Détails du syllabus") or {}
+    meta = {
+        "matiere": _field(details, "Matière") or stem,
+        "document_path": str(PDF_DIR / source) if source else "",
+    }
+    for name, key in DOCUMENT_FIELDS.items():
+        meta[key] = _field(details, name)
+    return meta
+
+
 def _add_chunk(
     chunks: List[Dict[str, Any]],
     section: str,
     field: str,
     value: Any,
     page: int,
+    max_tokens: int = MAX_TOKENS,
 ) -> None:
-    """Ajoute un chunk au tableau."""
-    chunks.append(
-        {
-            "content": f"{field}: {_to_str(value)}",
-            "metadata": {
-                "titre_document": "Syllabus matière",
-                "numero_page": page,
-                "titre_section": section,
-                "matiere": "",
-                "document_path": "",
-            },
+    """Ajoute un chunk au tableau (plusieurs si la valeur dépasse max_tokens)."""
+    if isinstance(value, str) and max_tokens:
+        contents = split_field(f"{field}: ", value, max_tokens)
+    else:
+        contents = [f"{field}: {_to_str(value)}"]
+    for rank, content in enumerate(contents, 1):
+        metadata = {
+            "titre_document": "Syllabus matière",
+            "numero_page": page,
+            "titre_section": section,
+            "matiere": "",
+            "document_path": "",
         }
-    )
+        if len(contents) > 1:
+            metadata.update(partie=rank, nb_parties=len(contents))
+        chunks.append({"content": content, "metadata": metadata})
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Extraction récursive
 # ──────────────────────────────────────────────────────────────────────────────
-def _visit(section_name: str, node: Any, chunks: List[Dict[str, Any]]) -> None:
+def _visit(section_name: str, node: Any, chunks: List[Dict[str, Any]], max_tokens: int = MAX_TOKENS) -> None:
     """
     Explore récursivement un nœud (dict ou list) afin de générer les chunks.
     - Si node possède 'value' et 'page' ➜ feuille.
@@ -73,43 +111,69 @@ def _visit(section_name: str, node: Any, chunks: List[Dict[str, Any]]) -> None:
     if isinstance(node, dict):
         # Feuille {'value': ..., 'page': ...}
         if {"value", "page"} <= node.keys():
-            _add_chunk(chunks, section_name, section_name, node["value"], node["page"])
+            _add_chunk(chunks, section_name, section_name, node["value"], node["page"], max_tokens)
         else:
             # Dictionnaire de sous-champs
             for sub_key, sub_val in node.items():
                 if isinstance(sub_val, dict) and {"value", "page"} <= sub_val.keys():
                     _add_chunk(
-                        chunks, section_name, sub_key, sub_val["value"], sub_val["page"]
+                        chunks, section_name, sub_key, sub_val["value"], sub_val["page"], max_tokens
                     )
                 else:
-                    _visit(sub_key, sub_val, chunks)
+                    _visit(sub_key, sub_val, chunks, max_tokens)
     elif isinstance(node, list):
         for item in node:
-            _visit(section_name, item, chunks)
+            _visit(section_name, item, chunks, max_tokens)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Traitement d'un fichier
 # ──────────────────────────────────────────────────────────────────────────────
-def _process_file(path: Path) -> None:
-    with path.open(encoding="utf-8") as f:
-        data = json.load(f)
-
-    chunks: List[Dict[str, Any]] = []
+def build_sections(data: Dict[str, Any], stem: Optional[str] = None,
+                   max_tokens: int = MAX_TOKENS) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Chunks d'un syllabus déjà parsé, regroupés par section de premier niveau."""
+    doc = document_metadata(data, stem)
+    sections: List[Tuple[str, List[Dict[str, Any]]]] = []
     for section, body in data.items():
         if section == "_meta":
             continue
-        _visit(section, body, chunks)
+        chunks: List[Dict[str, Any]] = []
+        _visit(section, body, chunks, max_tokens)
+        for chunk in chunks:
+            chunk["metadata"].update(doc)
+        sections.append((section, chunks))
+    return sections
+
+
+def build_chunks(data: Dict[str, Any], stem: Optional[str] = None,
+                 max_tokens: int = MAX_TOKENS) -> List[Dict[str, Any]]:
+    """Chunks d'un syllabus déjà parsé (dict renvoyé par parse_pdf)."""
+    return [c for _, chunks in build_sections(data, stem, max_tokens) for c in chunks]
+
+
+def _process_file(path: Path, hierarchical: bool = False, max_tokens: int = MAX_TOKENS) -> None:
+    with path.open(encoding="utf-8") as f:
+        data = json.load(f)
 
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     out_path = OUTPUT_DIR / f"{path.stem}_chunks.json"
-    out_path.write_text(json.dumps(chunks, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"✔ {path.name} → {out_path.relative_to(Path.cwd())} ({len(chunks)} chunks)")
+    if hierarchical:
+        chunks, parents = link_sections(build_sections(data, path.stem, max_tokens), INPUT_DIR.name, path.stem, "Syllabus matière")
+        write_parents(out_path, parents)
+    else:
+        chunks = build_chunks(data, path.stem, max_tokens)
+        clear_parents(out_path)
+    atomic_write_text(out_path, json.dumps(chunks, ensure_ascii=False, indent=2))
+    print(f"✔ {path.name} → {out_path} ({len(chunks)} chunks"
+          f"{f', {len(parents)} parents' if hierarchical else ''})")
 
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Point d’entrée
 # ──────────────────────────────────────────────────────────────────────────────
-def main() -> None:
+def main(hierarchical: Optional[bool] = None, max_tokens: int = MAX_TOKENS) -> None:
+    if hierarchical is None:
+        hierarchical = "--hierarchical" in sys.argv[1:]
     json_files = sorted(INPUT_DIR.glob("*.json"))
     if not json_files:
         print(f"Aucun fichier JSON trouvé dans {INPUT_DIR.resolve()}")
@@ -117,7 +181,7 @@ def main() -> None:
 
     for file_path in json_files:
         try:
-            _process_file(file_path)
+            _process_file(file_path, hierarchical, max_tokens)
         except Exception as err:
             print(f"⛔  Erreur sur {file_path.name}: {err}")
 
@@ -1,6 +1,33 @@
 import json
 import os
-from typing import List, Dict, Any
+import sys
+from typing import List, Dict, Any, Optional, Tuple
+
+from atomic_io import atomic_write_text
+from chunk_tree import clear_parents, link_sections, write_parents
+from text_splitter import DEFAULT_MAX_TOKENS, split_field
+
+PDF_DIR = "data/syllabus_projet"
+MAX_TOKENS = DEFAULT_MAX_TOKENS     # 0 : pas de découpage
+
+
+def document_metadata(json_data: Dict[str, Any], stem: Optional[str] = None) -> Dict[str, str]:
+    """
+    Métadonnées communes à tous les chunks d'un syllabus projet.
+
+    Args:
+        json_data: Le contenu du JSON nettoyé
+        stem: Le nom du fichier source sans extension (inconnu pour un PDF reçu en mémoire)
+
+    Returns:
+        {"matiere": "Matière liée au projet" (ou le nom du fichier), "document_path": chemin du PDF}
+    """
+    groupes = json_data.get("1 Matières, formations et groupes") or {}
+    matiere = str((groupes.get("Matière liée au projet") or {}).get("value", "")).strip()
+    return {
+        "matiere": matiere or stem or "",
+        "document_path": f"{PDF_DIR}/{stem}.pdf" if stem else "",
+    }
 
 
 def create_chunk(content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
@@ -20,7 +47,28 @@ def create_chunk(content: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def process_section_to_chunks(section_name: str, section_data: Any, chunks: List[Dict[str, Any]]) -> None:
+def add_chunks(chunks: List[Dict[str, Any]], prefix: str, value: str, metadata: Dict[str, Any],
+               max_tokens: int = MAX_TOKENS) -> None:
+    """
+    Ajoute le chunk « prefix + value », découpé aux phrases et puces s'il dépasse max_tokens.
+
+    Args:
+        chunks: La liste des chunks où ajouter les nouveaux chunks
+        prefix: Le début du contenu ("Champ: " ou "")
+        value: La valeur du champ
+        metadata: Les métadonnées communes aux parties
+        max_tokens: Le budget de tokens estimés par chunk (0 : pas de découpage)
+    """
+    contents = split_field(prefix, value, max_tokens) if max_tokens and isinstance(value, str) else [f"{prefix}{value}"]
+    for rank, content in enumerate(contents, 1):
+        part_metadata = dict(metadata)
+        if len(contents) > 1:
+            part_metadata.update(partie=rank, nb_parties=len(contents))
+        chunks.append(create_chunk(content, part_metadata))
+
+
+def process_section_to_chunks(section_name: str, section_data: Any, chunks: List[Dict[str, Any]],
+                              max_tokens: int = MAX_TOKENS) -> None:
     """
     Transforme une section du JSON en chunks.
 
@@ -28,6 +76,7 @@ def process_section_to_chunks(section_name: str, section_data: Any, chunks: List
         section_name: Le nom de la section
         section_data: Les données de la section
         chunks: La liste des chunks où ajouter les nouveaux chunks
+        max_tokens: Le budget de tokens estimés par chunk (0 : pas de découpage)
     """
 
     if section_name == "4 Livrables et étapes de suivi":
@@ -42,17 +91,13 @@ def process_section_to_chunks(section_name: str, section_data: Any, chunks: List
                         "matiere": "",
                         "document_path": ""
                     }
-                    chunk = create_chunk(item['value'], metadata)
-                    chunks.append(chunk)
+                    add_chunks(chunks, "", item['value'], metadata, max_tokens)
 
     elif isinstance(section_data, dict):
         # Pour toutes les autres sections
         for field_name, field_data in section_data.items():
             if isinstance(field_data, dict) and 'value' in field_data and 'page' in field_data:
                 if field_data['value']:  # Ne créer un chunk que si la valeur n'est pas vide
-                    # Créer le contenu au format "clé: valeur"
-                    content = f"{field_name}: {field_data['value']}"
-
                     metadata = {
                         "titre_document": "Syllabus projet",
                         "numero_page": field_data['page'],
@@ -61,16 +106,74 @@ def process_section_to_chunks(section_name: str, section_data: Any, chunks: List
                         "document_path": ""
                     }
 
-                    chunk = create_chunk(content, metadata)
-                    chunks.append(chunk)
+                    # Contenu au format "clé: valeur"
+                    add_chunks(chunks, f"{field_name}: ", field_data['value'], metadata, max_tokens)
 
 
-def process_json_to_chunks(json_path: str) -> List[Dict[str, Any]]:
+def data_to_sections(json_data: Dict[str, Any], stem: Optional[str] = None,
+                     max_tokens: int = MAX_TOKENS) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Convertit un syllabus projet déjà chargé (dict) en chunks regroupés par section.
+
+    Args:
+        json_data: Le contenu du JSON nettoyé
+        stem: Le nom du fichier source sans extension
+        max_tokens: Le budget de tokens estimés par chunk
+
+    Returns:
+        Une liste de couples (nom de section, chunks de la section)
+    """
+    doc = document_metadata(json_data, stem)
+    sections: List[Tuple[str, List[Dict[str, Any]]]] = []
+    for section_name, section_data in json_data.items():
+        chunks: List[Dict[str, Any]] = []
+        process_section_to_chunks(section_name, section_data, chunks, max_tokens)
+        for chunk in chunks:
+            chunk["metadata"].update(doc)
+        sections.append((section_name, chunks))
+    return sections
+
+
+def data_to_chunks(json_data: Dict[str, Any], stem: Optional[str] = None,
+                   max_tokens: int = MAX_TOKENS) -> List[Dict[str, Any]]:
+    """
+    Convertit un syllabus projet déjà chargé (dict) en liste de chunks.
+
+    Args:
+        json_data: Le contenu du JSON nettoyé
+        stem: Le nom du fichier source sans extension
+        max_tokens: Le budget de tokens estimés par chunk
+
+    Returns:
+        Une liste de chunks
+    """
+    return [chunk for _, chunks in data_to_sections(json_data, stem, max_tokens) for chunk in chunks]
+
+
+def data_to_hierarchy(json_data: Dict[str, Any], stem: str,
+                      max_tokens: int = MAX_TOKENS) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Comme data_to_chunks, mais chaque chunk reçoit metadata["parent_id"]
+    et les chunks de section sont renvoyés à part (cf. chunk_tree).
+
+    Args:
+        json_data: Le contenu du JSON nettoyé
+        stem: Le nom du fichier source sans extension
+        max_tokens: Le budget de tokens estimés par chunk
+
+    Returns:
+        (chunks enfants, {parent_id: chunk de section})
+    """
+    return link_sections(data_to_sections(json_data, stem, max_tokens), "syllabus_projet", stem, "Syllabus projet")
+
+
+def process_json_to_chunks(json_path: str, max_tokens: int = MAX_TOKENS) -> List[Dict[str, Any]]:
     """
     Convertit un fichier JSON en liste de chunks.
 
     Args:
         json_path: Le chemin vers le fichier JSON
+        max_tokens: Le budget de tokens estimés par chunk
 
     Returns:
         Une liste de chunks
@@ -81,9 +184,8 @@ def process_json_to_chunks(json_path: str) -> List[Dict[str, Any]]:
         with open(json_path, 'r', encoding='utf-8') as f:
             json_data = json.load(f)
 
-        # Traiter chaque section
-        for section_name, section_data in json_data.items():
-            process_section_to_chunks(section_name, section_data, chunks)
+        stem = os.path.splitext(os.path.basename(json_path))[0]
+        chunks = data_to_chunks(json_data, stem, max_tokens)
 
     except Exception as e:
         print(f"Erreur lors du traitement de {json_path}: {str(e)}")
@@ -99,14 +201,19 @@ def save_chunks(chunks: List[Dict[str, Any]], output_path: str) -> None:
         chunks: La liste des chunks
         output_path: Le chemin de sortie
     """
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(chunks, f, indent=2, ensure_ascii=False)
+    atomic_write_text(output_path, json.dumps(chunks, indent=2, ensure_ascii=False))
 
 
-def process_all_files():
+def process_all_files(hierarchical: Optional[bool] = None, max_tokens: int = MAX_TOKENS):
     """
     Traite tous les fichiers JSON du dossier d'entrée et génère les chunks.
+
+    Args:
+        hierarchical: écrit aussi <nom>_parents.json (défaut : option --hierarchical)
+        max_tokens: Le budget de tokens estimés par chunk (0 : pas de découpage)
     """
+    if hierarchical is None:
+        hierarchical = "--hierarchical" in sys.argv[1:]
     input_dir = "output_clean_json"
     output_dir = "output/syllabus_projet/chunks"
 
@@ -129,17 +236,31 @@ def process_all_files():
         json_path = os.path.join(input_dir, json_file)
         print(f"\nTraitement de: {json_file}")
 
-        # Convertir en chunks
-        chunks = process_json_to_chunks(json_path)
+        # Nom du fichier de sortie
+        base_name = os.path.splitext(json_file)[0]
+        output_filename = f"{base_name}_chunks.json"
+        output_path = os.path.join(output_dir, output_filename)
+
+        # Convertir en chunks (une seule lecture du JSON, selon le mode)
+        parents: Dict[str, Dict[str, Any]] = {}
+        if hierarchical:
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    chunks, parents = data_to_hierarchy(json.load(f), base_name, max_tokens)
+            except Exception as e:
+                print(f"Erreur lors du traitement de {json_path}: {str(e)}")
+                chunks = []
+        else:
+            chunks = process_json_to_chunks(json_path, max_tokens)
 
         if chunks:
-            # Nom du fichier de sortie
-            base_name = os.path.splitext(json_file)[0]
-            output_filename = f"{base_name}_chunks.json"
-            output_path = os.path.join(output_dir, output_filename)
-
             # Sauvegarder les chunks
             save_chunks(chunks, output_path)
+            if hierarchical:
+                write_parents(output_path, parents)
+                print(f"  ✓ {len(parents)} chunks de section")
+            else:
+                clear_parents(output_path)
 
             print(f"  ✓ {len(chunks)} chunks créés")
             print(f"  → Sauvegardé dans: {output_filename}")
@@ -2,57 +2,26 @@ import json
 import os
 import re
 
+from atomic_io import atomic_write_text
+from field_spec import load_spec
+from regex_safety import search as bounded_search
+
+# Patterns de secours par champ, cherchés dans le dump TXT (field_specs/syllabus_projet.json)
+FIELD_PATTERNS = load_spec("syllabus_projet").get("txt_fallbacks", {})
+
 
 def extract_value_from_txt(txt_content, field_name, page_num=None):
     """
     Tente d'extraire une valeur du fichier texte pour un champ donné.
     Cherche d'abord dans la page spécifiée, puis dans tout le document.
     """
-    # Mapping des noms de champs vers les patterns de recherche
-    field_patterns = {
-        "Matière liée au projet": [
-            r"Matière[s]?\s*(?:liée[s]?\s*au\s*projet)?\s*:\s*([^\n]+)",
-            r"Module\s*:\s*([^\n]+)",
-            r"Cours\s*:\s*([^\n]+)",
-            # Pattern pour extraire depuis l'en-tête (ex: 2025-5A-IABD-DRL)
-            r"(\d{4}-\d+[A-Z]-[A-Z]+-[A-Z]+)"
-        ],
-        "Ouvrages de référence (livres, articles, revues, sites web...)": [
-            r"Ouvrages?\s*de\s*référence[^\n]*:\s*\n([^\n]+(?:\n(?!Outils|Imprimé)[^\n]+)*)",
-            r"Ouvrages?\s*de\s*référence[^\n]*:\s*([^\n]+)",
-            r"Références?\s*:\s*([^\n]+)",
-            r"Bibliographie\s*:\s*([^\n]+)"
-        ],
-        "Outils informatiques à installer": [
-            r"Outils?\s*informatiques?\s*à\s*installer\s*:\s*\n([^\n]+(?:\n(?!Imprimé)[^\n]+)*)",
-            r"Outils?\s*informatiques?\s*à\s*installer\s*:\s*([^\n]+)",
-            r"Outils?\s*:\s*([^\n]+)",
-            r"Logiciels?\s*:\s*([^\n]+)",
-            r"Installation[s]?\s*:\s*([^\n]+)"
-        ],
-        "Descriptif détaillé": [
-            r"Descriptif\s*détaillé\s*\n([^\n]+(?:\n(?!Imprimé|Ouvrages)[^\n]+)*)",
-            r"Descriptif\s*détaillé\s*:\s*([^\n]+(?:\n(?!Imprimé|Ouvrages)[^\n]+)*)",
-            r"Description\s*:\s*([^\n]+(?:\n(?!Imprimé)[^\n]+)*)",
-            r"Détails?\s*:\s*([^\n]+(?:\n(?!Imprimé)[^\n]+)*)"
-        ],
-        "Objectif du projet (à la fin du projet les étudiants sauront réaliser un...)": [
-            r"Objectif[s]?\s*du\s*projet[^\n]*:\s*([^\n]+(?:\n(?!Descriptif|Ouvrages|Outils|Imprimé)[^\n]+)*)",
-            r"Objectif[s]?\s*:\s*([^\n]+)",
-            r"But[s]?\s*du\s*projet\s*:\s*([^\n]+)"
-        ],
-        "Précisions": [
-            r"Précisions?\s*:\s*([^\n]+(?:\n(?!Imprimé)[^\n]+)*)",
-            r"Remarques?\s*:\s*([^\n]+)",
-            r"Notes?\s*:\s*([^\n]+)"
-        ]
-    }
 
     def search_in_text(text):
         """Cherche le pattern dans le texte donné."""
-        if field_name in field_patterns:
-            for pattern in field_patterns[field_name]:
-                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
+        if field_name in FIELD_PATTERNS:
+            for pattern in FIELD_PATTERNS[field_name]:
+                # Recherche bornée dans le temps (regex_safety) : un pattern trop lent passe au suivant
+                match = bounded_search(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
                 if match:
                     # Récupérer la valeur trouvée
                     if len(match.groups()) > 0:
@@ -123,6 +92,45 @@ def update_json_with_txt(json_data, txt_content):
     return updated_data
 
 
+def clean_file(json_path, output_dir="output_clean_json"):
+    """
+    Complète un JSON de syllabus projet avec son dump TXT
+    (<nom>_non_table.txt, même dossier) et l'écrit dans output_dir.
+    Retourne le chemin du JSON nettoyé.
+    """
+    input_dir = os.path.dirname(json_path)
+    json_file = os.path.basename(json_path)
+    base_name = os.path.splitext(json_file)[0]
+    txt_file = f"{base_name}_non_table.txt"
+    txt_path = os.path.join(input_dir, txt_file)
+
+    # Charger le JSON
+    with open(json_path, 'r', encoding='utf-8') as f:
+        json_data = json.load(f)
+
+    # Vérifier si le fichier TXT existe
+    if not os.path.exists(txt_path):
+        print(f"  ⚠ Fichier TXT non trouvé: {txt_file}")
+        print("  → Copie du JSON sans modification")
+    else:
+        # Charger le TXT
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            txt_content = f.read()
+
+        # Afficher un aperçu du contenu TXT
+        print(f"  → Fichier TXT trouvé ({len(txt_content)} caractères)")
+
+        # Mettre à jour le JSON avec les données du TXT
+        json_data = update_json_with_txt(json_data, txt_content)
+
+    # Sauvegarder le JSON nettoyé
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, json_file)
+    atomic_write_text(output_path, json.dumps(json_data, indent=2, ensure_ascii=False))
+
+    return output_path
+
+
 def process_files():
     """
     Traite tous les fichiers JSON et leurs dumps TXT correspondants.
@@ -141,40 +149,13 @@ def process_files():
         return
 
     for json_file in json_files:
-        base_name = os.path.splitext(json_file)[0]
-        txt_file = f"{base_name}_non_table.txt"
-
         json_path = os.path.join(input_dir, json_file)
-        txt_path = os.path.join(input_dir, txt_file)
 
         print(f"\n{'=' * 70}")
         print(f"Traitement de: {json_file}")
 
         try:
-            # Charger le JSON
-            with open(json_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-
-            # Vérifier si le fichier TXT existe
-            if not os.path.exists(txt_path):
-                print(f"  ⚠ Fichier TXT non trouvé: {txt_file}")
-                print("  → Copie du JSON sans modification")
-            else:
-                # Charger le TXT
-                with open(txt_path, 'r', encoding='utf-8') as f:
-                    txt_content = f.read()
-
-                # Afficher un aperçu du contenu TXT
-                print(f"  → Fichier TXT trouvé ({len(txt_content)} caractères)")
-
-                # Mettre à jour le JSON avec les données du TXT
-                json_data = update_json_with_txt(json_data, txt_content)
-
-            # Sauvegarder le JSON nettoyé
-            output_path = os.path.join(output_dir, json_file)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
-
+            output_path = clean_file(json_path, output_dir)
             print(f"\n  ✓ JSON sauvegardé dans: {output_path}")
 
         except Exception as e:
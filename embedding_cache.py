@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+embedding_cache.py
+------------------
+Cache d'embeddings adressé par le contenu : la clé est le hash du texte
+normalisé du chunk (NFC, espaces réduits) et du nom du modèle, jamais son
+identifiant ni ses métadonnées. Un deck réexporté (numéros de page
+décalés, chunks renumérotés) ne recalcule donc que les textes nouveaux.
+
+Un cache par modèle, dans .cache/embeddings/<modèle>/ :
+    meta.json            modèle, dimension, génération, capacité, horloge
+    vectors-<gen>.f32    vecteurs float32 concaténés, en ajout seul, lus par mmap
+    index-<gen>.bin      table de hachage sur disque (adressage ouvert, sondage
+                         linéaire) : enregistrements <clé 16 o | slot u32 | accès u32>,
+                         mmap en lecture/écriture, agrandie au-delà de 70 % de remplissage
+
+• compact(keep) ne garde que les `keep` entrées les plus récemment utilisées
+  (LRU) et réécrit vecteurs + index dans une nouvelle génération ; meta.json
+  est remplacé atomiquement en dernier, un arrêt en cours de compaction
+  laisse donc l'ancienne génération intacte.
+• Un seul écrivain à la fois par cache.
+
+Usage :
+    python embedding_cache.py embed output/*/chunks/*_chunks.json output/cours/chunk/*_chunks.json
+    python embedding_cache.py embed output/cours/chunk/*_chunks.json --backend mon_module:embed --model e5-large
+    python embedding_cache.py stats --model hash-256
+    python embedding_cache.py compact --model hash-256 --keep 50000
+"""
+
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import argparse, hashlib, importlib, json, mmap, os, re, struct, sys, time, unicodedata
+
+from atomic_io import atomic_write_text
+from chunk_store import chunker_files
+
+CACHE_DIR = Path(".cache/embeddings")
+RECORD = struct.Struct("<16sII")        # clé, slot, dernier accès
+EMPTY_KEY = bytes(16)
+INITIAL_CAPACITY = 1024
+MAX_LOAD = 0.7
+DEFAULT_BATCH = 64
+
+Embedder = Callable[[List[str]], Sequence[Sequence[float]]]
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _SPACES.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model}\0{normalize(text)}".encode("utf-8"), digest_size=16).digest()
+
+
+def _slug(model: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", model)
+
+
+# ── Embedder de démonstration ─────────────────────────────────────────────────
+def hashing_embedder(dim: int = 256) -> Embedder:
+    """Sac de mots haché (signé, normalisé L2) : sans dépendance, pour tester la chaîne."""
+    def embed(texts: List[str]) -> List[List[float]]:
+        out = []
+        for text in texts:
+            vec = [0.0] * dim
+            for word in re.findall(r"\w+", normalize(text).lower()):
+                h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+                vec[h % dim] += 1.0 if (h >> 63) else -1.0
+            norm = sum(v * v for v in vec) ** 0.5 or 1.0
+            out.append([v / norm for v in vec])
+        return out
+    return embed
+
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+class EmbeddingCache:
+    def __init__(self, model: str, root: Path = CACHE_DIR):
+        self.model = model
+        self.root = Path(root) / _slug(model)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.meta_path = self.root / "meta.json"
+        if self.meta_path.exists():
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            if meta["model"] != model:
+                raise ValueError(f"{self.root} contient le modèle {meta['model']}, pas {model}")
+        else:
+            meta = {"model": model, "dim": None, "generation": 0, "capacity": INITIAL_CAPACITY, "clock": 0}
+        self.dim: Optional[int] = meta["dim"]
+        self.generation: int = meta["generation"]
+        self.capacity: int = meta["capacity"]
+        self.clock: int = meta["clock"]
+        self.hits = self.misses = 0
+        self._open()
+
+    # -- fichiers ---------------------------------------------------------------
+    def _vectors_path(self, gen: Optional[int] = None) -> Path:
+        return self.root / f"vectors-{self.generation if gen is None else gen}.f32"
+
+    def _index_path(self, gen: Optional[int] = None) -> Path:
+        return self.root / f"index-{self.generation if gen is None else gen}.bin"
+
+    def _open(self) -> None:
+        index_path = self._index_path()
+        if not index_path.exists():
+            index_path.write_bytes(bytes(self.capacity * RECORD.size))
+        self._index_file = open(index_path, "r+b")
+        self._index = mmap.mmap(self._index_file.fileno(), 0)
+        self._vectors_file = open(self._vectors_path(), "ab+")
+        self._vmap: Optional[mmap.mmap] = None
+        # Le fichier de vecteurs fait foi : un slot n'est indexé qu'après l'écriture de son vecteur
+        size = os.fstat(self._vectors_file.fileno()).st_size
+        self.count = size // self._record_bytes if self.dim else 0
+
+    def _close_files(self) -> None:
+        if self._vmap is not None:
+            self._vmap.close()
+            self._vmap = None
+        self._index.close()
+        self._index_file.close()
+        self._vectors_file.close()
+
+    def _write_meta(self) -> None:
+        meta = {"model": self.model, "dim": self.dim, "generation": self.generation,
+                "capacity": self.capacity, "clock": self.clock, "count": self.count}
+        atomic_write_text(self.meta_path, json.dumps(meta, indent=2))
+
+    def close(self) -> None:
+        self._vectors_file.flush()
+        self._index.flush()
+        self._write_meta()
+        self._close_files()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def _record_bytes(self) -> int:
+        return 4 * (self.dim or 0)
+
+    # -- table de hachage -------------------------------------------------------
+    def _probe(self, key: bytes, index=None, capacity: Optional[int] = None):
+        """Position de la clé, ou de la case vide où l'insérer ; (position, trouvée)."""
+        index = self._index if index is None else index
+        mask = (capacity or self.capacity) - 1
+        pos = int.from_bytes(key[:8], "little") & mask
+        while True:
+            k = index[pos * RECORD.size: pos * RECORD.size + 16]
+            if k == key:
+                return pos, True
+            if k == EMPTY_KEY:
+                return pos, False
+            pos = (pos + 1) & mask
+
+    def _records(self) -> Iterable[tuple]:
+        for pos in range(self.capacity):
+            rec = RECORD.unpack_from(self._index, pos * RECORD.size)
+            if rec[0] != EMPTY_KEY:
+                yield rec
+
+    def _build_index(self, records: Iterable[tuple], capacity: int, path: Path) -> None:
+        buf = bytearray(capacity * RECORD.size)
+        for key, slot, stamp in records:
+            pos, _ = self._probe(key, buf, capacity)
+            RECORD.pack_into(buf, pos * RECORD.size, key, slot, stamp)
+        path.write_bytes(buf)
+
+    def _grow(self) -> None:
+        capacity = self.capacity * 2
+        tmp = self.root / f"index-{self.generation}.tmp"
+        self._build_index(list(self._records()), capacity, tmp)
+        self._index.close()
+        self._index_file.close()
+        os.replace(tmp, self._index_path())
+        self.capacity = capacity
+        self._index_file = open(self._index_path(), "r+b")
+        self._index = mmap.mmap(self._index_file.fileno(), 0)
+        self._write_meta()
+
+    # -- vecteurs ---------------------------------------------------------------
+    def _vector(self, slot: int) -> List[float]:
+        end = (slot + 1) * self._record_bytes
+        if self._vmap is None or len(self._vmap) < end:
+            if self._vmap is not None:
+                self._vmap.close()
+            self._vectors_file.flush()
+            self._vmap = mmap.mmap(self._vectors_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._vmap)[end - self._record_bytes: end].cast("f").tolist()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Vecteur en cache pour ce texte, ou None ; marque l'entrée comme utilisée."""
+        return self._get(cache_key(self.model, text))
+
+    def _get(self, key: bytes) -> Optional[List[float]]:
+        pos, found = self._probe(key)
+        if not found:
+            return None
+        _, slot, _ = RECORD.unpack_from(self._index, pos * RECORD.size)
+        RECORD.pack_into(self._index, pos * RECORD.size, key, slot, self.clock)
+        return self._vector(slot)
+
+    def _put(self, key: bytes, vector: Sequence[float]) -> None:
+        if self.dim is None:
+            self.dim = len(vector)
+            self._write_meta()
+        if len(vector) != self.dim:
+            raise ValueError(f"Vecteur de dimension {len(vector)}, attendu {self.dim}")
+        pos, found = self._probe(key)
+        if found:
+            return
+        self._vectors_file.write(array("f", vector).tobytes())
+        self._vectors_file.flush()
+        RECORD.pack_into(self._index, pos * RECORD.size, key, self.count, self.clock)
+        self.count += 1
+        if self.count > MAX_LOAD * self.capacity:
+            self._grow()
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        self._put(cache_key(self.model, text), vector)
+
+    # -- usage principal --------------------------------------------------------
+    def embed(self, texts: Sequence[str], embedder: Embedder, batch_size: int = DEFAULT_BATCH) -> List[List[float]]:
+        """
+        Vecteurs de tous les textes, dans l'ordre ; seuls les textes jamais vus
+        (après normalisation, doublons compris) sont passés à l'embedder.
+        """
+        self.clock += 1
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+        for i, text in enumerate(texts):
+            key = cache_key(self.model, text)
+            if key in missing:
+                missing[key].append(i)
+                continue
+            vec = self._get(key)
+            if vec is None:
+                missing[key] = [i]
+            else:
+                out[i] = vec
+        self.hits += len(texts) - len(missing)          # doublons du lot compris
+        self.misses += len(missing)
+
+        todo = list(missing)
+        for start in range(0, len(todo), batch_size):
+            batch = todo[start:start + batch_size]
+            vectors = embedder([texts[missing[k][0]] for k in batch])
+            for key, vec in zip(batch, vectors):
+                self._put(key, vec)
+                for i in missing[key]:
+                    out[i] = [float(v) for v in vec]
+        return out
+
+    # -- compaction -------------------------------------------------------------
+    def compact(self, keep: int) -> int:
+        """Garde les `keep` entrées les plus récemment utilisées ; renvoie le nombre d'entrées retirées."""
+        records = sorted(self._records(), key=lambda r: (r[2], r[1]), reverse=True)
+        kept, dropped = records[:keep], len(records) - min(keep, len(records))
+        kept.sort(key=lambda r: r[1])           # relit les vecteurs dans l'ordre du fichier
+        gen = self.generation + 1
+        capacity = INITIAL_CAPACITY
+        while len(kept) > MAX_LOAD * capacity:
+            capacity *= 2
+
+        with open(self._vectors_path(gen), "wb") as f:
+            for key, slot, _ in kept:
+                f.write(array("f", self._vector(slot)).tobytes())
+        self._build_index(((k, new, stamp) for new, (k, _, stamp) in enumerate(kept)), capacity,
+                          self._index_path(gen))
+
+        old_vectors, old_index = self._vectors_path(), self._index_path()
+        self._close_files()
+        self.generation, self.capacity = gen, capacity
+        self._open()
+        self._write_meta()                      # bascule atomique vers la nouvelle génération
+        old_vectors.unlink()
+        old_index.unlink()
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model": self.model, "dim": self.dim, "entries": self.count, "capacity": self.capacity,
+                "generation": self.generation,
+                "vector_bytes": self.count * self._record_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+# ── Chunks ────────────────────────────────────────────────────────────────────
+def embed_chunk_files(paths: Iterable[Path], cache: EmbeddingCache, embedder: Embedder,
+                      batch_size: int = DEFAULT_BATCH) -> Dict[Path, List[List[float]]]:
+    """Vecteurs des chunks de chaque fichier *_chunks.json (alignés sur la liste des chunks)."""
+    result = {}
+    for path in paths:
+        chunks = json.loads(Path(path).read_text(encoding="utf-8"))
+        result[Path(path)] = cache.embed([c.get("content", "") for c in chunks], embedder, batch_size)
+    return result
+
+
+def load_embedder(spec: str) -> Embedder:
+    """"hash" / "hash:512" → hashing_embedder ; "module:fonction" → fonction(textes) → vecteurs."""
+    name, _, arg = spec.partition(":")
+    if name == "hash":
+        return hashing_embedder(int(arg or 256))
+    return getattr(importlib.import_module(name), arg)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Cache d'embeddings adressé par le contenu")
+    ap.add_argument("--root", type=Path, default=CACHE_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    e = sub.add_parser("embed", help="calcule (ou relit) les embeddings des chunks")
+    e.add_argument("files", nargs="+", type=Path)
+    e.add_argument("--backend", default="hash", help='"hash[:dim]" ou "module:fonction"')
+    e.add_argument("--model", default=None, help="nom du modèle (défaut : hash-<dim> ou le backend)")
+    e.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+    s = sub.add_parser("stats", help="taille du cache d'un modèle")
+    s.add_argument("--model", required=True)
+    c = sub.add_parser("compact", help="ne garde que les N entrées les plus récemment utilisées")
+    c.add_argument("--model", required=True)
+    c.add_argument("--keep", type=int, required=True)
+    args = ap.parse_args()
+
+    if args.cmd == "embed":
+        model = args.model or (f"hash-{args.backend.partition(':')[2] or 256}" if args.backend.startswith("hash")
+                               else args.backend)
+        embedder = load_embedder(args.backend)
+        t0 = time.perf_counter()
+        with EmbeddingCache(model, args.root) as cache:
+            vectors = embed_chunk_files(chunker_files(args.files), cache, embedder, args.batch_size)
+            n = sum(len(v) for v in vectors.values())
+            print(f"✅ {n} chunks, {cache.misses} texte(s) calculé(s), {cache.hits} relu(s) du cache "
+                  f"({time.perf_counter() - t0:.2f}s) ; {len(cache)} entrées pour {model}")
+    elif args.cmd == "stats":
+        with EmbeddingCache(args.model, args.root) as cache:
+            print(json.dumps(cache.stats(), indent=2))
+    else:
+        with EmbeddingCache(args.model, args.root) as cache:
+            dropped = cache.compact(args.keep)
+            print(f"✔ {dropped} entrée(s) retirée(s), {len(cache)} conservée(s)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (ValueError, ImportError, AttributeError) as err:
+        sys.exit(f"⛔ {err}")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+field_spec.py
+-------------
+Règles d'extraction des champs décrites en JSON (field_specs/<template>.json)
+et compilées en un scanner unique par section.
+
+Format d'un template :
+    {
+      "template": "syllabus_matiere",
+      "sections": {
+        "<Section>": {
+          "flags": ["IGNORECASE", "DOTALL"],     # flags re
+          "label_suffix": "\\\\s*:\\\\s*",         # ajouté aux libellés par défaut
+          "duplicates": "last" | "first",        # libellé répété : quelle occurrence garder
+          "until": "next_label" | "next_field",  # fin de valeur : prochain libellé trouvé,
+                                                 # ou libellé du champ suivant (sinon valeur vide)
+          "post": [...],                         # post-traitements de tous les champs
+          "fields": [
+            {"name": "Code"},                    # libellé = re.escape(name) + label_suffix
+            {"name": "...", "label": "<regex>",  # libellé explicite
+             "value": "<regex à 1 groupe>",      # valeur cherchée dans la tranche
+             "end": "<regex>",                   # ancre de fin : la tranche va du libellé à la
+                                                 # DERNIÈRE occurrence d'end (sinon valeur vide),
+                                                 # sans tenir compte de "until"
+             "post": [...]}                      # exécutés après ceux de la section
+          ]
+        }
+      },
+      "txt_fallbacks": {"<champ>": ["<regex>", ...]}   # optionnel (cleaning)
+    }
+
+Tous les libellés d'une section sont réunis dans une seule alternation à
+groupes nommés : un seul ``finditer`` découpe la section en tranches
+« libellé → libellé suivant », puis chaque champ applique sa regex de valeur
+et ses post-traitements à sa seule tranche.
+
+Les recherches de valeur passent par regex_safety.search (budget de temps
+par recherche) ; l'ancre "end" est localisée par regex_safety.last_match.
+
+Post-traitements : "strip", "collapse_ws", "drop_labels" (retire tout libellé
+de la section resté dans la valeur), {"sub": [regex, remplacement]},
+{"search": regex} (garde le groupe 1, ou le match entier), et tout nom passé
+dans ``ops`` par l'appelant.
+
+Usage :
+    python field_spec.py syllabus_projet "3 Détails du projet" fichier.txt
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import json, re, sys
+
+from regex_safety import last_match, search as bounded_search
+
+SPEC_DIR = Path(__file__).resolve().parent / "field_specs"
+
+_FLAGS = {"IGNORECASE": re.I, "DOTALL": re.S, "MULTILINE": re.M}
+
+
+def _flags(names: List[str]) -> int:
+    out = 0
+    for n in names:
+        out |= _FLAGS[n]
+    return out
+
+
+class SectionScanner:
+    """Extracteur compilé pour une section : un seul passage sur le texte."""
+
+    def __init__(self, name: str, spec: Dict[str, Any], ops: Optional[Dict[str, Callable[[str], str]]] = None,
+                 strict: bool = True):
+        self.name = name
+        self.flags = _flags(spec.get("flags", []))
+        self.first = spec.get("duplicates", "last") == "first"
+        self.chained = spec.get("until", "next_label") == "next_field"
+        suffix = spec.get("label_suffix", "")
+        self.names: List[str] = [f["name"] for f in spec["fields"]]
+
+        parts = []
+        for i, f in enumerate(spec["fields"]):
+            label = f.get("label", re.escape(f["name"]) + suffix)
+            parts.append(f"(?P<f{i}>{label})")
+        self.regex = re.compile("|".join(parts), self.flags)
+
+        self._value = [re.compile(f["value"], self.flags) if "value" in f else None for f in spec["fields"]]
+        self._end = [re.compile(f["end"], self.flags) if "end" in f else None for f in spec["fields"]]
+        section_post = spec.get("post", [])
+        self._strict = strict
+        self._post = [self._compile_ops(section_post + f.get("post", []), ops or {}) for f in spec["fields"]]
+
+    def _compile_ops(self, steps: List[Any], ops: Dict[str, Callable[[str], str]]) -> List[Callable[[str], str]]:
+        funcs = []
+        for step in steps:
+            if isinstance(step, dict) and "sub" in step:
+                pat, repl = step["sub"]
+                rx = re.compile(pat)
+                funcs.append(lambda v, rx=rx, repl=repl: rx.sub(repl, v))
+            elif isinstance(step, dict) and "search" in step:
+                rx = re.compile(step["search"])
+
+                def _search(v, rx=rx):
+                    m = rx.search(v)
+                    return (m.group(1) if rx.groups else m.group(0)) if m else ""
+                funcs.append(_search)
+            elif step == "strip":
+                funcs.append(str.strip)
+            elif step == "collapse_ws":
+                funcs.append(lambda v: re.sub(r"\s+", " ", v))
+            elif step == "drop_labels":
+                funcs.append(lambda v: self.regex.sub("", v))
+            elif step in ops:
+                funcs.append(ops[step])
+            elif not self._strict:
+                print(f"⚠ Post-traitement {step!r} ignoré ({self.name})", file=sys.stderr)
+            else:
+                raise ValueError(f"Post-traitement inconnu dans {self.name!r} : {step!r}")
+        return funcs
+
+    def scan(self, text: str) -> Dict[str, str]:
+        """Renvoie {nom_champ: valeur} ("" si le libellé est absent)."""
+        out = {n: "" for n in self.names}
+        if not text:
+            return out
+        matches = list(self.regex.finditer(text))
+        seen = set()
+        for k, m in enumerate(matches):
+            i = int(m.lastgroup[1:])
+            if self.first and i in seen:
+                continue
+            seen.add(i)
+            if self._end[i] is not None:
+                # +1 : valeur non vide, comme [\s\S]*?(VALEUR)[\s\S]*?FIN
+                last = last_match(self._end[i], text, m.end() + 1)
+                if last is None:
+                    continue
+                end = last.start()
+            elif self.chained:
+                end = self._next_field_start(matches, k, i, len(text))
+                if end is None:
+                    continue
+            else:
+                end = matches[k + 1].start() if k + 1 < len(matches) else len(text)
+            if self._value[i] is not None:
+                # Recherche bornée dans le temps (regex_safety) : valeur vide si le budget est dépassé
+                vm = bounded_search(self._value[i], text, pos=m.end(), endpos=end)
+                val = vm.group(1) if vm else ""
+            else:
+                val = text[m.end():end]
+            for fn in self._post[i]:
+                val = fn(val)
+            out[self.names[i]] = val
+        return out
+
+    def _next_field_start(self, matches: List["re.Match"], k: int, i: int, size: int) -> Optional[int]:
+        """Début du libellé du champ i+1 après la k-ième correspondance (fin du texte pour le dernier champ)."""
+        if i + 1 == len(self.names):
+            return size
+        for m in matches[k + 1:]:
+            if m.lastgroup == f"f{i + 1}":
+                return m.start()
+        return None
+
+
+def load_spec(template: str) -> Dict[str, Any]:
+    """Charge le JSON d'un template (nom dans field_specs/ ou chemin)."""
+    path = Path(template)
+    if not path.suffix:
+        path = SPEC_DIR / f"{template}.json"
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_template(template: str, ops: Optional[Dict[str, Callable[[str], str]]] = None,
+                  strict: bool = True) -> Dict[str, SectionScanner]:
+    """
+    Compile toutes les sections d'un template. Avec strict=False, les
+    post-traitements nommés non fournis dans ``ops`` sont ignorés.
+    """
+    spec = load_spec(template)
+    return {name: SectionScanner(name, sec, ops, strict) for name, sec in spec["sections"].items()}
+
+
+def main() -> None:
+    if len(sys.argv) != 4:
+        sys.exit("Usage : field_spec.py <template> <section> <fichier texte>")
+    template, section, path = sys.argv[1:]
+    scanner = load_template(template, strict=False)[section]
+    text = Path(path).read_text(encoding="utf-8")
+    print(json.dumps(scanner.scan(text), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
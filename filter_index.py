@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+filter_index.py
+---------------
+Index bitmap des métadonnées de chunks, pour restreindre les candidats
+(« semestre 2, syllabus matière ») avant tout calcul de score texte ou
+vecteur.
+
+• Un bitset par (clé, valeur) de métadonnée : bit i = chunk n° i.
+• Requête : OU entre les valeurs d'une même clé, ET entre les clés ;
+  le résultat est la liste des identifiants (cf. chunk_store.chunk_id_for).
+• Bitsets en tableaux NumPy uint8 (np.packbits) si numpy est installé,
+  sinon en entiers Python — même fichier sur disque, mêmes résultats.
+
+Structure d'un index (un dossier) :
+    filters.json : version, nombre de chunks, identifiants, {clé: {valeur: ligne}}
+    filters.bin  : lignes de ceil(n / 8) octets, bit i de l'octet j = chunk 8j + i
+
+Usage :
+    python filter_index.py build output/filter_index output/*/chunks/*_chunks.json output/cours/chunk/*_chunks.json
+    python filter_index.py query output/filter_index semestre="Semestre 2" titre_document="Syllabus matière"
+    python filter_index.py query output/filter_index matiere=docker matiere=drl --count
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+import argparse, json, sys
+
+from atomic_io import atomic_open, atomic_write_text
+from chunk_store import chunk_id_for, chunker_files
+
+try:
+    import numpy as np
+except ImportError:          # numpy est optionnel : repli sur les entiers Python
+    np = None
+
+VERSION = 1
+# Métadonnées indexées (valeurs chaînes uniquement ; numero_page et parent_id ne servent pas de filtre)
+FACETS = ("titre_document", "titre_section", "matiere", "code", "cursus", "semestre")
+
+Filters = Dict[str, Union[str, Sequence[str]]]
+
+
+def _nbytes(count: int) -> int:
+    return (count + 7) // 8
+
+
+# ── Construction ──────────────────────────────────────────────────────────────
+def build(chunks: Iterable[Tuple[str, Dict[str, Any]]], facets: Sequence[str] = FACETS) -> "FilterIndex":
+    """(identifiant, chunk)… → FilterIndex en mémoire."""
+    ids: List[str] = []
+    positions: Dict[str, Dict[str, List[int]]] = {key: {} for key in facets}
+    for cid, chunk in chunks:
+        meta = chunk.get("metadata") or {}
+        for key in facets:
+            value = meta.get(key)
+            if isinstance(value, str) and value:
+                positions[key].setdefault(value, []).append(len(ids))
+        ids.append(cid)
+
+    rows: List[bytes] = []
+    table: Dict[str, Dict[str, int]] = {}
+    for key, values in positions.items():
+        table[key] = {}
+        for value, where in sorted(values.items()):
+            bits = bytearray(_nbytes(len(ids)))
+            for i in where:
+                bits[i >> 3] |= 1 << (i & 7)
+            table[key][value] = len(rows)
+            rows.append(bytes(bits))
+    return FilterIndex(ids, table, b"".join(rows))
+
+
+def iter_chunk_files(paths: Iterable[Path]) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    for path in paths:
+        with Path(path).open(encoding="utf-8") as f:
+            for rank, chunk in enumerate(json.load(f)):
+                yield chunk_id_for(path, rank), chunk
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+class FilterIndex:
+    def __init__(self, ids: List[str], table: Dict[str, Dict[str, int]], data: bytes):
+        self.ids = ids
+        self.table = table
+        width = _nbytes(len(ids))
+        if np is not None:
+            self._rows = np.frombuffer(data, dtype=np.uint8).reshape(len(data) // width if width else 0, width)
+        else:
+            self._rows = [int.from_bytes(data[i:i + width], "little") for i in range(0, len(data), width or 1)]
+        self._width = width
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ── Persistance ──
+    def save(self, root: Path) -> None:
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        if np is not None:
+            data = self._rows.tobytes()
+        else:
+            data = b"".join(r.to_bytes(self._width, "little") for r in self._rows)
+        # Bitsets d'abord, en-tête ensuite (les deux atomiquement) ; "bytes" détecte au
+        # chargement un en-tête qui ne correspondrait pas au filters.bin présent
+        with atomic_open(root / "filters.bin", "wb") as f:
+            f.write(data)
+        header = {"version": VERSION, "count": len(self.ids), "bytes": len(data), "ids": self.ids,
+                  "facets": self.table}
+        atomic_write_text(root / "filters.json", json.dumps(header, ensure_ascii=False, separators=(",", ":")))
+
+    @classmethod
+    def load(cls, root: Path) -> "FilterIndex":
+        root = Path(root)
+        header = json.loads((root / "filters.json").read_text(encoding="utf-8"))
+        if header.get("version") != VERSION:
+            raise ValueError(f"Version d'index non supportée : {header.get('version')}")
+        data = (root / "filters.bin").read_bytes()
+        if header.get("bytes", len(data)) != len(data):
+            raise ValueError(f"{root} : filters.bin ne correspond pas à filters.json (sauvegarde interrompue ?)")
+        return cls(header["ids"], header["facets"], data)
+
+    # ── Requêtes ──
+    def values(self, key: str) -> List[str]:
+        return list(self.table.get(key, {}))
+
+    def mask(self, filters: Filters):
+        """Bitset des chunks qui satisfont tous les filtres (tableau NumPy ou entier)."""
+        if np is not None:
+            acc = np.full(self._width, 0xFF, dtype=np.uint8)
+        else:
+            acc = (1 << len(self.ids)) - 1
+        for key, wanted in filters.items():
+            if key not in self.table:
+                raise KeyError(f"Métadonnée non indexée : {key} (indexées : {', '.join(self.table)})")
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            rows = [self.table[key][v] for v in wanted if v in self.table[key]]
+            if np is not None:
+                either = np.bitwise_or.reduce(self._rows[rows], axis=0) if rows else np.zeros(self._width, np.uint8)
+            else:
+                either = 0
+                for r in rows:
+                    either |= self._rows[r]
+            acc = acc & either
+        return acc
+
+    def positions(self, filters: Filters) -> List[int]:
+        """Rangs (dans self.ids) des chunks retenus, dans l'ordre de l'index."""
+        acc = self.mask(filters)
+        if np is not None:
+            bits = np.unpackbits(acc, bitorder="little")[: len(self.ids)]
+            return np.flatnonzero(bits).tolist()
+        out = []
+        while acc:
+            low = acc & -acc          # bit de poids faible
+            out.append(low.bit_length() - 1)
+            acc ^= low
+        return out
+
+    def select(self, filters: Filters) -> List[str]:
+        """Identifiants des chunks retenus."""
+        return [self.ids[i] for i in self.positions(filters)]
+
+    def count(self, filters: Filters) -> int:
+        acc = self.mask(filters)
+        if np is not None:
+            return int(np.unpackbits(acc, bitorder="little")[: len(self.ids)].sum())
+        return bin(acc).count("1")
+
+
+def parse_filters(terms: Iterable[str]) -> Filters:
+    """["semestre=Semestre 2", "matiere=a", "matiere=b"] → {"semestre": ["Semestre 2"], "matiere": ["a", "b"]}."""
+    filters: Dict[str, List[str]] = {}
+    for term in terms:
+        key, sep, value = term.partition("=")
+        if not sep:
+            raise ValueError(f"Filtre attendu sous la forme clé=valeur : {term}")
+        filters.setdefault(key.strip(), []).append(value)
+    return filters
+
+
+# ── Point d'entrée ────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Index bitmap des métadonnées de chunks")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Construit l'index depuis des fichiers *_chunks.json")
+    b.add_argument("index", type=Path)
+    b.add_argument("files", nargs="+", type=Path)
+    q = sub.add_parser("query", help="Identifiants des chunks qui vérifient clé=valeur …")
+    q.add_argument("index", type=Path)
+    q.add_argument("filters", nargs="*")
+    q.add_argument("--count", action="store_true", help="affiche seulement le nombre de chunks")
+    v = sub.add_parser("values", help="Valeurs indexées d'une métadonnée")
+    v.add_argument("index", type=Path)
+    v.add_argument("key")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        index = build(iter_chunk_files(chunker_files(args.files)))
+        index.save(args.index)
+        n_values = sum(len(v) for v in index.table.values())
+        print(f"✔ {len(index)} chunks, {n_values} bitsets → {args.index}"
+              f"{'' if np is not None else '  (sans numpy)'}")
+        return
+
+    index = FilterIndex.load(args.index)
+    if args.cmd == "values":
+        for value in index.values(args.key):
+            print(f"{index.count({args.key: value}):>6}  {value}")
+        return
+    try:
+        filters = parse_filters(args.filters)
+        if args.count:
+            print(index.count(filters))
+        else:
+            for cid in index.select(filters):
+                print(cid)
+    except (KeyError, ValueError) as err:
+        sys.exit(f"⛔ {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+incremental_cours.py
+--------------------
+Ré-extraction page par page des cours déjà convertis par parser_cours.
+
+• Chaque page reçoit une empreinte (blake2b de son flux de contenu fitz
+  ``page.read_contents()``, des flux de ses Form XObjects, de ses polices et
+  de ses dimensions), stockée à côté du JSON dans
+  output/cours/<nom>.fingerprints.json.
+• À la réexportation d'un deck, seules les pages dont l'empreinte a changé
+  sont ré-extraites et re-nettoyées ; le JSON des pages est patché.
+• Le fichier de chunks output/cours/chunk/<nom>_chunks.json est patché de
+  même, et les identifiants des chunks touchés (format chunk_store :
+  "cours/<nom>:<rang>") sont renvoyés pour ré-ingestion.
+
+Usage :
+    python incremental_cours.py                    # tous les PDF de data/cours
+    python incremental_cours.py data/cours/Cours_spark_complet.pdf
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+import hashlib, json, sys
+
+from atomic_io import atomic_write_text
+from parser_cours import INPUT_DIR, OUTPUT_DIR, clean, write_json
+from page_store import INDEX_SUFFIX, write_store
+from chunk_store import chunk_id_for
+
+CHUNK_DIR = OUTPUT_DIR / "chunk"
+FP_SUFFIX = ".fingerprints.json"
+
+
+def page_fingerprint(page) -> str:
+    """
+    Empreinte d'une page : flux de contenu, Form XObjects, polices et taille.
+
+    Les exports PowerPoint / Keynote dessinent souvent le texte dans des Form
+    XObjects, que le flux de la page ne cite que par leur nom : leurs flux
+    (imbriqués compris, cf. get_xobjects) entrent donc dans l'empreinte.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(page.read_contents() or b"")
+    for xref, name, invoker, _bbox in page.get_xobjects():
+        h.update(f"{name}:{invoker}".encode())
+        h.update(page.parent.xref_stream(xref) or b"")
+    for font in page.get_fonts():
+        h.update(repr(font[1:]).encode())       # sans le xref, renuméroté à chaque export
+    h.update(repr(tuple(page.rect)).encode())
+    return h.hexdigest()
+
+
+def _load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _patch_chunks(stem: str, pages: List[Dict[str, Any]], dirty: set) -> List[str]:
+    """
+    Patche le fichier de chunks pour les pages ``dirty`` et renvoie les
+    identifiants de chunks à ré-ingérer (nouveaux, modifiés ou supprimés).
+    """
+    from chunking_cours import build_chunks, document_metadata
+
+    chunk_path = CHUNK_DIR / f"{stem}_chunks.json"
+    old = _load_json(chunk_path, None)
+    new = build_chunks(((p["page"], p["text"]) for p in pages), document_metadata(stem))
+    CHUNK_DIR.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(chunk_path, json.dumps(new, ensure_ascii=False, indent=2))
+
+    if old is None:
+        return [chunk_id_for(chunk_path, r) for r in range(len(new))]
+
+    # Les rangs ne glissent que si une page devient (ou cesse d'être) vide :
+    # tant que l'alignement tient, seuls les rangs des pages sales changent.
+    affected = set()
+    for rank, chunk in enumerate(new):
+        if chunk["metadata"]["numero_page"] in dirty:
+            affected.add(rank)
+    first_shift = next((r for r in range(min(len(old), len(new)))
+                        if old[r]["metadata"]["numero_page"] != new[r]["metadata"]["numero_page"]), None)
+    if first_shift is None and len(old) != len(new):
+        first_shift = min(len(old), len(new))
+    if first_shift is not None:
+        affected.update(range(first_shift, max(len(old), len(new))))
+    return [chunk_id_for(chunk_path, r) for r in sorted(affected)]
+
+
+def update_pdf(pdf_path: Path) -> Dict[str, Any]:
+    """
+    Met à jour le JSON (et les chunks) d'un cours en ne ré-extrayant que les
+    pages modifiées. Renvoie un rapport {changed_pages, removed_pages, chunk_ids}.
+    """
+    out_file = OUTPUT_DIR / f"{pdf_path.stem}.json"
+    fp_file = OUTPUT_DIR / f"{pdf_path.stem}{FP_SUFFIX}"
+    old_doc = _load_json(out_file, {"pages": []})
+    old_fps: List[str] = _load_json(fp_file, {}).get("pages", [])
+    # Sans empreintes connues, toutes les pages sont considérées comme modifiées
+    if len(old_fps) != len(old_doc.get("pages", [])):
+        old_fps = []
+
+    old_pages = {p["page"]: p for p in old_doc.get("pages", [])}
+    pages: List[Dict[str, Any]] = []
+    fps: List[str] = []
+    changed: List[int] = []
+
+    import fitz          # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        for i, page in enumerate(doc):
+            num = i + 1
+            fp = page_fingerprint(page)
+            fps.append(fp)
+            if i < len(old_fps) and old_fps[i] == fp and num in old_pages:
+                pages.append(old_pages[num])
+            else:
+                pages.append({"page": num, "text": clean(page.get_text("text") or "")})
+                changed.append(num)
+
+    removed = sorted(n for n in old_pages if n > len(pages))
+    report = {"source": pdf_path.name, "changed_pages": changed, "removed_pages": removed, "chunk_ids": []}
+    if not changed and not removed:
+        return report
+
+    store = (OUTPUT_DIR / f"{pdf_path.stem}{INDEX_SUFFIX}").exists()
+    write_json(pdf_path, pages)
+    if store:
+        write_store(OUTPUT_DIR / pdf_path.stem, [(p["page"], p["text"]) for p in pages], pdf_path.name)
+    atomic_write_text(fp_file, json.dumps({"source": pdf_path.name, "pages": fps}, indent=0))
+
+    report["chunk_ids"] = _patch_chunks(pdf_path.stem, pages, set(changed) | set(removed))
+    return report
+
+
+def main() -> None:
+    pdf_files = [Path(a) for a in sys.argv[1:]] or sorted(INPUT_DIR.glob("*.pdf"))
+    if not pdf_files:
+        sys.exit(f"❌ Aucun PDF trouvé dans {INPUT_DIR.resolve()}")
+
+    for pdf in pdf_files:
+        try:
+            report = update_pdf(pdf)
+            n = len(report["changed_pages"]) + len(report["removed_pages"])
+            print(f"✅ {pdf.name}  : {n} page(s) modifiée(s), {len(report['chunk_ids'])} chunk(s) à ré-ingérer")
+            print(json.dumps(report, ensure_ascii=False))
+        except Exception as err:
+            print(f"⛔ Erreur avec {pdf.name} : {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+layout_cache.py
+---------------
+Cache disque de l'extraction pdfplumber, pour itérer sur les regex de
+parse_final_data / kv_extract_with_page / parse_competences_block_with_page
+sans re-parser les PDF.
+
+Clé : sha256 du contenu du PDF + empreinte des réglages d'extraction.
+Contenu, par page :
+    • text            : page.extract_text()
+    • non_table_text  : texte hors tableaux (filtre « centre vertical hors bbox »
+                        utilisé par parser_syllabus_projet)
+    • tables          : bbox, lignes de table.extract() et texte
+                        page.crop(bbox).extract_text(**CROP_TEXT_SETTINGS)
+
+``open_pdf`` renvoie un objet qui imite la petite partie de l'API pdfplumber
+utilisée par les parsers (pages, extract_text, extract_tables, find_tables,
+crop(...).extract_text, filter(...).extract_text) : les parsers n'ont donc
+rien à changer d'autre que l'appel d'ouverture.
+
+Usage :
+    python layout_cache.py data/syllabus_projet/*.pdf     # pré-remplit le cache
+    python layout_cache.py --clear
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse, gzip, hashlib, json, shutil, sys
+
+from pdf_source import PdfSource, is_path, open_plumber, read_bytes
+
+CACHE_DIR = Path(".cache/layout")
+CACHE_VERSION = 1
+CROP_TEXT_SETTINGS = {"x_tolerance": 2, "y_tolerance": 2, "layout": True}
+SETTINGS = {"version": CACHE_VERSION, "crop_text": CROP_TEXT_SETTINGS}
+
+
+# ── Clé de cache ──────────────────────────────────────────────────────────────
+def file_hash(pdf_path: PdfSource) -> str:
+    if not is_path(pdf_path):
+        return hashlib.sha256(read_bytes(pdf_path)).hexdigest()
+    h = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def settings_hash(settings: Dict[str, Any] = SETTINGS) -> str:
+    raw = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:12]
+
+
+def cache_path(pdf_path: PdfSource, cache_dir: Path = CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"{file_hash(pdf_path)}-{settings_hash()}.json.gz"
+
+
+# ── Extraction ────────────────────────────────────────────────────────────────
+def extract_layout(pdf_path: PdfSource) -> List[Dict[str, Any]]:
+    """Passe pdfplumber unique : tout ce dont les parsers ont besoin, page par page."""
+    pages = []
+    with open_plumber(pdf_path) as pdf:
+        for page in pdf.pages:
+            found = page.find_tables()
+
+            def not_in_table(obj):
+                v_center = (obj['top'] + obj['bottom']) / 2
+                return not any(tbl.bbox[1] <= v_center <= tbl.bbox[3] for tbl in found)
+
+            tables = [{
+                "bbox": list(t.bbox),
+                "rows": t.extract(),
+                "text": page.crop(t.bbox).extract_text(**CROP_TEXT_SETTINGS),
+            } for t in found]
+            pages.append({
+                "text": page.extract_text(),
+                "non_table_text": page.filter(not_in_table).extract_text(),
+                "tables": tables,
+            })
+    return pages
+
+
+def load_layout(pdf_path: PdfSource, cache_dir: Path = CACHE_DIR, refresh: bool = False) -> List[Dict[str, Any]]:
+    """Renvoie la mise en page du PDF, depuis le cache si possible."""
+    if not is_path(pdf_path):
+        pdf_path = read_bytes(pdf_path)      # un flux ne se relit pas : hash puis extraction
+    path = cache_path(pdf_path, cache_dir)
+    if path.exists() and not refresh:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    pages = extract_layout(pdf_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(pages, f, ensure_ascii=False, separators=(",", ":"))
+    tmp.replace(path)
+    return pages
+
+
+# ── Adaptateurs « façon pdfplumber » ─────────────────────────────────────────
+class CachedTable:
+    def __init__(self, data: Dict[str, Any]):
+        self.bbox = tuple(data["bbox"])
+        self._rows = data["rows"]
+        self.text = data["text"]
+
+    def extract(self, **_) -> List[List[Optional[str]]]:
+        return self._rows
+
+
+class _Text:
+    """Résultat de crop()/filter() : seul extract_text() est supporté."""
+
+    def __init__(self, text: Optional[str]):
+        self._text = text
+
+    def extract_text(self, **_) -> Optional[str]:
+        return self._text
+
+
+class CachedPage:
+    def __init__(self, number: int, data: Dict[str, Any]):
+        self.page_number = number
+        self._text = data["text"]
+        self._non_table_text = data["non_table_text"]
+        self._tables = [CachedTable(t) for t in data["tables"]]
+
+    def extract_text(self, **_) -> Optional[str]:
+        return self._text
+
+    def find_tables(self, *_, **__) -> List[CachedTable]:
+        return self._tables
+
+    def extract_tables(self, *_, **__) -> List[List[List[Optional[str]]]]:
+        return [t.extract() for t in self._tables]
+
+    def crop(self, bbox, **_) -> _Text:
+        bbox = tuple(bbox)
+        for t in self._tables:
+            if t.bbox == bbox:
+                return _Text(t.text)
+        raise KeyError(f"Zone non présente dans le cache : {bbox}")
+
+    def filter(self, _fn) -> _Text:
+        # Le seul filtre utilisé par les parsers est « hors tableaux »
+        return _Text(self._non_table_text)
+
+
+class CachedPDF:
+    def __init__(self, pages: List[Dict[str, Any]]):
+        self.pages = [CachedPage(i + 1, p) for i, p in enumerate(pages)]
+
+    def __enter__(self) -> "CachedPDF":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def open_pdf(pdf_path: PdfSource, use_cache: bool = True, cache_dir: Path = CACHE_DIR):
+    """
+    Remplace ``pdfplumber.open`` : CachedPDF si use_cache, pdfplumber sinon.
+    ``pdf_path`` peut aussi être des octets ou un objet fichier (cf. pdf_source).
+    """
+    if not use_cache:
+        return open_plumber(pdf_path)
+    return CachedPDF(load_layout(pdf_path, cache_dir))
+
+
+# ── Point d'entrée ────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Cache de mise en page pdfplumber")
+    ap.add_argument("pdfs", nargs="*", type=Path)
+    ap.add_argument("--refresh", action="store_true", help="ré-extrait même si en cache")
+    ap.add_argument("--clear", action="store_true", help="vide le cache")
+    args = ap.parse_args()
+
+    if args.clear:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"✔ Cache vidé : {CACHE_DIR}")
+    for pdf in args.pdfs:
+        try:
+            pages = load_layout(pdf, refresh=args.refresh)
+            print(f"✔ {pdf.name} → {cache_path(pdf).name} ({len(pages)} pages)")
+        except Exception as err:
+            print(f"⛔ Erreur avec {pdf.name} : {err}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
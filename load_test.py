@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+load_test.py
+------------
+Test de charge de parse_service.py sur localhost : N requêtes POST du même
+PDF avec C connexions concurrentes (keep-alive), puis débit, codes HTTP,
+latences p50/p95/p99 côté client et /metrics côté serveur.
+
+Usage :
+    python parse_service.py --workers 4 &
+    python load_test.py data/syllabus_projet/docker.pdf --family syllabus_projet -n 200 -c 16
+    python load_test.py data/syllabus_matiere/finops.pdf --family syllabus_matiere --output chunks
+"""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+import argparse, asyncio, json, time
+
+from parse_service import FAMILIES, percentile
+
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    status = int((await reader.readline()).split()[1])
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        body = bytearray()
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            if size == 0:
+                await reader.readline()
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+        return status, bytes(body)
+    return status, await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+async def client(host: str, port: int, path: str, pdf: bytes, todo: asyncio.Queue,
+                 latencies: List[float], codes: Dict[int, int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    head = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/pdf\r\n"
+            f"Content-Length: {len(pdf)}\r\n\r\n").encode("latin-1")
+    try:
+        while True:
+            try:
+                todo.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            writer.write(head + pdf)
+            await writer.drain()
+            status, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - t0)
+            codes[status] = codes.get(status, 0) + 1
+            if status != 200:          # le serveur ferme la connexion après une erreur
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+    finally:
+        writer.close()
+
+
+async def get_json(host: str, port: int, path: str) -> Dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    _, body = await read_response(reader)
+    writer.close()
+    return json.loads(body)
+
+
+async def run(args: argparse.Namespace) -> None:
+    pdf = args.pdf.read_bytes()
+    path = f"/parse/{args.family}?output={args.output}"
+    todo: asyncio.Queue = asyncio.Queue()
+    for i in range(args.n):
+        todo.put_nowait(i)
+    latencies: List[float] = []
+    codes: Dict[int, int] = {}
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(args.host, args.port, path, pdf, todo, latencies, codes)
+                           for _ in range(args.c)))
+    elapsed = time.perf_counter() - t0
+
+    print(f"{len(latencies)} requêtes en {elapsed:.1f}s → {len(latencies) / elapsed:.1f} req/s "
+          f"({args.c} connexions, {len(pdf) / 1024:.0f} Kio par PDF)")
+    print("codes :", dict(sorted(codes.items())))
+    print("latence client : " + "  ".join(f"p{int(q * 100)} {percentile(latencies, q) * 1000:.0f} ms"
+                                          for q in (0.5, 0.95, 0.99)))
+    print("serveur :", json.dumps(await get_json(args.host, args.port, "/metrics"), ensure_ascii=False))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Test de charge du service de parsing")
+    ap.add_argument("pdf", type=Path)
+    ap.add_argument("--family", choices=FAMILIES, required=True)
+    ap.add_argument("--output", choices=("json", "chunks"), default="json")
+    ap.add_argument("-n", type=int, default=100, help="nombre total de requêtes")
+    ap.add_argument("-c", type=int, default=8, help="connexions concurrentes")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
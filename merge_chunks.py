@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+merge_chunks.py
+---------------
+Fusion des fichiers de chunks des trois familles en un corpus unique, trié
+par identifiant, prêt pour une ingestion en masse.
+
+• Lecture en flux : chaque fichier *_chunks.json est décodé élément par
+  élément (JSONDecoder.raw_decode sur un tampon glissant), jamais en entier.
+• Fusion k-voies (heapq.merge) : un seul chunk en mémoire par fichier source,
+  quelle que soit la taille du corpus. Tri par (document, rang numérique) :
+  "syllabus_projet/docker:2" avant "syllabus_projet/docker:10".
+• Schéma unique : l'ancien format (text, metadata.type_document / section /
+  page, cf. output/syllabus_projet/chunks/all_chunks.json) est converti vers
+  celui des chunkers (content, titre_document / titre_section / numero_page).
+• Un identifiant présent dans plusieurs sources : la première source citée
+  l'emporte, les doublons sont comptés.
+
+Sorties (écriture atomique) :
+    all_chunks.jsonl : une ligne {"id", "content", "metadata"} par chunk, triée
+    all_chunks.idx   : une ligne "<id>\\t<offset>\\t<longueur>" (octets) par chunk
+
+Par défaut, les *_chunks.json de output/cours/chunk et output/syllabus_*/chunks ;
+l'ancien all_chunks.json n'est lu que s'il est passé explicitement.
+
+Usage :
+    python merge_chunks.py
+    python merge_chunks.py output/syllabus_projet/chunks/*_chunks.json output/syllabus_projet/chunks/all_chunks.json
+    python merge_chunks.py get "syllabus_matiere/fyc:3"
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import argparse, heapq, json, sys, time
+
+from atomic_io import atomic_open
+from chunk_store import LEGACY_CHUNKS, chunk_id_for
+from pipeline import FAMILIES, output_path
+
+OUT_PATH = Path("output/all_chunks.jsonl")
+READ_SIZE = 64 * 1024
+# Clés de l'ancien schéma → clés des chunkers
+LEGACY_KEYS = {"type_document": "titre_document", "section": "titre_section", "page": "numero_page"}
+LEGACY_TITLES = {"SyllabusProjet": "Syllabus projet", "SyllabusMatiere": "Syllabus matière", "Cours": "Cours"}
+# Ordre des métadonnées dans le corpus (les autres clés suivent, dans leur ordre d'origine)
+META_ORDER = ("titre_document", "titre_section", "numero_page", "matiere", "document_path")
+
+_decoder = json.JSONDecoder()
+
+
+# ── Lecture en flux ───────────────────────────────────────────────────────────
+def iter_json_array(path: Path, read_size: int = READ_SIZE) -> Iterator[Any]:
+    """Éléments d'un fichier contenant un tableau JSON, décodés un par un."""
+    with Path(path).open(encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+        started = False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            data = f.read(read_size)
+            eof = not data
+            buf, pos = buf[pos:] + data, 0
+            return not eof
+
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n" + ("," if started else ""):
+                pos += 1
+            if pos >= len(buf):
+                if fill():
+                    continue
+                raise ValueError(f"{path} : tableau JSON non terminé")
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path} : un tableau JSON est attendu")
+                started, pos = True, pos + 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise
+            after = end
+            while after < len(buf) and buf[after] in " \t\r\n":
+                after += 1
+            if not eof and (after == len(buf) or buf[after] not in ",]"):
+                fill()                                      # élément peut-être coupé par le tampon (nombre)
+                continue
+            pos = end
+            yield item
+
+
+# ── Normalisation ─────────────────────────────────────────────────────────────
+def normalize(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """Chunk de l'un ou l'autre schéma → {"content", "metadata"} au format des chunkers."""
+    meta = dict(chunk.get("metadata") or {})
+    for old, new in LEGACY_KEYS.items():
+        if old in meta and new not in meta:
+            meta[new] = meta.pop(old)
+    if meta.get("titre_document") in LEGACY_TITLES:
+        meta["titre_document"] = LEGACY_TITLES[meta["titre_document"]]
+    ordered = {key: meta.pop(key) for key in META_ORDER if key in meta}
+    ordered.update(meta)
+    content = chunk["content"] if "content" in chunk else chunk.get("text", "")
+    return {"content": content, "metadata": ordered}
+
+
+def sort_key(cid: str) -> Tuple[str, int]:
+    """"<famille>/<nom>:<rang>" → (document, rang numérique)."""
+    doc, _, rank = cid.rpartition(":")
+    return doc, int(rank)
+
+
+def iter_source(path: Path, priority: int) -> Iterator[Tuple[Tuple[str, int], int, str, Dict]]:
+    """(clé de tri, priorité, identifiant, chunk normalisé), dans l'ordre des rangs du fichier."""
+    for rank, chunk in enumerate(iter_json_array(path)):
+        cid = chunk_id_for(path, rank)
+        yield sort_key(cid), priority, cid, normalize(chunk)
+
+
+def default_sources() -> List[Path]:
+    """Fichiers *_chunks.json des trois familles (dossiers des chunkers), sans l'ancien all_chunks.json."""
+    files: List[Path] = []
+    for family in FAMILIES:
+        folder = output_path(family, "chunk", Path("_.pdf")).parent
+        files.extend(p for p in sorted(folder.glob("*_chunks.json")) if p.name != LEGACY_CHUNKS)
+    return files
+
+
+# ── Fusion ────────────────────────────────────────────────────────────────────
+def merge(sources: Sequence[Path], out: Path) -> Dict[str, int]:
+    """Fusionne les sources dans out (.jsonl) et son index (.idx) ; renvoie les compteurs."""
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    streams = [iter_source(path, i) for i, path in enumerate(sources)]
+    stats = {"sources": len(sources), "chunks": 0, "duplicates": 0, "bytes": 0}
+    previous: Optional[str] = None
+    with atomic_open(out, "wb") as data, atomic_open(out.with_suffix(".idx"), "w") as index:
+        for _, _, cid, chunk in heapq.merge(*streams, key=lambda item: (item[0], item[1])):
+            if cid == previous:
+                stats["duplicates"] += 1
+                continue
+            previous = cid
+            line = json.dumps({"id": cid, **chunk}, ensure_ascii=False).encode("utf-8") + b"\n"
+            index.write(f"{cid}\t{stats['bytes']}\t{len(line)}\n")
+            data.write(line)
+            stats["bytes"] += len(line)
+            stats["chunks"] += 1
+    return stats
+
+
+def get(out: Path, cid: str) -> Optional[Dict[str, Any]]:
+    """Chunk `cid` du corpus, via l'index (lecture ligne à ligne, sans tout charger)."""
+    out = Path(out)
+    with out.with_suffix(".idx").open(encoding="utf-8") as index:
+        for line in index:
+            key, offset, length = line.rstrip("\n").split("\t")
+            if key == cid:
+                with out.open("rb") as f:
+                    f.seek(int(offset))
+                    return json.loads(f.read(int(length)))
+    return None
+
+
+# ── Point d'entrée ────────────────────────────────────────────────────────────
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "get":
+        ap = argparse.ArgumentParser(description="Lecture d'un chunk du corpus fusionné")
+        ap.add_argument("cmd")
+        ap.add_argument("id")
+        ap.add_argument("--out", type=Path, default=OUT_PATH)
+        args = ap.parse_args()
+        chunk = get(args.out, args.id)
+        if chunk is None:
+            sys.exit(f"⛔ Chunk introuvable : {args.id}")
+        print(json.dumps(chunk, ensure_ascii=False, indent=2))
+        return
+
+    ap = argparse.ArgumentParser(description="Fusion triée des chunks des trois familles (JSONL + index)")
+    ap.add_argument("files", nargs="*", type=Path, help="fichiers de chunks (défaut : *_chunks.json des trois familles)")
+    ap.add_argument("--out", type=Path, default=OUT_PATH)
+    args = ap.parse_args()
+
+    sources = args.files or default_sources()
+    if not sources:
+        sys.exit("⛔ Aucun fichier de chunks")
+    t0 = time.perf_counter()
+    stats = merge(sources, args.out)
+    print(f"✅ {stats['chunks']} chunks de {stats['sources']} fichier(s) → {args.out} "
+          f"({stats['bytes'] / 1024:.0f} Kio, index {args.out.with_suffix('.idx')}) en {time.perf_counter() - t0:.2f}s")
+    if stats["duplicates"]:
+        print(f"⚠ {stats['duplicates']} identifiant(s) en double ignoré(s) (première source conservée)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+models.py
+---------
+Modèle de données typé (``__slots__``) pour les champs, sections, documents
+et chunks manipulés par les parsers et les chunkers.
+
+Les formats JSON existants restent la référence sur disque ; ces classes
+servent à garder un corpus entier en mémoire (dédoublonnage, indexation)
+sans payer le coût d'un dict par champ :
+
+    • Field    ⇄ {"value": ..., "page": ...}
+    • Section  ⇄ corps d'une section (Field, dict de sous-champs ou liste)
+    • Document ⇄ JSON complet d'un syllabus ({"_meta": ..., "<section>": ...})
+    • Chunk    ⇄ {"content": ..., "metadata": {...}}
+
+Benchmark mémoire :
+    python models.py --bench 1000000
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+import argparse, gc, sys, time, tracemalloc
+
+# Clés de métadonnées communes aux trois chunkers, dans l'ordre d'écriture
+CHUNK_META_KEYS = ("titre_document", "numero_page", "titre_section", "matiere", "document_path")
+
+_intern = sys.intern
+
+
+def _meta_str(meta: Dict[str, Any], key: str) -> str:
+    """Métadonnée texte internée ; "" si absente ou null (JSON valide, sys.intern refuse None)."""
+    value = meta.get(key)
+    if value is None:
+        return ""
+    return _intern(value) if isinstance(value, str) else str(value)
+
+
+@dataclass(slots=True)
+class Field:
+    """Feuille ``{"value": ..., "page": ...}``."""
+    value: Any
+    page: Optional[int]
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Field":
+        return cls(d["value"], d["page"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"value": self.value, "page": self.page}
+
+
+Body = Union[Field, Dict[str, "Body"], List["Body"], Any]
+
+
+def _is_leaf(node: Any) -> bool:
+    return isinstance(node, dict) and len(node) == 2 and "value" in node and "page" in node
+
+
+def _body_from(node: Any) -> Body:
+    if _is_leaf(node):
+        return Field(node["value"], node["page"])
+    if isinstance(node, dict):
+        return {_intern(k): _body_from(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_body_from(v) for v in node]
+    return node
+
+
+def _body_to(node: Body) -> Any:
+    if isinstance(node, Field):
+        return {"value": node.value, "page": node.page}
+    if isinstance(node, dict):
+        return {k: _body_to(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_body_to(v) for v in node]
+    return node
+
+
+@dataclass(slots=True)
+class Section:
+    """Section nommée ; ``body`` garde la forme du JSON (Field, dict ou liste)."""
+    name: str
+    body: Body
+
+    @classmethod
+    def from_dict(cls, name: str, d: Any) -> "Section":
+        return cls(_intern(name), _body_from(d))
+
+    def to_dict(self) -> Any:
+        return _body_to(self.body)
+
+    def fields(self):
+        """Itère sur (nom_champ, Field) comme le font les chunkers."""
+        stack = [(self.name, self.body)]
+        while stack:
+            label, node = stack.pop()
+            if isinstance(node, Field):
+                yield label, node
+            elif isinstance(node, dict):
+                stack.extend(reversed(list(node.items())))
+            elif isinstance(node, list):
+                stack.extend((label, v) for v in reversed(node))
+
+
+@dataclass(slots=True)
+class Document:
+    """Syllabus parsé (sortie de parse_pdf ou parse_final_data)."""
+    sections: List[Section]
+    meta: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Document":
+        return cls([Section.from_dict(k, v) for k, v in d.items() if k != "_meta"], d.get("_meta"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        if self.meta is not None:
+            out["_meta"] = self.meta
+        for s in self.sections:
+            out[s.name] = s.to_dict()
+        return out
+
+    def section(self, name: str) -> Optional[Section]:
+        return next((s for s in self.sections if s.name == name), None)
+
+
+@dataclass(slots=True)
+class Chunk:
+    """
+    Chunk au format ChromaDB. Les chaînes de métadonnées sont internées :
+    un million de chunks « Syllabus projet » partagent le même objet str.
+    """
+    content: str
+    titre_document: str = ""
+    numero_page: Optional[int] = None
+    titre_section: str = ""
+    matiere: str = ""
+    document_path: str = ""
+    extra: Optional[Dict[str, Any]] = None   # métadonnées hors schéma commun
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Chunk":
+        meta = d.get("metadata") or {}
+        extra = {k: v for k, v in meta.items() if k not in CHUNK_META_KEYS} or None
+        return cls(
+            d.get("content", ""),
+            _meta_str(meta, "titre_document"),
+            meta.get("numero_page"),
+            _meta_str(meta, "titre_section"),
+            _meta_str(meta, "matiere"),
+            _meta_str(meta, "document_path"),
+            extra,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        meta = {
+            "titre_document": self.titre_document,
+            "numero_page": self.numero_page,
+            "titre_section": self.titre_section,
+            "matiere": self.matiere,
+            "document_path": self.document_path,
+        }
+        if self.extra:
+            meta.update(self.extra)
+        return {"content": self.content, "metadata": meta}
+
+
+# ── Benchmark mémoire ─────────────────────────────────────────────────────────
+def _fake_chunk(i: int) -> Dict[str, Any]:
+    return {
+        "content": f"Champ {i % 97}: valeur {i}",
+        "metadata": {
+            "titre_document": "Syllabus projet",
+            "numero_page": 1 + i % 7,
+            "titre_section": "3 Détails du projet",
+            "matiere": "",
+            "document_path": "",
+        },
+    }
+
+
+def _measure(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - t0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    gc.collect()
+    return current, elapsed
+
+
+def benchmark(n: int) -> None:
+    """Compare la mémoire de n chunks en dicts vs en objets Chunk."""
+    import json
+    # Les dicts sont relus depuis du JSON, comme dans les chunkers
+    raw = json.dumps([_fake_chunk(i) for i in range(n)], ensure_ascii=False)
+
+    dict_mem, dict_t = _measure(lambda: json.loads(raw))
+    slot_mem, slot_t = _measure(lambda: [Chunk.from_dict(c) for c in json.loads(raw)])
+
+    print(f"{n:,} chunks")
+    print(f"  dicts  : {dict_mem / 2**20:8.1f} Mio  ({dict_mem / n:6.0f} o/chunk, {dict_t:.2f}s)")
+    print(f"  Chunk  : {slot_mem / 2**20:8.1f} Mio  ({slot_mem / n:6.0f} o/chunk, {slot_t:.2f}s)")
+    print(f"  gain   : {1 - slot_mem / dict_mem:.0%}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Modèle de données typé")
+    ap.add_argument("--bench", type=int, metavar="N", help="benchmark mémoire sur N chunks")
+    args = ap.parse_args()
+    if args.bench:
+        benchmark(args.bench)
+    else:
+        ap.print_help()
+
+
+if __name__ == "__main__":
+    main()
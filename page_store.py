@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+page_store.py
+-------------
+Format colonnaire pour le texte des pages de cours (alternative aux JSON
+``output/cours/<nom>.json``).
+
+Un document ``<nom>`` est stocké dans deux fichiers :
+    • <nom>.pages.txt  : texte UTF-8 de toutes les pages, concaténé sans séparateur
+    • <nom>.pages.idx  : en-tête + tableau des offsets (uint64, n+1 valeurs)
+                         + tableau des numéros de page (uint32, n valeurs)
+                         + nom du PDF source (UTF-8)
+
+Les deux fichiers sont ouverts via ``mmap`` : lire la page 350 revient à lire
+deux offsets puis à décoder une seule tranche du blob, sans parser le reste.
+
+Usage :
+    python page_store.py to-store   output/cours/Cours_scala.json
+    python page_store.py to-json    output/cours/Cours_scala.pages.idx
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+import json, mmap, struct, sys
+from array import array
+
+# ── Format binaire ────────────────────────────────────────────────────────────
+MAGIC = b"PGST"
+VERSION = 1
+# magic, version, nombre de pages, longueur du nom source
+HEADER = struct.Struct("<4sHIH")
+BLOB_SUFFIX = ".pages.txt"
+INDEX_SUFFIX = ".pages.idx"
+
+
+def store_paths(base: Path) -> Tuple[Path, Path]:
+    """Renvoie (blob, index) pour un chemin de base sans suffixe."""
+    return base.with_name(base.name + BLOB_SUFFIX), base.with_name(base.name + INDEX_SUFFIX)
+
+
+def _base_of(path: Path) -> Path:
+    """Retire .pages.txt / .pages.idx / .json d'un chemin."""
+    name = path.name
+    for suffix in (BLOB_SUFFIX, INDEX_SUFFIX, ".json"):
+        if name.endswith(suffix):
+            return path.with_name(name[: -len(suffix)])
+    return path
+
+
+# ── Écriture ──────────────────────────────────────────────────────────────────
+def write_store(base: Path, pages: List[Tuple[int, str]], source: str = "") -> Tuple[Path, Path]:
+    """Écrit une liste (numéro_page, texte) au format colonnaire."""
+    blob_path, idx_path = store_paths(base)
+    offsets = array("Q", [0])
+    numbers = array("I")
+
+    with blob_path.open("wb") as blob:
+        pos = 0
+        for num, text in pages:
+            data = text.encode("utf-8")
+            blob.write(data)
+            pos += len(data)
+            offsets.append(pos)
+            numbers.append(int(num))
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        numbers.byteswap()
+
+    src = source.encode("utf-8")
+    with idx_path.open("wb") as idx:
+        idx.write(HEADER.pack(MAGIC, VERSION, len(numbers), len(src)))
+        idx.write(offsets.tobytes())
+        idx.write(numbers.tobytes())
+        idx.write(src)
+
+    return blob_path, idx_path
+
+
+# ── Lecture ───────────────────────────────────────────────────────────────────
+class PageStore:
+    """
+    Accès aléatoire en lecture seule à un store de pages.
+
+        with PageStore(Path("output/cours/Cours_spark_complet")) as store:
+            texte = store.page(350)
+    """
+
+    def __init__(self, base: Path):
+        blob_path, idx_path = store_paths(_base_of(Path(base)))
+        self._idx_file = idx_path.open("rb")
+        self._blob_file = blob_path.open("rb")
+        self._idx = mmap.mmap(self._idx_file.fileno(), 0, access=mmap.ACCESS_READ)
+        # mmap refuse les fichiers vides (document sans page)
+        self._blob = (mmap.mmap(self._blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+                      if blob_path.stat().st_size else b"")
+
+        magic, version, count, src_len = HEADER.unpack_from(self._idx, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Store de pages invalide : {idx_path}")
+
+        view = memoryview(self._idx)
+        off_start = HEADER.size
+        num_start = off_start + 8 * (count + 1)
+        src_start = num_start + 4 * count
+        if sys.byteorder == "little":
+            self._offsets = view[off_start:num_start].cast("Q")
+            self._numbers = view[num_start:src_start].cast("I")
+        else:
+            self._offsets = array("Q", bytes(view[off_start:num_start]))
+            self._offsets.byteswap()
+            self._numbers = array("I", bytes(view[num_start:src_start]))
+            self._numbers.byteswap()
+        self.source = bytes(view[src_start:src_start + src_len]).decode("utf-8")
+        self._count = count
+        # numéro de page → position ; en pratique pages = 1..n, mais on ne le suppose pas
+        self._pos = {n: i for i, n in enumerate(self._numbers)}
+
+    # -- protocole de contexte --------------------------------------------------
+    def __enter__(self) -> "PageStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for attr in ("_offsets", "_numbers"):
+            view = getattr(self, attr, None)
+            if isinstance(view, memoryview):
+                view.release()
+        for handle in ("_blob", "_idx"):
+            m = getattr(self, handle, None)
+            if isinstance(m, mmap.mmap):
+                m.close()
+        for f in ("_blob_file", "_idx_file"):
+            fh = getattr(self, f, None)
+            if fh is not None:
+                fh.close()
+
+    # -- accès ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._count
+
+    def page_numbers(self) -> List[int]:
+        return list(self._numbers)
+
+    def raw(self, i: int) -> bytes:
+        """
+        Octets UTF-8 de la i-ème page (position, 0-based). Copie de la seule
+        tranche : une vue sur le mmap empêcherait close() tant qu'elle vit.
+        """
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+    def text_at(self, i: int) -> str:
+        """Texte de la i-ème page (position, 0-based)."""
+        return self.raw(i).decode("utf-8")
+
+    def page(self, num: int) -> str:
+        """Texte de la page portant le numéro ``num`` (1-based, comme le JSON)."""
+        return self.text_at(self._pos[num])
+
+    def iter_pages(self, start: int = 0, stop: int = None) -> Iterator[Tuple[int, str]]:
+        """Itère sur (numéro_page, texte) pour les positions [start, stop)."""
+        stop = self._count if stop is None else min(stop, self._count)
+        for i in range(start, stop):
+            yield self._numbers[i], self.text_at(i)
+
+
+# ── Convertisseurs JSON ⇄ store ───────────────────────────────────────────────
+def json_to_store(json_path: Path) -> Tuple[Path, Path]:
+    """Convertit un JSON de cours (``{"meta", "pages"}``) en store colonnaire."""
+    data = json.loads(Path(json_path).read_text(encoding="utf-8"))
+    pages = [(p.get("page"), p.get("text", "")) for p in data.get("pages", [])]
+    return write_store(_base_of(Path(json_path)), pages, data.get("meta", {}).get("source", ""))
+
+
+def store_to_dict(base: Path) -> Dict[str, Any]:
+    """Reconstruit le dictionnaire au format JSON historique."""
+    with PageStore(base) as store:
+        return {
+            "meta": {"source": store.source, "page_count": len(store)},
+            "pages": [{"page": num, "text": text} for num, text in store.iter_pages()],
+        }
+
+
+def store_to_json(base: Path, out_file: Path = None) -> Path:
+    """Réécrit un store colonnaire en JSON (même forme que parser_cours)."""
+    base = _base_of(Path(base))
+    out_file = out_file or base.with_name(base.name + ".json")
+    data = store_to_dict(base)
+    out_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return out_file
+
+
+def main() -> None:
+    if len(sys.argv) < 3 or sys.argv[1] not in ("to-store", "to-json"):
+        sys.exit("Usage : page_store.py to-store|to-json <fichier>...")
+
+    for arg in sys.argv[2:]:
+        path = Path(arg)
+        try:
+            if sys.argv[1] == "to-store":
+                blob, idx = json_to_store(path)
+                print(f"✅ {path.name}  →  {blob.name} + {idx.name}")
+            else:
+                out = store_to_json(path)
+                print(f"✅ {path.name}  →  {out.name}")
+        except Exception as err:
+            print(f"⛔ Erreur avec {path.name} : {err}")
+
+
+if __name__ == "__main__":
+    main()
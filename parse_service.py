@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+parse_service.py
+----------------
+Service HTTP local (asyncio, sans dépendance) : on envoie les octets d'un PDF,
+on reçoit le JSON structuré ou les chunks, de façon synchrone.
+
+    POST /parse/<famille>[?output=json|chunks]     corps = PDF brut
+        cours             → pdf_to_json (pages)       / chunks par page
+        syllabus_matiere  → parse_pdf                 / chunks
+        syllabus_projet   → get_section_raw_text + parse_final_data
+                            + complément TXT (cleaning) / chunks
+    GET  /metrics          compteurs et latences (p50/p95/p99) par route
+    GET  /health
+
+• Les parsers tournent dans un pool de processus lancé au démarrage, modules
+  (pdfplumber, fitz, ftfy) déjà importés : aucune requête ne paie l'import ni
+  le démarrage d'un processus.
+• Au plus --max-inflight requêtes sont confiées au pool ; au-delà, jusqu'à
+  --max-queue requêtes attendent, les suivantes reçoivent 503 + Retry-After.
+• Le résultat est renvoyé en Transfer-Encoding: chunked par blocs de 64 Kio.
+
+Usage :
+    python parse_service.py --port 8765 --workers 4
+    curl --data-binary @data/syllabus_projet/docker.pdf localhost:8765/parse/syllabus_projet
+    python load_test.py data/syllabus_projet/docker.pdf --family syllabus_projet -n 200 -c 16
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import argparse, asyncio, json, os, time
+
+FAMILIES = ("cours", "syllabus_matiere", "syllabus_projet")
+MAX_BODY = 50 * 2**20          # taille max d'un PDF reçu
+MAX_HEADER_LINES = 100
+STREAM_BLOCK = 64 * 1024
+LATENCY_WINDOW = 2000          # dernières latences conservées par route
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+           500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or REASONS[status])
+        self.status = status
+
+
+# ── Côté worker ───────────────────────────────────────────────────────────────
+def _warm() -> None:
+    """Importe les parsers une fois par processus du pool."""
+    import importlib
+    # fitz, pdfplumber et ftfy ne sont importés par les parsers qu'au premier
+    # document : on les charge ici pour que ce coût ne tombe pas sur une requête
+    for name in ("fitz", "pdfplumber", "ftfy",
+                 "parser_cours", "parser_syllabus_matiere", "parser_syllabus_projet",
+                 "cleaning_json_syllabus_projet", "chunking_cours", "chunking_syllabus_matière",
+                 "chunking_syllabus_projet"):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass          # la requête concernée renverra l'erreur
+
+
+def parse_bytes(family: str, data: bytes, output: str = "json") -> bytes:
+    """Parse un PDF reçu en mémoire, sans fichier temporaire ; renvoie le JSON encodé (UTF-8)."""
+    import importlib
+    if family == "cours":
+        import parser_cours, chunking_cours
+        pages = parser_cours.extract_pages(data)
+        if output == "chunks":
+            result: Any = chunking_cours.build_chunks((p["page"], p["text"]) for p in pages)
+        else:
+            result = {"meta": {"source": "document.pdf", "page_count": len(pages)}, "pages": pages}
+    elif family == "syllabus_matiere":
+        import parser_syllabus_matiere
+        result = parser_syllabus_matiere.parse_pdf(data)
+        if output == "chunks":
+            result = importlib.import_module("chunking_syllabus_matière").build_chunks(result)
+    else:
+        import parser_syllabus_projet, cleaning_json_syllabus_projet, chunking_syllabus_projet
+        raw_sections, non_table_dump, section_pages = parser_syllabus_projet.get_section_raw_text(data)
+        result = parser_syllabus_projet.parse_final_data(raw_sections, section_pages)
+        if non_table_dump:
+            result = cleaning_json_syllabus_projet.update_json_with_txt(result, non_table_dump)
+        if output == "chunks":
+            result = chunking_syllabus_projet.data_to_chunks(result)
+    return json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+
+# ── Métriques ─────────────────────────────────────────────────────────────────
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.status: Dict[str, int] = {}
+        self.inflight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    def record(self, route: str, status: int, seconds: float) -> None:
+        self.latencies.setdefault(route, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+        self.status[str(status)] = self.status.get(str(status), 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        routes = {}
+        for route, lat in self.latencies.items():
+            values = list(lat)
+            routes[route] = {"count": len(values),
+                             **{f"p{int(q * 100)}_ms": round(percentile(values, q) * 1000, 1)
+                                for q in (0.5, 0.95, 0.99)},
+                             "max_ms": round(max(values) * 1000, 1)}
+        return {"uptime_s": round(time.time() - self.started, 1), "inflight": self.inflight,
+                "waiting": self.waiting, "rejected": self.rejected, "status": self.status,
+                "routes": routes}
+
+
+# ── Serveur ───────────────────────────────────────────────────────────────────
+class ParseService:
+    def __init__(self, workers: int, max_inflight: int, max_queue: int, timeout: float):
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm)
+        self.slots = asyncio.Semaphore(max_inflight)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.metrics = Metrics()
+
+    async def warm_up(self, workers: int) -> None:
+        """Démarre tous les processus du pool avant d'accepter des requêtes."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, time.sleep, 0.1) for _ in range(workers)))
+
+    async def read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "ligne de requête invalide")
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADER_LINES):
+            h = await reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = h.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(400, "trop d'en-têtes")
+
+        body = b""
+        if method == "POST":
+            if "content-length" not in headers:
+                raise HTTPError(411)
+            raw_length = headers["content-length"]
+            if not (raw_length.isascii() and raw_length.isdigit()):
+                raise HTTPError(400, "Content-Length invalide")
+            length = int(raw_length)
+            if length > MAX_BODY:
+                raise HTTPError(413, f"PDF limité à {MAX_BODY // 2**20} Mio")
+            body = await reader.readexactly(length)
+        return method, target, headers, body
+
+    async def send(self, writer: asyncio.StreamWriter, status: int, payload: bytes,
+                   keep_alive: bool, extra: Optional[Dict[str, str]] = None) -> None:
+        head = [f"HTTP/1.1 {status} {REASONS[status]}", "Content-Type: application/json; charset=utf-8",
+                "Transfer-Encoding: chunked", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        head += [f"{k}: {v}" for k, v in (extra or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        for i in range(0, len(payload), STREAM_BLOCK):
+            block = payload[i:i + STREAM_BLOCK]
+            writer.write(f"{len(block):x}\r\n".encode() + block + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, bytes, Dict[str, str]]:
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, b'{"status": "ok"}', {}
+        if url.path == "/metrics":
+            return 200, json.dumps(self.metrics.snapshot(), ensure_ascii=False).encode(), {}
+
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "parse" or parts[1] not in FAMILIES:
+            raise HTTPError(404, f"routes : /parse/<{'|'.join(FAMILIES)}>, /metrics, /health")
+        if method != "POST":
+            raise HTTPError(405)
+        output = parse_qs(url.query).get("output", ["json"])[0]
+        if output not in ("json", "chunks"):
+            raise HTTPError(400, "output=json ou output=chunks")
+        if not body.startswith(b"%PDF"):
+            raise HTTPError(422, "le corps n'est pas un PDF")
+
+        if self.metrics.waiting >= self.max_queue:
+            self.metrics.rejected += 1
+            raise HTTPError(503, "service saturé, réessayer plus tard")
+        self.metrics.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.metrics.waiting -= 1
+        self.metrics.inflight += 1
+        held = False
+        try:
+            loop = asyncio.get_running_loop()
+            fut = loop.run_in_executor(self.pool, parse_bytes, parts[1], body, output)
+            try:
+                return 200, await asyncio.wait_for(asyncio.shield(fut), self.timeout), {}
+            except asyncio.TimeoutError:
+                # Le worker continue de parser : le créneau reste pris jusqu'à la fin
+                # réelle, sinon le pool reçoit plus de --max-inflight travaux
+                fut.add_done_callback(self._release_slot)
+                held = True
+                raise HTTPError(504, f"parsing plus long que {self.timeout:.0f}s")
+            except HTTPError:
+                raise
+            except Exception as err:
+                raise HTTPError(500, f"{type(err).__name__}: {err}")
+        finally:
+            if not held:
+                self._release_slot()
+
+    def _release_slot(self, fut: Optional[asyncio.Future] = None) -> None:
+        """Libère un créneau du pool ; en rappel, consomme le résultat abandonné."""
+        if fut is not None and not fut.cancelled():
+            fut.exception()
+        self.metrics.inflight -= 1
+        self.slots.release()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                t0 = time.perf_counter()
+                route = "?"
+                try:
+                    request = await self.read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    route = f"{method} {urlsplit(target).path}"
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    status, payload, extra = await self.dispatch(method, target, body)
+                except HTTPError as err:
+                    status, payload, keep_alive = err.status, json.dumps({"error": str(err)}, ensure_ascii=False).encode(), False
+                    extra = {"Retry-After": "1"} if err.status == 503 else {}
+                await self.send(writer, status, payload, keep_alive, extra)
+                self.metrics.record(route, status, time.perf_counter() - t0)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str, port: int, workers: int, max_inflight: int, max_queue: int, timeout: float) -> None:
+    service = ParseService(workers, max_inflight, max_queue, timeout)
+    await service.warm_up(workers)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"✅ Service de parsing sur http://{host}:{port} ({workers} workers, "
+          f"{max_inflight} en cours max, file de {max_queue})", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Service HTTP de parsing de PDF")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    ap.add_argument("--max-inflight", type=int, default=None, help="requêtes confiées au pool (défaut : workers)")
+    ap.add_argument("--max-queue", type=int, default=64, help="requêtes en attente avant de répondre 503")
+    ap.add_argument("--timeout", type=float, default=120.0, help="secondes max par requête")
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_inflight or args.workers,
+                          args.max_queue, args.timeout))
+    except KeyboardInterrupt:
+        print("Arrêt du service")
+
+
+if __name__ == "__main__":
+    main()
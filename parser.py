@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+parser.py
+---------
+Point d'entrée unique de la chaîne de traitement :
+
+    python parser.py parse-cours   [pdf...] [--store]
+    python parser.py parse-matiere [pdf...] [--cache]
+    python parser.py parse-projet  [pdf...] [--cache]
+    python parser.py clean         [json...]
+    python parser.py chunk         [--families cours matiere projet] [--hierarchical] [--max-tokens 256]
+    python parser.py merge         [chunks.json...] [--out output/all_chunks.jsonl]
+    python parser.py all           [pdf...] [--families ...] [--resume]
+    python parser.py bench-import  [--budget-ms 200] [--runs 5]
+
+Sans fichier, chaque sous-commande traite le dossier habituel (data/<famille>,
+output/syllabus_projet, output_clean_json…).
+
+Seuls argparse et sys sont importés au chargement : pdfplumber, fitz et ftfy
+ne sont importés que par les sous-commandes qui parsent des PDF. ``--help``
+ou ``chunk`` démarrent donc sans payer ces imports ; ``bench-import`` le
+vérifie avec ``python -X importtime``.
+"""
+
+import argparse, sys
+
+# Bibliothèques qui ne doivent jamais être chargées par un simple import des modules
+HEAVY = ("fitz", "pymupdf", "pdfplumber", "pdfminer", "ftfy", "numpy")
+# Modules mesurés par bench-import (ceux des scripts et de la CLI)
+BENCH_MODULES = ("parser", "pipeline", "parser_cours", "parser_syllabus_matiere", "parser_syllabus_projet",
+                 "cleaning_json_syllabus_projet", "chunking_cours", "chunking_syllabus_matière",
+                 "chunking_syllabus_projet")
+CHUNK_FAMILIES = ("cours", "matiere", "projet")
+
+
+def _pdfs(paths, default_dir: str):
+    from pathlib import Path
+    if paths:
+        return [Path(p) for p in paths]
+    return sorted(Path(default_dir).glob("*.pdf"))
+
+
+def _each(items, fn) -> int:
+    """Applique fn à chaque élément, affiche le résultat ; renvoie le nombre d'erreurs."""
+    errors = 0
+    for item in items:
+        try:
+            print(f"✅ {item.name}  →  {fn(item)}")
+        except Exception as err:
+            errors += 1
+            print(f"⛔ Erreur avec {item.name} : {err}")
+    return errors
+
+
+# ── Sous-commandes ────────────────────────────────────────────────────────────
+def cmd_parse_cours(args) -> int:
+    import parser_cours
+    return _each(_pdfs(args.pdfs, "data/cours"), lambda p: parser_cours.pdf_to_json(p, store=args.store))
+
+
+def cmd_parse_matiere(args) -> int:
+    import parser_syllabus_matiere as m
+    m.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    return _each(_pdfs(args.pdfs, "data/syllabus_matiere"), lambda p: m.process_pdf(p, use_cache=args.cache))
+
+
+def cmd_parse_projet(args) -> int:
+    import os
+    import parser_syllabus_projet
+    out_dir = "output/syllabus_projet"
+    os.makedirs(out_dir, exist_ok=True)
+    return _each(_pdfs(args.pdfs, "data/syllabus_projet"),
+                 lambda p: parser_syllabus_projet.process_pdf(str(p), out_dir, args.cache)[0])
+
+
+def cmd_clean(args) -> int:
+    from pathlib import Path
+    import cleaning_json_syllabus_projet as cleaning
+    files = [Path(p) for p in args.jsons] or sorted(Path("output/syllabus_projet").glob("*.json"))
+    return _each(files, lambda p: cleaning.clean_file(str(p)))
+
+
+def cmd_chunk(args) -> int:
+    import importlib
+    for family in args.families:
+        if family == "cours":
+            importlib.import_module("chunking_cours").main()
+        elif family == "matiere":
+            importlib.import_module("chunking_syllabus_matière").main(args.hierarchical, args.max_tokens)
+        else:
+            importlib.import_module("chunking_syllabus_projet").process_all_files(args.hierarchical, args.max_tokens)
+    return 0
+
+
+def cmd_merge(args) -> int:
+    from pathlib import Path
+    import merge_chunks
+    sources = [Path(p) for p in args.files] or merge_chunks.default_sources()
+    if not sources:
+        print("⛔ Aucun fichier de chunks")
+        return 1
+    stats = merge_chunks.merge(sources, Path(args.out))
+    print(f"✅ {stats['chunks']} chunks de {stats['sources']} fichier(s) → {args.out}"
+          + (f" ({stats['duplicates']} doublon(s) ignoré(s))" if stats["duplicates"] else ""))
+    return 0
+
+
+def cmd_all(args) -> int:
+    from pathlib import Path
+    from pipeline import FAMILY_DIRS, family_of, run_all
+    if args.pdfs:
+        pdfs = [Path(p) for p in args.pdfs]
+    else:
+        pdfs = [p for fam in args.families for p in sorted(FAMILY_DIRS[fam].glob("*.pdf"))]
+
+    if args.resume:
+        from pipeline_state import StateStore, process_document
+        errors = 0
+        with StateStore() as store:
+            for pdf in pdfs:
+                ran, skipped, error = process_document(store, pdf, family_of(pdf))
+                errors += bool(error)
+                print(f"⛔ {pdf.name} : {error}" if error else f"✅ {pdf.name}  ({ran} étape(s), {skipped} reprise(s))")
+        return errors
+    return _each(pdfs, lambda p: run_all(p)[-1])
+
+
+def cmd_bench_import(args) -> int:
+    """
+    Mesure ``python -X importtime`` de chaque module ; échec si trop lent ou si une lib lourde est chargée.
+    Le temps retenu est le minimum sur --runs imports à froid : le bruit de la machine ne fait qu'ajouter.
+    """
+    import subprocess
+    failures = 0
+    print(f"{'module':<32} {'cumulé':>9}  bibliothèques lourdes")
+    for module in args.modules:
+        totals, names, error = [], set(), None
+        for _ in range(max(1, args.runs)):
+            proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                error = proc.stderr.strip().splitlines()[-1]
+                break
+            # lignes « import time: self | cumulative | nom » ; la dernière est le module lui-même
+            rows = [line.split("|") for line in proc.stderr.splitlines() if line.startswith("import time:")]
+            rows = [(int(cum), name.strip()) for _, cum, name in rows[1:]]
+            totals.append(rows[-1][0] / 1000)
+            names.update(name.split(".")[0] for _, name in rows)
+        if error:
+            print(f"{module:<32} {'—':>9}  ⛔ import impossible : {error}")
+            failures += 1
+            continue
+        total_ms = min(totals)
+        heavy = sorted(names & set(HEAVY))
+        bad = heavy or total_ms > args.budget_ms
+        failures += bool(bad)
+        print(f"{module:<32} {total_ms:>7.1f}ms  {'⛔ ' + ', '.join(heavy) if heavy else '—'}"
+              f"{'  ⛔ > budget' if total_ms > args.budget_ms else ''}")
+    print(f"{'✅' if not failures else '⛔'} budget {args.budget_ms:.0f} ms, {failures} module(s) en défaut")
+    return failures
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="parser", description="Chaîne de traitement des PDF (parse → clean → chunk)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("parse-cours", help="PDF de cours → output/cours/*.json")
+    p.add_argument("pdfs", nargs="*")
+    p.add_argument("--store", action="store_true", help="écrit aussi le store colonnaire (page_store)")
+    p.set_defaults(func=cmd_parse_cours)
+
+    for name, family, func in (("parse-matiere", "syllabus_matiere", cmd_parse_matiere),
+                               ("parse-projet", "syllabus_projet", cmd_parse_projet)):
+        p = sub.add_parser(name, help=f"PDF de data/{family} → output/{family}/*.json")
+        p.add_argument("pdfs", nargs="*")
+        p.add_argument("--cache", action="store_true", help="relit pdfplumber depuis layout_cache")
+        p.set_defaults(func=func)
+
+    p = sub.add_parser("clean", help="complète les JSON de syllabus projet → output_clean_json/")
+    p.add_argument("jsons", nargs="*")
+    p.set_defaults(func=cmd_clean)
+
+    p = sub.add_parser("chunk", help="génère les chunks des JSON déjà produits")
+    p.add_argument("--families", nargs="+", choices=CHUNK_FAMILIES, default=list(CHUNK_FAMILIES))
+    p.add_argument("--hierarchical", action="store_true",
+                   help="syllabus : parent_id + <nom>_parents.json (chunks de section, cf. chunk_tree)")
+    p.add_argument("--max-tokens", type=int, default=256,
+                   help="syllabus : découpe les valeurs plus longues (text_splitter) ; 0 = jamais")
+    p.set_defaults(func=cmd_chunk)
+
+    p = sub.add_parser("merge", help="fusion triée de tous les chunks → JSONL + index (merge_chunks)")
+    p.add_argument("files", nargs="*", help="défaut : *_chunks.json des trois familles")
+    p.add_argument("--out", default="output/all_chunks.jsonl")
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser("all", help="toutes les étapes (pipeline.py) pour chaque PDF")
+    p.add_argument("pdfs", nargs="*")
+    p.add_argument("--families", nargs="+", choices=("cours", "syllabus_matiere", "syllabus_projet"),
+                   default=["cours", "syllabus_matiere", "syllabus_projet"])
+    p.add_argument("--resume", action="store_true", help="saute les étapes déjà faites (pipeline_state)")
+    p.set_defaults(func=cmd_all)
+
+    p = sub.add_parser("bench-import", help="temps d'import à froid (python -X importtime)")
+    p.add_argument("--budget-ms", type=float, default=200.0, help="temps cumulé max par module")
+    p.add_argument("--runs", type=int, default=5, help="imports à froid par module (on garde le minimum)")
+    p.add_argument("--modules", nargs="+", default=list(BENCH_MODULES))
+    p.set_defaults(func=cmd_bench_import)
+    return ap
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    sys.exit(1 if args.func(args) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ pdf2json_batch.py
 -----------------
 • Entrée : tous les PDF dans          data/cours/
 • Sortie : un JSON par PDF dans       output/cours/<nom>.json
+           (+ store colonnaire <nom>.pages.txt/.idx avec --store, cf. page_store.py)
 
 Dépendances :
     pip install PyMuPDF ftfy
@@ -11,13 +12,15 @@ Dépendances :
 
 from pathlib import Path
 import json, re, sys
-import fitz          # PyMuPDF
-import ftfy          # répare les caractères Unicode “cassés”
+from typing import Any, Dict, List
+
+from atomic_io import atomic_write_text
+from page_store import write_store
+from pdf_source import PdfSource, open_fitz, source_name
 
 # ── Répertoires d’entrées / sorties ───────────────────────────────────────────
 INPUT_DIR  = Path("data/cours")
 OUTPUT_DIR = Path("output/cours")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # ── Tables de remplacement & regex ────────────────────────────────────────────
 TRANSLATE = str.maketrans({
@@ -30,34 +33,50 @@ MULTI_WS = re.compile(r"\s+")
 
 def clean(txt: str) -> str:
     """Normalise ligatures + Unicode + espaces."""
+    import ftfy          # répare les caractères Unicode “cassés” (import paresseux)
     txt = ftfy.fix_text(txt).translate(TRANSLATE)
     return MULTI_WS.sub(" ", txt).strip()
 
 
-def pdf_to_json(pdf_path: Path) -> Path:
-    """Convertit un PDF en JSON et renvoie le chemin du fichier écrit."""
-    out_file = OUTPUT_DIR / f"{pdf_path.stem}.json"
+def extract_pages(pdf_path: PdfSource, start: int = 0, stop: int = None) -> List[Dict[str, Any]]:
+    """Extrait et nettoie les pages [start, stop) (positions 0-based) ; chemin, octets ou fichier."""
+    with open_fitz(pdf_path) as doc:
+        stop = len(doc) if stop is None else min(stop, len(doc))
+        return [{"page": i + 1, "text": clean(doc[i].get_text("text") or "")}
+                for i in range(start, stop)]
+
 
-    result = {"meta": {"source": pdf_path.name, "page_count": 0}, "pages": []}
-    with fitz.open(pdf_path) as doc:
-        result["meta"]["page_count"] = len(doc)
-        for i, page in enumerate(doc, start=1):
-            text = clean(page.get_text("text") or "")
-            result["pages"].append({"page": i, "text": text})
+def write_json(pdf_path: Path, pages: List[Dict[str, Any]], store: bool = False) -> Path:
+    """Écrit le JSON (et éventuellement le store colonnaire) d'un PDF déjà extrait."""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    out_file = OUTPUT_DIR / f"{pdf_path.stem}.json"
 
-    out_file.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    result = {"meta": {"source": pdf_path.name, "page_count": len(pages)}, "pages": pages}
+    atomic_write_text(out_file, json.dumps(result, ensure_ascii=False, indent=2))
+    if store:
+        write_store(OUTPUT_DIR / pdf_path.stem,
+                    [(p["page"], p["text"]) for p in result["pages"]], pdf_path.name)
     return out_file
 
 
+def pdf_to_json(pdf_path: PdfSource, store: bool = False, name: str = None) -> Path:
+    """
+    Convertit un PDF (chemin, octets ou objet fichier) en JSON et renvoie le
+    chemin du fichier écrit ; ``name`` nomme la sortie quand l'entrée n'est pas un chemin.
+    """
+    return write_json(Path(source_name(pdf_path, name)), extract_pages(pdf_path), store=store)
+
+
 def main() -> None:
     pdf_files = sorted(INPUT_DIR.glob("*.pdf"))
     if not pdf_files:
         sys.exit(f"❌ Aucun PDF trouvé dans {INPUT_DIR.resolve()}")
 
+    store = "--store" in sys.argv[1:]
     for pdf in pdf_files:
         try:
-            out_path = pdf_to_json(pdf)
-            print(f"✅ {pdf.name}  →  {out_path.relative_to(Path.cwd())}")
+            out_path = pdf_to_json(pdf, store=store)
+            print(f"✅ {pdf.name}  →  {out_path}")
         except Exception as err:
             print(f"⛔ Erreur avec {pdf.name} : {err}")
 
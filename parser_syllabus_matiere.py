@@ -10,13 +10,22 @@ parse_syllabus_esgi_v8_with_pages.py – version avec numéros de page
 • Pré‑requis (ligne inline) fusionné dans Evaluation finale.
 • Compétences RNCP gardées identiques (Titre / Compétence).
 • NOUVEAU: Ajout des numéros de page pour chaque sous-champ
+• Texte des pages et cellules des tableaux nettoyés une seule fois, à
+  l'extraction (plus les sauts de page, cf. join_pages) : sections, valeurs
+  et lignes sont ensuite des sous-chaînes déjà propres (CLEAN_STATS compte
+  le travail de nettoyage par document).
 """
 
-import json, re, itertools
+import json, re, itertools, sys
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
-import pdfplumber
+from typing import Dict, Iterator, List, Any, Tuple
+
+from atomic_io import atomic_write_text
+from field_spec import SectionScanner, load_template
+from layout_cache import open_pdf
+from pdf_source import PdfSource, source_name
 
 # ── Chemins ────────────────────────────────────────────────────────────────
 INPUT_DIR = Path("data/syllabus_matiere")
@@ -40,21 +49,10 @@ SECTIONS = [
      r"Compétences\s+professionnelles.+développer.+acquérir")
 ]
 
-DETAIL_KEYS = [
-    "Matière", "Code", "Cursus", "Semestre",
-    "Responsable du cours", "Mail du responsable du cours",
-    "Responsable pédagogique", "Professeur associé",
-    "Charge de travail de l'étudiant", "Ects", "Coef", "Volume"
-]
-EVAL_KEYS = [
-    "Type d'examen", "Durée",
-    "Documents autorisés", "Critères d'évaluation", "Pré-requis"
-]
-
-KEY_REGEX_DETAIL = re.compile(rf"({'|'.join(map(re.escape, DETAIL_KEYS))})\s*:\s*", re.I)
-KEY_REGEX_EVAL = re.compile(rf"({'|'.join(map(re.escape, EVAL_KEYS))})\s*:\s*", re.I)
-
 PAGE_RE = re.compile(r"\d{2}/\d{2}/\d{2}\s+Page\s+\d+/\d+\s+Syllabus[^\n]*", re.I)
+SPACES_RE = re.compile(r" {2,}")
+JUNCTION_SPAN = 120          # caractères examinés de part et d'autre d'un saut de page
+BULLET_RE = re.compile(r"^[\s\-•]+")
 
 CONTROL_COLS = [
     "Cas Pratique", "Contrôle Continu", "Dossier",
@@ -64,13 +62,97 @@ CONTROL_COLS = [
 SESSION_HEADERS = ["Séances", "Thèmes", "Travail à domicile", "Références", "Evaluation"]
 
 
-# ── Helpers ────────────────────────────────────────────────────────────────
+# ── Normalisation (une seule fois, à l'extraction) ─────────────────────────
+# Travail de clean() pendant le dernier parse_pdf : appels et caractères traités
+CLEAN_STATS: Counter = Counter()
+
+
 def clean(text: str) -> str:
+    """Retire les pieds de page "DD/MM/YY Page x/x Syllabus…" et les espaces multiples."""
+    CLEAN_STATS["appels"] += 1
+    CLEAN_STATS["caracteres"] += len(text)
     text = PAGE_RE.sub("", text)
-    text = re.sub(r" {2,}", " ", text)
+    text = SPACES_RE.sub(" ", text)
     return text.strip()
 
 
+def join_pages(pages_text: List[Tuple[str, int]]) -> str:
+    """
+    Texte complet du document (pages nettoyées jointes par "\n"), sans les
+    lignes "DD/MM/YY Page x/x" + "Syllabus / Plan de cours…" coupées par un saut
+    de page (pied de la page n, en-tête de la page n + 1) : clean() ne les voit
+    pas page par page. Seules les jonctions sont relues, sur JUNCTION_SPAN
+    caractères (lignes entières).
+    """
+    full_text = "\n".join(text for text, _ in pages_text)
+    spans: List[Tuple[int, int]] = []
+    junction = -1
+    for text, _ in pages_text[:-1]:
+        junction += len(text) + 1
+        start = full_text.rfind("\n", 0, max(0, junction - JUNCTION_SPAN)) + 1
+        end = full_text.find("\n", junction + 1 + JUNCTION_SPAN)
+        end = len(full_text) if end < 0 else end
+        CLEAN_STATS["jonctions"] += 1
+        CLEAN_STATS["caracteres"] += end - start
+        for m in PAGE_RE.finditer(full_text, start, end):
+            if m.start() <= junction < m.end() and (not spans or m.start() >= spans[-1][1]):
+                spans.append(m.span())
+
+    out, pos = [], 0
+    for start, end in spans:
+        out.append(full_text[pos:start])
+        pos = end
+        if full_text[start - 1:start] == " " and full_text[end:end + 1] == " ":
+            pos = len(full_text) - len(full_text[end:].lstrip(" "))      # pas d'espaces doublés à la coupure
+    out.append(full_text[pos:])
+    return "".join(out)
+
+
+class CleanTable:
+    """Tableau pdfplumber dont chaque ligne est nettoyée (None → "") à sa première lecture."""
+
+    def __init__(self, raw: List[List[Any]]):
+        self._raw = raw
+        self._rows: Dict[int, List[str]] = {}
+
+    def width(self) -> int:
+        return len(self._raw[0]) if self._raw else 0
+
+    def row(self, r: int) -> List[str]:
+        if r not in self._rows:
+            self._rows[r] = [clean(cell or "") for cell in self._raw[r]]
+        return self._rows[r]
+
+    def rows(self, start: int = 0) -> Iterator[List[str]]:
+        return (self.row(r) for r in range(start, len(self._raw)))
+
+
+class PageTables:
+    """
+    Tableaux de chaque page, extraits à la première demande puis gardés : les
+    deux parsers de tableaux parcourent les mêmes pages sans relancer
+    extract_tables ni nettoyer deux fois une même ligne.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self._tables: Dict[int, List[CleanTable]] = {}
+
+    def __iter__(self) -> Iterator[Tuple[int, List[CleanTable]]]:
+        for page_idx, page in enumerate(self.pages):
+            if page_idx not in self._tables:
+                self._tables[page_idx] = [CleanTable(table) for table in page.extract_tables()]
+            yield page_idx, self._tables[page_idx]
+
+
+# ── Champs clé : valeur (field_specs/syllabus_matiere.json) ──────────────────
+FIELD_SPECS = load_template("syllabus_matiere")
+DETAIL_SPEC = FIELD_SPECS["Détails du syllabus"]
+EVAL_SPEC = FIELD_SPECS["Evaluation finale"]
+DETAIL_KEYS = DETAIL_SPEC.names
+EVAL_KEYS = EVAL_SPEC.names
+
+
 def find_section_pages(pages_text: List[Tuple[str, int]]) -> Dict[str, int]:
     """Trouve le numéro de page pour chaque section."""
     section_pages = {}
@@ -92,7 +174,7 @@ def find_section_pages(pages_text: List[Tuple[str, int]]) -> Dict[str, int]:
 
 def slice_sections_with_pages(pages_text: List[Tuple[str, int]]) -> Tuple[Dict[str, str], Dict[str, int]]:
     """Découpe le texte en sections et retourne aussi les numéros de page."""
-    full_text = "\n".join([text for text, _ in pages_text])
+    full_text = join_pages(pages_text)
     section_pages = find_section_pages(pages_text)
 
     idx = {}
@@ -107,49 +189,32 @@ def slice_sections_with_pages(pages_text: List[Tuple[str, int]]) -> Tuple[Dict[s
     for i, (name, start) in enumerate(ordered):
         end = ordered[i + 1][1] if i + 1 < len(ordered) else len(full_text)
         block = full_text[start:end]
-        block = "\n".join(block.splitlines()[1:]).strip()
-        blocks[name] = clean(block)
+        blocks[name] = "\n".join(block.splitlines()[1:]).strip()    # sous-chaîne d'un texte déjà nettoyé
 
     return blocks, section_pages
 
 
-def kv_extract_with_page(block: str, regex: re.Pattern, keys: List[str], page_num: int) -> Dict[str, Dict[str, Any]]:
-    """Extrait les paires clé-valeur avec numéro de page."""
-    out = {k: {"value": "", "page": page_num} for k in keys}
-    matches = list(regex.finditer(block))
-
-    for i, m in enumerate(matches):
-        key = m.group(1)
-        start = m.end()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(block)
-        val = clean(block[start:end])
-        val = regex.sub("", val).strip()
-        out[key]["value"] = val
-
-    return out
-
+def kv_extract_with_page(block: str, spec: SectionScanner, page_num: int) -> Dict[str, Dict[str, Any]]:
+    """Extrait les paires clé-valeur (un seul passage, cf. field_spec) avec numéro de page."""
+    return {k: {"value": v, "page": page_num} for k, v in spec.scan(block).items()}
 
-def parse_charge(val: str) -> str:
-    m = re.search(r"\d[\d,]*\s*h", val)
-    return m.group(0) if m else ""
 
-
-def parse_control_table_with_page(pages) -> Tuple[Dict[str, bool], int]:
+def parse_control_table_with_page(tables: PageTables) -> Tuple[Dict[str, bool], int]:
     """Parse le tableau de contrôle et retourne aussi le numéro de page."""
     res = {h: False for h in CONTROL_COLS}
     found_page = 1
 
-    for page_idx, page in enumerate(pages):
-        for table in page.extract_tables():
-            if not table or not table[0]:
+    for page_idx, page_tables in tables:
+        for table in page_tables:
+            if not table.width():
                 continue
-            header_row = [clean(cell or "") for cell in table[0]]
+            header_row = table.row(0)
             if all(col in header_row for col in CONTROL_COLS):
                 found_page = page_idx + 1
-                for row in table[1:]:
-                    if row and clean(row[0]).lower().startswith("contrôle de connaissances"):
+                for row in table.rows(1):
+                    if row and row[0].lower().startswith("contrôle de connaissances"):
                         for col_name, cell in zip(header_row[1:], row[1:]):
-                            if clean(cell or "").upper() == "X":
+                            if cell.upper() == "X":
                                 res[col_name] = True
                         return res, found_page
 
@@ -157,26 +222,26 @@ def parse_control_table_with_page(pages) -> Tuple[Dict[str, bool], int]:
 
 
 def concat_inline(block: str) -> str:
-    lines = [clean(re.sub(r"^[\s\-•]+", "", ln)) for ln in block.splitlines() if ln.strip()]
+    lines = [BULLET_RE.sub("", ln).strip() for ln in block.splitlines() if ln.strip()]
     return " ".join(dict.fromkeys(lines))
 
 
-def parse_sessions_table_with_page(pages) -> Tuple[List[Dict[str, Any]], int]:
+def parse_sessions_table_with_page(tables: PageTables) -> Tuple[List[Dict[str, Any]], int]:
     """Parse le tableau des séances et retourne le numéro de page."""
-    for page_idx, page in enumerate(pages):
-        for table in page.extract_tables():
-            if not table or len(table[0]) < 5:
+    for page_idx, page_tables in tables:
+        for table in page_tables:
+            if table.width() < 5:
                 continue
-            header = [clean(c or "") for c in table[0]]
+            header = table.row(0)
             if all(h in header for h in ("Séances", "Thèmes")):
                 rows = []
                 page_num = page_idx + 1
-                for raw in table[1:]:
-                    if not any(raw):
+                for row in table.rows(1):
+                    if not any(row):
                         continue
-                    padded = list(raw) + [""] * (5 - len(raw))
+                    padded = row + [""] * (5 - len(row))
                     line = {}
-                    for h, v in zip(SESSION_HEADERS, map(lambda x: clean(x or ""), padded[:5])):
+                    for h, v in zip(SESSION_HEADERS, padded[:5]):
                         line[h] = {"value": v, "page": page_num}
                     rows.append(line)
                 return rows, page_num
@@ -189,7 +254,7 @@ def parse_competences_block_with_page(block: str, page_num: int) -> List[Dict[st
     """Parse le bloc des compétences avec numéro de page."""
     rows = []
     for ln in block.splitlines():
-        ln = clean(ln)
+        ln = ln.strip()
         if not ln or ln.lower().startswith("titre"):
             continue
         rncp = re.findall(r"RNCP\w+", ln)
@@ -203,10 +268,16 @@ def parse_competences_block_with_page(block: str, page_num: int) -> List[Dict[st
 
 
 # ── Core parser ────────────────────────────────────────────────────────────
-def parse_pdf(pdf_path: Path) -> Dict[str, Any]:
-    with pdfplumber.open(pdf_path) as pdf:
+def parse_pdf(pdf_path: PdfSource, use_cache: bool = False, name: str = None) -> Dict[str, Any]:
+    # pdf_path : chemin, octets ou objet fichier (pdf_source) ; name : nom de la source dans _meta
+    # use_cache : relit l'extraction pdfplumber depuis le cache disque (layout_cache)
+    CLEAN_STATS.clear()
+    with open_pdf(pdf_path, use_cache) as pdf:
         pages = pdf.pages
         pages_text = [(clean(p.extract_text() or ""), i + 1) for i, p in enumerate(pages)]
+        tables = PageTables(pages)
+        control_dict, control_page = parse_control_table_with_page(tables)
+        sessions, sessions_page = parse_sessions_table_with_page(tables)
 
     full_text = "\n".join([text for text, _ in pages_text])
 
@@ -231,13 +302,8 @@ def parse_pdf(pdf_path: Path) -> Dict[str, Any]:
     # Détails du syllabus
     details_block = sections.get("Détails du syllabus", "")
     details_page = section_pages.get("Détails du syllabus", 1)
-    details = kv_extract_with_page(details_block, KEY_REGEX_DETAIL, DETAIL_KEYS, details_page)
-
-    if details["Charge de travail de l'étudiant"]["value"]:
-        details["Charge de travail de l'étudiant"]["value"] = parse_charge(
-            details["Charge de travail de l'étudiant"]["value"])
+    details = kv_extract_with_page(details_block, DETAIL_SPEC, details_page)
 
-    control_dict, control_page = parse_control_table_with_page(pages)
     details["Contrôle de connaissances"] = {"value": control_dict, "page": control_page}
 
     if title:
@@ -246,7 +312,7 @@ def parse_pdf(pdf_path: Path) -> Dict[str, Any]:
     # Evaluation finale
     evaluation_block = sections.get("Evaluation finale", "")
     eval_page = section_pages.get("Evaluation finale", 1)
-    evaluation = kv_extract_with_page(evaluation_block, KEY_REGEX_EVAL, EVAL_KEYS, eval_page)
+    evaluation = kv_extract_with_page(evaluation_block, EVAL_SPEC, eval_page)
 
     prerequis_page = section_pages.get("Pré-requis", eval_page)
     evaluation["Pré-requis"] = {
@@ -262,7 +328,6 @@ def parse_pdf(pdf_path: Path) -> Dict[str, Any]:
     }
 
     # Sessions
-    sessions, sessions_page = parse_sessions_table_with_page(pages)
     if not sessions:
         sessions_page = section_pages.get("Contenu détaillé des séances", 2)
         sessions = [{
@@ -282,7 +347,7 @@ def parse_pdf(pdf_path: Path) -> Dict[str, Any]:
 
     # Construction du résultat final
     data = {
-        "_meta": {"source_pdf": pdf_path.name, "parsed_at": datetime.utcnow().isoformat() + "Z"},
+        "_meta": {"source_pdf": source_name(pdf_path, name), "parsed_at": datetime.utcnow().isoformat() + "Z"},
         "Détails du syllabus": details,
         "Evaluation finale": evaluation,
         "Objectifs pédagogiques": objectifs,
@@ -304,14 +369,22 @@ def parse_pdf(pdf_path: Path) -> Dict[str, Any]:
 
 
 # ── Batch ──────────────────────────────────────────────────────────────────
+def process_pdf(pdf: PdfSource, output_dir: Path = OUTPUT_DIR, use_cache: bool = False, name: str = None) -> Path:
+    """Parse un PDF (chemin, octets ou objet fichier) et écrit son JSON ; renvoie le chemin écrit."""
+    parsed = parse_pdf(pdf, use_cache, name)
+    outfile = Path(output_dir) / f"{Path(source_name(pdf, name)).stem}.json"
+    atomic_write_text(outfile, json.dumps(parsed, ensure_ascii=False, indent=2))
+    return outfile
+
+
 def main():
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    use_cache = "--cache" in sys.argv[1:]
     for pdf in INPUT_DIR.glob("*.pdf"):
         print(f"Traitement de {pdf.name}...")
-        parsed = parse_pdf(pdf)
-        outfile = OUTPUT_DIR / f"{pdf.stem}.json"
-        outfile.write_text(json.dumps(parsed, ensure_ascii=False, indent=2), encoding="utf-8")
-        print(f"✔ {pdf.name} → {outfile}")
+        outfile = process_pdf(pdf, use_cache=use_cache)
+        print(f"✔ {pdf.name} → {outfile}  (clean : {CLEAN_STATS['appels']} appels, "
+              f"{CLEAN_STATS['caracteres']} caractères)")
 
 
 if __name__ == "__main__":
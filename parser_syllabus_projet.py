@@ -1,18 +1,25 @@
-import pdfplumber
 import os
 import re
 import json
+import sys
+
+from layout_cache import open_pdf
+from pdf_source import source_name
+from atomic_io import atomic_write_text
+from field_spec import load_template
 
 
 # ──────────────────────────────────────────────────────────────
 #  Fonctions d'extraction / parsing
 # ──────────────────────────────────────────────────────────────
 
-def get_section_raw_text(pdf_path):
+def get_section_raw_text(pdf_path, use_cache=False):
     """
     Extrait le texte de chaque section en parcourant toutes les pages pour trouver
     les tables correspondantes. Retourne également le texte non-tabulaire pour le débogage.
     Retourne maintenant aussi les numéros de page pour chaque section.
+    Avec use_cache, l'extraction pdfplumber est relue depuis le cache disque (layout_cache).
+    pdf_path peut être un chemin, des octets ou un objet fichier (pdf_source).
     """
     sections = {}
     section_pages = {}  # Nouveau dictionnaire pour stocker les numéros de page
@@ -21,7 +28,7 @@ def get_section_raw_text(pdf_path):
     section4_pages = []  # Pages correspondantes pour la section 4
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with open_pdf(pdf_path, use_cache) as pdf:
             # --- Extraction du texte non-tabulaire pour le débogage ---
             for i, page in enumerate(pdf.pages):
                 page_tables = page.find_tables()
@@ -139,15 +146,14 @@ def get_section_raw_text(pdf_path):
     return sections, non_table_text_dump, section_pages
 
 
-def safe_search(pattern, text):
-    """
-    Effectue une recherche d'expression régulière et renvoie le groupe 1 si trouvé,
-    sinon renvoie None. Utilise les flags DOTALL et IGNORECASE.
-    """
-    if not text:
-        return None
-    match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-    return match.group(1).strip() if match else None
+FIELD_SPECS = load_template("syllabus_projet")
+
+
+def _scan_section(section, raw_sections, section_pages):
+    """Remplit tous les champs d'une section en un seul passage (cf. field_spec)."""
+    page = section_pages.get(section, None)
+    values = FIELD_SPECS[section].scan(raw_sections.get(section, ""))
+    return {key: {"value": value, "page": page} for key, value in values.items()}
 
 
 def parse_final_data(raw_sections, section_pages):
@@ -157,66 +163,9 @@ def parse_final_data(raw_sections, section_pages):
     """
     structured_data = {}
 
-    # --- SECTION 1 ---
-    text1 = raw_sections.get("1 Matières, formations et groupes", "")
-    page1 = section_pages.get("1 Matières, formations et groupes", None)
-    regles_raw = safe_search(r"Règles de constitution des groupes\s*:\s*(.*?)(?=Charge de travail)", text1)
-    regles_clean = re.sub(r'\s*par groupe\s*:?$', '', regles_raw).strip() if regles_raw else None
-
-    s1_data = {
-        "Matière liée au projet": {
-            "value": safe_search(r"Matière liée au projet\s*:\s*(.*?)(?=Formations\s*:)", text1) or "",
-            "page": page1
-        },
-        "Formations": {
-            "value": safe_search(r"Formations\s*:\s*(.*?)(?=Nombre d'étudiant)", text1) or "",
-            "page": page1
-        },
-        "Nombre d'étudiant par groupe": {
-            "value": safe_search(r"Nombre d'étudiant[\s\S]*?([\d\sà-]+)[\s\S]*?par groupe", text1) or "",
-            "page": page1
-        },
-        "Règles de constitution des groupes": {
-            "value": regles_clean or "",
-            "page": page1
-        },
-        "Charge de travail estimée par étudiant": {
-            "value": safe_search(r"Charge de travail[\s\S]*?([\d,]+\s*h)[\s\S]*?estimée par étudiant", text1) or "",
-            "page": page1
-        }
-    }
-    structured_data["1 Matières, formations et groupes"] = s1_data
-
-    # --- SECTION 2 ---
-    text2 = raw_sections.get("2 Sujet(s) du projet", "")
-    page2 = section_pages.get("2 Sujet(s) du projet", None)
-    s2_data = {
-        "Type de sujet": {
-            "value": safe_search(r"Type de sujet\s*:\s*(.*)", text2) or "",
-            "page": page2
-        }
-    }
-    structured_data["2 Sujet(s) du projet"] = s2_data
-
-    # --- SECTION 3 ---
-    text3 = raw_sections.get("3 Détails du projet", "")
-    page3 = section_pages.get("3 Détails du projet", None)
-    keys3 = [
-        "Objectif du projet (à la fin du projet les étudiants sauront réaliser un...)",
-        "Descriptif détaillé",
-        "Ouvrages de référence (livres, articles, revues, sites web...)",
-        "Outils informatiques à installer"
-    ]
-    s3_data = {}
-    for i, key in enumerate(keys3):
-        next_key_pattern = re.escape(keys3[i + 1]) if i + 1 < len(keys3) else '$'
-        pattern = re.escape(key) + r'\s*:?\s*(.*?)(?=' + next_key_pattern + ')'
-        value = safe_search(pattern, text3)
-        s3_data[key] = {
-            "value": re.sub(r'\s+', ' ', value) if value else "",
-            "page": page3
-        }
-    structured_data["3 Détails du projet"] = s3_data
+    # --- SECTIONS 1, 2, 3 : un passage par section (field_specs/syllabus_projet.json) ---
+    for section in ("1 Matières, formations et groupes", "2 Sujet(s) du projet", "3 Détails du projet"):
+        structured_data[section] = _scan_section(section, raw_sections, section_pages)
 
     # --- SECTION 4 (avec pages pour chaque étape) ---
     text4 = raw_sections.get("4 Livrables et étapes de suivi", "")
@@ -276,84 +225,82 @@ def parse_final_data(raw_sections, section_pages):
     structured_data["4 Livrables et étapes de suivi"] = s4_data
 
     # --- SECTION 5 ---
-    text5 = raw_sections.get("5 Soutenance", "")
-    page5 = section_pages.get("5 Soutenance", None)
-    audience_raw = safe_search(r"Audience\s*:\s*(.*?)(?=Type de présentation)", text5)
-    audience_clean = re.sub(r'\s*par groupe\s*:?$', '', audience_raw).strip() if audience_raw else None
-
-    s5_data = {
-        "Durée de présentation par groupe": {
-            "value": safe_search(r"Durée de présentation[\s\S]*?(\d+\s*min)[\s\S]*?par groupe", text5) or "",
-            "page": page5
-        },
-        "Audience": {
-            "value": audience_clean or "",
-            "page": page5
-        },
-        "Type de présentation": {
-            "value": safe_search(r"Type de présentation\s*:\s*(.*?)(?=Précisions)", text5) or "",
-            "page": page5
-        },
-        "Précisions": {
-            "value": safe_search(r"Précisions\s*:\s*(.*)", text5) or "",
-            "page": page5
-        }
-    }
-    structured_data["5 Soutenance"] = s5_data
+    structured_data["5 Soutenance"] = _scan_section("5 Soutenance", raw_sections, section_pages)
 
     return structured_data
 
 
 # ──────────────────────────────────────────────────────────────
-#  Point d'entrée principal
+#  Traitement d'un fichier
 # ──────────────────────────────────────────────────────────────
 
-if __name__ == "__main__":
-    INPUT_DIR = "data/syllabus_projet"
-    OUTPUT_DIR = "output/syllabus_projet"
+def process_pdf(pdf_path, output_dir="output/syllabus_projet", use_cache=False, name=None):
+    """
+    Extrait + parse un PDF puis écrit le JSON et le dump non-tabulaire.
+    pdf_path : chemin, octets ou objet fichier ; name nomme les sorties si ce n'est pas un chemin.
+    Retourne le chemin du JSON écrit et celui du dump (ou None).
+    """
+    filename = source_name(pdf_path, name)
+
+    # Extraction + parsing
+    raw_sections, non_table_dump, section_pages = get_section_raw_text(pdf_path, use_cache)
+    final_data = parse_final_data(raw_sections, section_pages)
+
+    # Sauvegarder le JSON
+    json_filename = os.path.splitext(filename)[0] + ".json"
+    json_out_path = os.path.join(output_dir, json_filename)
+    atomic_write_text(json_out_path, json.dumps(final_data, indent=2, ensure_ascii=False))
+
+    # (optionnel) dump de débogage
+    debug_path = None
+    if non_table_dump:
+        debug_path = os.path.join(
+            output_dir,
+            os.path.splitext(filename)[0] + "_non_table.txt"
+        )
+        atomic_write_text(debug_path, non_table_dump)
+
+    return json_out_path, debug_path
 
+
+# ──────────────────────────────────────────────────────────────
+#  Point d'entrée principal
+# ──────────────────────────────────────────────────────────────
+
+def main(input_dir="data/syllabus_projet", output_dir="output/syllabus_projet", use_cache=None):
+    """Parse tous les PDF de input_dir ; use_cache=None : suit l'option --cache."""
     # 1) Vérifier le dossier d'entrée
-    if not os.path.isdir(INPUT_DIR):
+    if not os.path.isdir(input_dir):
         raise FileNotFoundError(
-            f"Le dossier '{INPUT_DIR}' est introuvable. "
+            f"Le dossier '{input_dir}' est introuvable. "
             "Assure-toi qu'il existe et contient tes PDF."
         )
 
     # 2) Créer le dossier de sortie si besoin
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
 
-    # 3) Boucler sur chaque PDF
-    for filename in os.listdir(INPUT_DIR):
+    # 3) Boucler sur chaque PDF (--cache : relit l'extraction depuis layout_cache)
+    if use_cache is None:
+        use_cache = "--cache" in sys.argv[1:]
+    for filename in os.listdir(input_dir):
         if not filename.lower().endswith(".pdf"):
             continue
 
-        pdf_path = os.path.join(INPUT_DIR, filename)
+        pdf_path = os.path.join(input_dir, filename)
         print(f"--- Traitement du fichier : {filename} ---")
 
-        # Extraction + parsing
-        raw_sections, non_table_dump, section_pages = get_section_raw_text(pdf_path)
-        final_data = parse_final_data(raw_sections, section_pages)
-
-        # 4) Sauvegarder le JSON
-        json_filename = os.path.splitext(filename)[0] + ".json"
-        json_out_path = os.path.join(OUTPUT_DIR, json_filename)
-        with open(json_out_path, "w", encoding="utf-8") as f:
-            json.dump(final_data, f, indent=2, ensure_ascii=False)
+        json_out_path, debug_path = process_pdf(pdf_path, output_dir, use_cache)
         print(f"→ Résultat écrit dans : {json_out_path}")
-
-        # (optionnel) dump de débogage
-        if non_table_dump:
-            debug_path = os.path.join(
-                OUTPUT_DIR,
-                os.path.splitext(filename)[0] + "_non_table.txt"
-            )
-            with open(debug_path, "w", encoding="utf-8") as f:
-                f.write(non_table_dump)
+        if debug_path:
             print(f"→ Dump non-tabulaire enregistré dans : {debug_path}")
 
         print("=" * 60 + "\n")
 
 
+if __name__ == "__main__":
+    main()
+
+
 
 
 
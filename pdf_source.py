@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+pdf_source.py
+-------------
+Ouverture d'un PDF quelle que soit sa forme : chemin (str / Path), octets
+(bytes, bytearray, memoryview) ou objet fichier binaire (BytesIO, membre de
+zip ou de tar, corps de requête…). Rien n'est écrit sur disque :
+
+    • fitz       → fitz.open(chemin) ou fitz.open(stream=octets, filetype="pdf")
+    • pdfplumber → pdfplumber.open(chemin) ou pdfplumber.open(BytesIO)
+
+Utilisé par parser_cours, parser_syllabus_matiere, parser_syllabus_projet
+(via layout_cache.open_pdf) et router.
+"""
+
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Optional, Union
+import os
+
+PdfSource = Union[str, os.PathLike, bytes, bytearray, memoryview, IO[bytes]]
+DEFAULT_NAME = "document.pdf"
+
+
+def is_path(src: PdfSource) -> bool:
+    return isinstance(src, (str, os.PathLike))
+
+
+def read_bytes(src: PdfSource) -> bytes:
+    """Contenu complet du PDF (un objet fichier est lu depuis sa position courante)."""
+    if is_path(src):
+        return Path(src).read_bytes()
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return bytes(src)
+    return src.read()
+
+
+def source_name(src: PdfSource, name: Optional[str] = None) -> str:
+    """Nom de fichier du PDF : ``name`` s'il est donné, sinon celui du chemin ou de l'objet fichier."""
+    if name:
+        return Path(name).name
+    if is_path(src):
+        return Path(src).name
+    fname = getattr(src, "name", None)
+    if isinstance(fname, str) and fname:
+        return Path(fname).name
+    return DEFAULT_NAME
+
+
+def open_fitz(src: PdfSource):
+    import fitz
+    if is_path(src):
+        return fitz.open(src)
+    return fitz.open(stream=read_bytes(src), filetype="pdf")
+
+
+def open_plumber(src: PdfSource):
+    import pdfplumber
+    if is_path(src):
+        return pdfplumber.open(src)
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return pdfplumber.open(BytesIO(src))
+    if getattr(src, "seekable", lambda: False)():
+        return pdfplumber.open(src)
+    return pdfplumber.open(BytesIO(src.read()))      # flux non repositionnable (tar en streaming)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+-----------
+Registre des étapes de la chaîne de traitement, par famille de document.
+
+    cours             : parse (parser_cours)            → chunk (chunking_cours)
+    syllabus_matiere  : parse (parser_syllabus_matiere) → chunk (chunking_syllabus_matière)
+    syllabus_projet   : parse (parser_syllabus_projet)  → clean (cleaning_json_syllabus_projet)
+                                                        → chunk (chunking_syllabus_projet)
+
+Chaque étape prend le PDF source et renvoie le chemin de sa sortie ; les
+chemins intermédiaires suivent les conventions des scripts (output/<famille>/,
+output_clean_json/, dossiers chunks). Les modules sont importés à la demande.
+
+Usage :
+    python pipeline.py data/syllabus_projet/docker.pdf      # toutes les étapes d'un PDF
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+import importlib, json, sys
+
+FAMILIES = ("cours", "syllabus_matiere", "syllabus_projet")
+FAMILY_DIRS = {fam: Path("data") / fam for fam in FAMILIES}
+
+
+# ── Chemins de sortie par convention ──────────────────────────────────────────
+def output_path(family: str, stage: str, pdf: Path) -> Path:
+    stem = Path(pdf).stem
+    if stage == "parse":
+        return Path("output") / family / f"{stem}.json"
+    if stage == "clean":
+        return Path("output_clean_json") / f"{stem}.json"
+    chunk_dir = "chunk" if family == "cours" else "chunks"
+    return Path("output") / family / chunk_dir / f"{stem}_chunks.json"
+
+
+def family_of(pdf: Path) -> str:
+    """Famille déduite du dossier data/<famille>/ du PDF."""
+    parent = Path(pdf).parent.name
+    if parent not in FAMILIES:
+        raise ValueError(f"Famille inconnue pour {pdf} (attendu data/<famille>/)")
+    return parent
+
+
+# ── Étapes ────────────────────────────────────────────────────────────────────
+def _cours_parse(pdf: Path) -> Path:
+    import parser_cours
+    return parser_cours.pdf_to_json(Path(pdf))
+
+
+def _cours_chunk(pdf: Path) -> Path:
+    import chunking_cours
+    chunking_cours.process_file(output_path("cours", "parse", pdf))
+    return output_path("cours", "chunk", pdf)
+
+
+def _matiere_parse(pdf: Path) -> Path:
+    import parser_syllabus_matiere
+    out = output_path("syllabus_matiere", "parse", pdf)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    return parser_syllabus_matiere.process_pdf(Path(pdf), out.parent)
+
+
+def _matiere_chunk(pdf: Path) -> Path:
+    chunker = importlib.import_module("chunking_syllabus_matière")
+    chunker._process_file(output_path("syllabus_matiere", "parse", pdf))
+    return output_path("syllabus_matiere", "chunk", pdf)
+
+
+def _projet_parse(pdf: Path) -> Path:
+    import parser_syllabus_projet
+    out = output_path("syllabus_projet", "parse", pdf)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    json_path, _ = parser_syllabus_projet.process_pdf(str(pdf), str(out.parent))
+    return Path(json_path)
+
+
+def _projet_clean(pdf: Path) -> Path:
+    import cleaning_json_syllabus_projet
+    out = output_path("syllabus_projet", "clean", pdf)
+    return Path(cleaning_json_syllabus_projet.clean_file(
+        str(output_path("syllabus_projet", "parse", pdf)), str(out.parent)))
+
+
+def _projet_chunk(pdf: Path) -> Path:
+    import chunking_syllabus_projet
+    out = output_path("syllabus_projet", "chunk", pdf)
+    # data_to_chunks et non process_json_to_chunks : ce dernier avale les erreurs
+    # et renverrait [] (sortie vide enregistrée comme réussie)
+    src = output_path("syllabus_projet", "clean", pdf)
+    data = json.loads(src.read_text(encoding="utf-8"))
+    chunks = chunking_syllabus_projet.data_to_chunks(data, src.stem)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    chunking_syllabus_projet.save_chunks(chunks, str(out))
+    return out
+
+
+STAGES: Dict[str, List[Tuple[str, Callable[[Path], Path]]]] = {
+    "cours": [("parse", _cours_parse), ("chunk", _cours_chunk)],
+    "syllabus_matiere": [("parse", _matiere_parse), ("chunk", _matiere_chunk)],
+    "syllabus_projet": [("parse", _projet_parse), ("clean", _projet_clean), ("chunk", _projet_chunk)],
+}
+
+
+def stage_names(family: str) -> List[str]:
+    return [name for name, _ in STAGES[family]]
+
+
+def run_stage(family: str, stage: str, pdf: Path) -> Path:
+    """Exécute une étape pour un PDF et renvoie le chemin de sa sortie."""
+    for name, fn in STAGES[family]:
+        if name == stage:
+            return Path(fn(Path(pdf)))
+    raise KeyError(f"Étape inconnue pour {family} : {stage}")
+
+
+def run_all(pdf: Path, family: str = None) -> List[Path]:
+    """Exécute toutes les étapes d'un PDF, dans l'ordre."""
+    family = family or family_of(pdf)
+    return [run_stage(family, name, pdf) for name in stage_names(family)]
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        sys.exit("Usage : pipeline.py <pdf>...")
+    for arg in sys.argv[1:]:
+        pdf = Path(arg)
+        try:
+            outputs = run_all(pdf)
+            print(f"✅ {pdf.name}  →  {outputs[-1]}")
+        except Exception as err:
+            print(f"⛔ Erreur avec {pdf.name} : {err}")
+
+
+if __name__ == "__main__":
+    main()
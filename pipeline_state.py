@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+pipeline_state.py
+-----------------
+Suivi d'état de la chaîne de traitement dans une base SQLite locale, pour
+reprendre un batch interrompu sans tout recommencer.
+
+Pour chaque document : hash du PDF ; pour chaque étape (cf. pipeline.STAGES) :
+statut, début, durée, sortie et erreur. Au lancement suivant, une étape déjà
+réussie sur le même hash (et dont la sortie existe encore) est sautée ; seules
+les étapes en échec ou jamais lancées sont rejouées. Si une étape est rejouée,
+toutes les suivantes le sont aussi.
+
+Usage :
+    python pipeline_state.py run                         # tout, avec reprise
+    python pipeline_state.py run --families cours
+    python pipeline_state.py status                      # dernier état par document
+    python pipeline_state.py slowest -n 20 --since 12h   # documents les plus lents
+    python pipeline_state.py failures
+"""
+
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+import argparse, hashlib, re, sqlite3, time
+
+from pipeline import FAMILIES, FAMILY_DIRS, run_stage, stage_names
+
+DB_PATH = Path(".cache/pipeline_state.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id         INTEGER PRIMARY KEY,
+    path       TEXT NOT NULL UNIQUE,
+    family     TEXT NOT NULL,
+    sha256     TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stage_runs (
+    id          INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id),
+    stage       TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    status      TEXT NOT NULL CHECK (status IN ('running', 'done', 'failed')),
+    started_at  REAL NOT NULL,
+    duration    REAL,
+    output_path TEXT,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS stage_runs_doc_stage ON stage_runs(document_id, stage, started_at);
+CREATE INDEX IF NOT EXISTS stage_runs_started ON stage_runs(started_at);
+"""
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class StateStore:
+    """Accès à la base d'état (une connexion par processus)."""
+
+    def __init__(self, db_path: Path = DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "StateStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- écriture ---------------------------------------------------------------
+    def upsert_document(self, path: Path, family: str, sha: str) -> int:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO documents(path, family, sha256, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET family=excluded.family, sha256=excluded.sha256, "
+                "updated_at=excluded.updated_at",
+                (str(path), family, sha, time.time()))
+        return self.conn.execute("SELECT id FROM documents WHERE path = ?", (str(path),)).fetchone()[0]
+
+    def start(self, doc_id: int, stage: str, sha: str) -> int:
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO stage_runs(document_id, stage, sha256, status, started_at) "
+                "VALUES (?, ?, ?, 'running', ?)", (doc_id, stage, sha, time.time()))
+        return cur.lastrowid
+
+    def finish(self, run_id: int, duration: float, output: Optional[Path] = None,
+               error: Optional[str] = None) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE stage_runs SET status = ?, duration = ?, output_path = ?, error = ? WHERE id = ?",
+                ("failed" if error else "done", duration, str(output) if output else None, error, run_id))
+
+    # -- lecture ----------------------------------------------------------------
+    def last_run(self, doc_id: int, stage: str) -> Optional[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT * FROM stage_runs WHERE document_id = ? AND stage = ? "
+            "ORDER BY started_at DESC, id DESC LIMIT 1", (doc_id, stage)).fetchone()
+
+    def is_done(self, doc_id: int, stage: str, sha: str) -> bool:
+        last = self.last_run(doc_id, stage)
+        return bool(last and last["status"] == "done" and last["sha256"] == sha
+                    and last["output_path"] and Path(last["output_path"]).exists())
+
+    def status(self) -> List[sqlite3.Row]:
+        return self.conn.execute("""
+            SELECT d.path, d.family, r.stage, r.status, r.duration, r.error,
+                   datetime(r.started_at, 'unixepoch', 'localtime') AS started
+            FROM stage_runs r JOIN documents d ON d.id = r.document_id
+            WHERE r.id = (SELECT r2.id FROM stage_runs r2
+                          WHERE r2.document_id = r.document_id AND r2.stage = r.stage
+                          ORDER BY r2.started_at DESC, r2.id DESC LIMIT 1)
+            ORDER BY d.path, r.started_at""").fetchall()
+
+    def slowest(self, limit: int = 20, since: float = 0.0, stage: Optional[str] = None) -> List[sqlite3.Row]:
+        """Documents les plus lents (somme des durées d'étapes réussies depuis ``since``)."""
+        sql = """
+            SELECT d.path, d.family, SUM(r.duration) AS total, COUNT(*) AS stages,
+                   datetime(MAX(r.started_at), 'unixepoch', 'localtime') AS last_run
+            FROM stage_runs r JOIN documents d ON d.id = r.document_id
+            WHERE r.status = 'done' AND r.started_at >= ?"""
+        params: List[Any] = [since]
+        if stage:
+            sql += " AND r.stage = ?"
+            params.append(stage)
+        sql += " GROUP BY d.id ORDER BY total DESC LIMIT ?"
+        params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def failures(self) -> List[sqlite3.Row]:
+        return [row for row in self.status() if row["status"] == "failed"]
+
+
+# ── Exécution avec reprise ────────────────────────────────────────────────────
+def process_document(store: StateStore, pdf: Path, family: str) -> Tuple[int, int, Optional[str]]:
+    """
+    Rejoue les étapes manquantes d'un document.
+    Renvoie (étapes exécutées, étapes sautées, erreur éventuelle).
+    """
+    sha = file_hash(pdf)
+    doc_id = store.upsert_document(pdf, family, sha)
+    ran = skipped = 0
+    force = False
+    for stage in stage_names(family):
+        if not force and store.is_done(doc_id, stage, sha):
+            skipped += 1
+            continue
+        force = True   # les étapes suivantes dépendent de celle-ci
+        run_id = store.start(doc_id, stage, sha)
+        t0 = time.perf_counter()
+        try:
+            out = run_stage(family, stage, pdf)
+        except Exception as err:
+            store.finish(run_id, time.perf_counter() - t0, error=f"{type(err).__name__}: {err}")
+            return ran, skipped, f"{stage} : {err}"
+        store.finish(run_id, time.perf_counter() - t0, out)
+        ran += 1
+    return ran, skipped, None
+
+
+def parse_since(value: str) -> float:
+    """'12h', '2d', '30m' → timestamp ; sinon date ISO ('2026-10-18 18:00')."""
+    m = re.fullmatch(r"(\d+)\s*([mhd])", value.strip())
+    if m:
+        return time.time() - int(m.group(1)) * {"m": 60, "h": 3600, "d": 86400}[m.group(2)]
+    from datetime import datetime
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _print_rows(rows: List[sqlite3.Row]) -> None:
+    if not rows:
+        print("(aucun résultat)")
+        return
+    keys = rows[0].keys()
+    print("  ".join(keys))
+    for row in rows:
+        print("  ".join("" if row[k] is None else (f"{row[k]:.2f}" if isinstance(row[k], float) else str(row[k]))
+                        for k in keys))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="État de la chaîne de traitement (SQLite)")
+    ap.add_argument("--db", type=Path, default=DB_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="exécute les étapes manquantes ou en échec")
+    r.add_argument("--families", nargs="+", choices=FAMILIES, default=list(FAMILIES))
+    sub.add_parser("status", help="dernier état de chaque étape par document")
+    s = sub.add_parser("slowest", help="documents les plus lents")
+    s.add_argument("-n", type=int, default=20)
+    s.add_argument("--since", default="24h", help="ex. 12h, 2d ou date ISO")
+    s.add_argument("--stage", default=None)
+    sub.add_parser("failures", help="étapes dont le dernier passage a échoué")
+    args = ap.parse_args()
+
+    with StateStore(args.db) as store:
+        if args.cmd == "run":
+            total_ran = total_skipped = errors = 0
+            for family in args.families:
+                for pdf in sorted(FAMILY_DIRS[family].glob("*.pdf")):
+                    ran, skipped, error = process_document(store, pdf, family)
+                    total_ran += ran
+                    total_skipped += skipped
+                    if error:
+                        errors += 1
+                        print(f"⛔ {pdf.name} : {error}")
+                    elif ran:
+                        print(f"✅ {pdf.name}  ({ran} étape(s), {skipped} reprise(s))")
+            print(f"Terminé : {total_ran} étape(s) exécutée(s), {total_skipped} sautée(s), {errors} erreur(s)")
+        elif args.cmd == "status":
+            _print_rows(store.status())
+        elif args.cmd == "slowest":
+            _print_rows(store.slowest(args.n, parse_since(args.since), args.stage))
+        else:
+            _print_rows(store.failures())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+regex_safety.py
+---------------
+Couche de sécurité pour les regex d'extraction de champs.
+
+1. ``search_between`` : réécriture ancrée, en temps linéaire, des motifs de la
+   forme ``LABEL[\\s\\S]*?(VALEUR)[\\s\\S]*?FIN`` (parse_final_data). Ces motifs
+   imbriquent deux quantificateurs paresseux autour d'une classe qui recouvre
+   les espaces : sur une section mal formée (pas de FIN), le moteur essaie
+   toutes les découpes possibles et met des minutes. Ici on localise LABEL,
+   puis la DERNIÈRE occurrence de FIN, et on cherche VALEUR dans cette seule
+   fenêtre : même résultat, trois passes linéaires.
+
+2. ``search`` : ``re.search`` avec un budget de temps optionnel par appel
+   (SIGALRM / setitimer ; le moteur ``re`` vérifie les signaux pendant la
+   recherche). Au-delà du budget la recherche est abandonnée et renvoie None.
+   Hors thread principal (ou sous Windows) le budget est ignoré.
+
+Benchmark « fuzz » (textes de section adverses) :
+    python regex_safety.py --fuzz
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Optional, Pattern, Union
+import argparse, random, re, signal, threading, time
+
+DEFAULT_BUDGET = 0.5          # secondes par recherche
+STATS: Dict[str, int] = {"searches": 0, "timeouts": 0}
+
+PatternLike = Union[str, Pattern]
+
+
+class RegexTimeout(Exception):
+    """Levée quand une recherche dépasse son budget de temps."""
+
+
+def _can_alarm() -> bool:
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def time_budget(seconds: Optional[float]):
+    """Lève RegexTimeout si le bloc dure plus de ``seconds`` secondes."""
+    if not seconds or not _can_alarm():
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        raise RegexTimeout(f"budget de {seconds}s dépassé")
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _compile(pattern: PatternLike, flags: int) -> Pattern:
+    return pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+
+
+def search(pattern: PatternLike, text: str, flags: int = 0,
+           budget: Optional[float] = DEFAULT_BUDGET, pos: int = 0,
+           endpos: Optional[int] = None) -> Optional[re.Match]:
+    """``re.search`` borné dans le temps (fenêtre pos:endpos) ; None si pas de match ou budget dépassé."""
+    STATS["searches"] += 1
+    rx = _compile(pattern, flags)
+    try:
+        with time_budget(budget):
+            return rx.search(text, pos) if endpos is None else rx.search(text, pos, endpos)
+    except RegexTimeout:
+        STATS["timeouts"] += 1
+        return None
+
+
+def last_match(pattern: PatternLike, text: str, pos: int = 0, flags: int = 0) -> Optional[re.Match]:
+    """Dernière occurrence de pattern à partir de pos (finditer, une passe linéaire) ; None si absente."""
+    last = None
+    for last in _compile(pattern, flags).finditer(text, pos):
+        pass
+    return last
+
+
+def search_between(text: str, label: PatternLike, value: PatternLike, end: PatternLike,
+                   flags: int = re.IGNORECASE) -> Optional[str]:
+    """
+    Équivalent linéaire de ``re.search(LABEL[\\s\\S]*?(VALUE)[\\s\\S]*?END)``
+    pour une VALUE qui ne peut pas chevaucher END : renvoie le groupe 1
+    nettoyé (strip) ou None.
+    """
+    if not text:
+        return None
+    m_label = _compile(label, flags).search(text)
+    if not m_label:
+        return None
+    start = m_label.end()
+    last_end = last_match(end, text, start + 1, flags)
+    if last_end is None:
+        return None
+    m_value = search(value, text, flags, pos=start, endpos=last_end.start())
+    return m_value.group(1).strip() if m_value else None
+
+
+# ── Benchmark fuzz ────────────────────────────────────────────────────────────
+# Motifs historiques de parse_final_data et leur réécriture (label, valeur, fin)
+LEGACY = {
+    "Nombre d'étudiant par groupe": (
+        r"Nombre d'étudiant[\s\S]*?([\d\sà-]+)[\s\S]*?par groupe",
+        (r"Nombre d'étudiant", r"([\d\sà-]+)", r"par groupe")),
+    "Charge de travail estimée par étudiant": (
+        r"Charge de travail[\s\S]*?([\d,]+\s*h)[\s\S]*?estimée par étudiant",
+        (r"Charge de travail", r"([\d,]+\s*h)", r"estimée par étudiant")),
+    "Durée de présentation par groupe": (
+        r"Durée de présentation[\s\S]*?(\d+\s*min)[\s\S]*?par groupe",
+        (r"Durée de présentation", r"(\d+\s*min)", r"par groupe")),
+}
+
+
+def _adversarial(label: str, size: int, rng: random.Random) -> str:
+    """Texte de section mal formé : libellé puis bruit sans terminateur."""
+    noise = "".join(rng.choice("0123456789 ,à-h\n") for _ in range(size))
+    return label + noise
+
+
+def _well_formed(label: str, end: str, rng: random.Random) -> str:
+    """Libellé, bruit court, valeurs plausibles puis terminateur (parfois répété)."""
+    filler = lambda: "".join(rng.choice("abc 12,à-h\n") for _ in range(rng.randint(0, 40)))
+    text = (f"{label} :{filler()} {rng.randint(1, 9)} à {rng.randint(2, 9)} "
+            f"{rng.randint(1, 9)},5 h {rng.randint(5, 30)} min{filler()} {end}")
+    return text + (filler() + end if rng.random() < 0.3 else "")
+
+
+def fuzz(sizes=(1_000, 10_000, 100_000), rounds: int = 200, budget: float = DEFAULT_BUDGET) -> None:
+    rng = random.Random(0)
+    flags = re.IGNORECASE | re.DOTALL
+
+    # 1) Équivalence sur des entrées bien formées ou courtes
+    mismatches = 0
+    for _ in range(rounds):
+        for name, (legacy, (lab, val, end)) in LEGACY.items():
+            text = _well_formed(lab, end, rng) if rng.random() < 0.7 else _adversarial(lab, 30, rng)
+            old = search(legacy, text, flags, budget=None)
+            old = old.group(1).strip() if old else None
+            if old != search_between(text, lab, val, end):
+                mismatches += 1
+    print(f"Équivalence : {rounds * len(LEGACY)} cas, {mismatches} divergence(s)")
+
+    # 2) Pire cas : bruit adverse sans terminateur
+    print(f"{'champ':<40} {'taille':>8} {'historique':>14} {'réécrit':>10}")
+    for name, (legacy, (lab, val, end)) in LEGACY.items():
+        for size in sizes:
+            text = _adversarial(lab, size, rng)
+            t0 = time.perf_counter()
+            before = STATS["timeouts"]
+            search(legacy, text, flags, budget=budget)
+            t_old = time.perf_counter() - t0
+            old = f"{t_old:.3f}s" + (" (coupé)" if STATS["timeouts"] > before else "")
+            t0 = time.perf_counter()
+            search_between(text, lab, val, end)
+            t_new = time.perf_counter() - t0
+            print(f"{name:<40} {size:>8} {old:>14} {t_new:>9.4f}s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Couche de sécurité regex")
+    ap.add_argument("--fuzz", action="store_true", help="lance le benchmark sur textes adverses")
+    ap.add_argument("--budget", type=float, default=DEFAULT_BUDGET)
+    args = ap.parse_args()
+    if args.fuzz:
+        fuzz(budget=args.budget)
+    else:
+        ap.print_help()
+
+
+if __name__ == "__main__":
+    main()
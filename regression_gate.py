@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+regression_gate.py
+------------------
+Garde-fou de non-régression : relance chaque étape de la chaîne (pipeline.py)
+sur les PDF de data/, compare les sorties aux sorties de référence du dépôt et
+compare les mesures à une baseline enregistrée.
+
+• Les étapes tournent dans un dossier temporaire (data/ y est un lien) : les
+  sorties du dépôt (output/, output_clean_json/) ne sont jamais réécrites et
+  servent de référence, fichier par fichier au même chemin relatif.
+• JSON comparés sans les clés "parsed_at" ; autres fichiers octet par octet.
+  Une sortie sans référence dans le dépôt compte aussi comme dérive.
+• Mesures par (famille, étape) : temps mural (somme sur les PDF, minimum sur
+  --repeat passages), appels pdfplumber (open et méthodes de Page), pic de
+  mémoire résidente (VmHWM remis à zéro avant chaque PDF ; ru_maxrss sinon).
+• Échec (code 1) si une sortie dérive, si une étape est plus lente que la
+  baseline de plus de --max-slowdown % (et de plus de --min-delta-ms), ou si
+  elle fait plus d'appels pdfplumber ; le pic mémoire n'échoue qu'avec
+  --max-rss-growth.
+• La baseline (regression_baseline.json) dépend de la machine : elle est
+  écrite au premier passage, puis seulement avec --update-baseline et si
+  aucune sortie ne dérive.
+
+Usage :
+    python regression_gate.py
+    python regression_gate.py --family syllabus_projet --repeat 3 --max-slowdown 15
+    python regression_gate.py --update-baseline
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse, gc, json, os, platform, resource, shutil, sys, tempfile, time
+from collections import Counter
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from datetime import datetime
+
+from atomic_io import atomic_write_text
+import pipeline
+
+BASELINE_PATH = Path("regression_baseline.json")
+VERSION = 1
+IGNORED_KEYS = {"parsed_at"}
+# Méthodes de pdfplumber.page.Page comptées (CroppedPage / FilteredPage en héritent)
+PAGE_METHODS = ("extract_text", "extract_tables", "extract_words", "find_tables", "crop", "filter", "within_bbox")
+
+
+# ── Compteurs pdfplumber ──────────────────────────────────────────────────────
+@contextmanager
+def count_pdfplumber_calls(counter: Counter):
+    """Enveloppe pdfplumber.open et les méthodes de Page pour compter leurs appels."""
+    import pdfplumber
+    from pdfplumber.page import Page
+
+    def wrap(name: str, fn: Callable) -> Callable:
+        def counted(*args, **kwargs):
+            counter[name] += 1
+            return fn(*args, **kwargs)
+        return counted
+
+    originals: List[Tuple[Any, str, Callable]] = [(pdfplumber, "open", pdfplumber.open)]
+    originals += [(Page, m, getattr(Page, m)) for m in PAGE_METHODS if hasattr(Page, m)]
+    for owner, name, fn in originals:
+        setattr(owner, name, wrap(name, fn))
+    try:
+        yield counter
+    finally:
+        for owner, name, fn in originals:
+            setattr(owner, name, fn)
+
+
+# ── Pic mémoire ───────────────────────────────────────────────────────────────
+def reset_peak_rss() -> bool:
+    """Remet VmHWM à la RSS courante (Linux ≥ 4.0) ; False si impossible."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss       # pic depuis le démarrage
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+# ── Exécution des étapes ──────────────────────────────────────────────────────
+def discover(data_dir: Path, families: List[str]) -> Dict[str, List[Path]]:
+    """PDF par famille (les familles sans PDF sont omises)."""
+    found = {}
+    for fam in families:
+        pdfs = sorted((data_dir / fam).glob("*.pdf"))
+        if pdfs:
+            found[fam] = pdfs
+    return found
+
+
+def run_stages(pdfs_by_family: Dict[str, List[Path]], repeat: int = 1,
+               verbose: bool = False) -> Tuple[Dict[str, Dict], List[Path]]:
+    """
+    Exécute chaque étape sur tous les PDF de sa famille (cwd = dossier de travail),
+    sortie console des scripts masquée sauf si verbose.
+    Renvoie ({"famille/étape": mesures}, sorties produites).
+    """
+    metrics: Dict[str, Dict] = {}
+    produced: List[Path] = []
+    quiet = nullcontext() if verbose else redirect_stdout(open(os.devnull, "w"))
+    for family, pdfs in pdfs_by_family.items():
+        for stage in pipeline.stage_names(family):
+            best: Optional[float] = None
+            calls: Counter = Counter()
+            peak = 0.0
+            for attempt in range(repeat):
+                elapsed = 0.0
+                calls = Counter()
+                for pdf in pdfs:
+                    gc.collect()
+                    reset_peak_rss()
+                    with count_pdfplumber_calls(calls), quiet:
+                        t0 = time.perf_counter()
+                        out = pipeline.run_stage(family, stage, pdf)
+                        elapsed += time.perf_counter() - t0
+                    peak = max(peak, peak_rss_mb())
+                    if attempt == 0:
+                        produced.append(out)
+                best = elapsed if best is None else min(best, elapsed)
+            metrics[f"{family}/{stage}"] = {"documents": len(pdfs), "seconds": round(best, 4),
+                                            "pdfplumber_calls": dict(sorted(calls.items())),
+                                            "peak_rss_mb": round(peak, 1)}
+            print(f"  {family}/{stage:<6} {len(pdfs):>3} PDF  {best:7.2f}s  "
+                  f"{sum(calls.values()):>6} appels pdfplumber  {peak:7.1f} Mio")
+    return metrics, produced
+
+
+# ── Comparaison aux références ────────────────────────────────────────────────
+def strip_ignored(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: strip_ignored(v) for k, v in value.items() if k not in IGNORED_KEYS}
+    if isinstance(value, list):
+        return [strip_ignored(v) for v in value]
+    return value
+
+
+def first_difference(a: Any, b: Any, where: str = "$") -> Optional[str]:
+    """Chemin de la première différence entre deux valeurs JSON, None si égales."""
+    if type(a) is not type(b):
+        return f"{where} : {type(a).__name__} ≠ {type(b).__name__}"
+    if isinstance(a, dict):
+        for key in a.keys() | b.keys():
+            if key not in a or key not in b:
+                return f"{where}.{key} : {'en trop' if key not in a else 'absente'}"
+        for key in a:
+            diff = first_difference(a[key], b[key], f"{where}.{key}")
+            if diff:
+                return diff
+        return None
+    if isinstance(a, list):
+        for i, (x, y) in enumerate(zip(a, b)):
+            diff = first_difference(x, y, f"{where}[{i}]")
+            if diff:
+                return diff
+        return f"{where} : {len(b)} éléments au lieu de {len(a)}" if len(a) != len(b) else None
+    return None if a == b else f"{where} : {str(a)[:60]!r} → {str(b)[:60]!r}"
+
+
+def compare_outputs(workdir: Path, golden_root: Path) -> Tuple[int, List[str]]:
+    """Compare toutes les sorties du dossier de travail ; renvoie (nombre comparé, dérives)."""
+    drifts: List[str] = []
+    files = sorted(p for top in ("output", "output_clean_json") if (workdir / top).exists()
+                   for p in (workdir / top).rglob("*") if p.is_file())
+    for path in files:
+        rel = path.relative_to(workdir)
+        golden = golden_root / rel
+        if not golden.exists():
+            drifts.append(f"{rel} : pas de sortie de référence")
+            continue
+        if path.suffix == ".json":
+            with path.open(encoding="utf-8") as f, golden.open(encoding="utf-8") as g:
+                diff = first_difference(strip_ignored(json.load(g)), strip_ignored(json.load(f)))
+        else:
+            diff = None if path.read_bytes() == golden.read_bytes() else "contenu différent"
+        if diff:
+            drifts.append(f"{rel} — {diff}")
+    return len(files), drifts
+
+
+# ── Baseline ──────────────────────────────────────────────────────────────────
+def load_baseline(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    baseline = json.loads(path.read_text(encoding="utf-8"))
+    if baseline.get("version") != VERSION:
+        raise ValueError(f"Version de baseline non supportée : {baseline.get('version')}")
+    return baseline
+
+
+def save_baseline(path: Path, metrics: Dict[str, Dict], repeat: int, previous: Optional[Dict] = None) -> None:
+    """Écrit la baseline ; les étapes non mesurées ce passage (--family) sont conservées."""
+    stages = dict(previous["stages"]) if previous else {}
+    stages.update(metrics)
+    baseline = {"version": VERSION, "created": datetime.now().isoformat(timespec="seconds"),
+                "machine": platform.node(), "python": platform.python_version(),
+                "repeat": repeat, "stages": stages}
+    atomic_write_text(path, json.dumps(baseline, ensure_ascii=False, indent=2))
+
+
+def check_against(baseline: Dict, metrics: Dict[str, Dict], max_slowdown: float, min_delta_ms: float,
+                  max_rss_growth: Optional[float]) -> Tuple[List[str], List[str]]:
+    """Compare les mesures à la baseline ; renvoie (échecs, avertissements)."""
+    failures: List[str] = []
+    warnings: List[str] = []
+    for key, now in metrics.items():
+        base = baseline["stages"].get(key)
+        if base is None:
+            warnings.append(f"{key} : absente de la baseline")
+            continue
+        if base["documents"] != now["documents"]:
+            warnings.append(f"{key} : {now['documents']} PDF au lieu de {base['documents']}, temps non comparés")
+        else:
+            delta = now["seconds"] - base["seconds"]
+            pct = 100 * delta / base["seconds"] if base["seconds"] else 0.0
+            if pct > max_slowdown and delta * 1000 > min_delta_ms:
+                failures.append(f"{key} : {base['seconds']:.2f}s → {now['seconds']:.2f}s (+{pct:.0f} %, "
+                                f"limite {max_slowdown:.0f} %)")
+            for name, n in now["pdfplumber_calls"].items():
+                before = base["pdfplumber_calls"].get(name, 0)
+                if n > before:
+                    failures.append(f"{key} : {name} appelé {n} fois au lieu de {before}")
+        growth = 100 * (now["peak_rss_mb"] - base["peak_rss_mb"]) / base["peak_rss_mb"] if base["peak_rss_mb"] else 0.0
+        if growth > (max_rss_growth if max_rss_growth is not None else 10.0):
+            message = f"{key} : pic mémoire {base['peak_rss_mb']:.0f} → {now['peak_rss_mb']:.0f} Mio (+{growth:.0f} %)"
+            (failures if max_rss_growth is not None else warnings).append(message)
+    return failures, warnings
+
+
+# ── Point d'entrée ────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Non-régression : sorties de référence et baseline de performance")
+    ap.add_argument("--family", choices=pipeline.FAMILIES, action="append", help="famille(s) à vérifier (défaut : toutes)")
+    ap.add_argument("--data", type=Path, default=Path("data"), help="dossier des PDF (data/<famille>/*.pdf)")
+    ap.add_argument("--golden", type=Path, default=Path("."), help="racine des sorties de référence")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    ap.add_argument("--repeat", type=int, default=1, help="passages par étape (temps minimal retenu)")
+    ap.add_argument("--max-slowdown", type=float, default=20.0, help="ralentissement toléré par étape, en %%")
+    ap.add_argument("--min-delta-ms", type=float, default=50.0, help="écart absolu toléré par étape, en ms")
+    ap.add_argument("--max-rss-growth", type=float, default=None, help="hausse du pic mémoire tolérée, en %% (défaut : avertissement seul)")
+    ap.add_argument("--update-baseline", action="store_true", help="réécrit la baseline si aucune sortie ne dérive")
+    ap.add_argument("--keep", action="store_true", help="conserve le dossier de travail")
+    ap.add_argument("--verbose", action="store_true", help="affiche la sortie console des étapes")
+    args = ap.parse_args()
+
+    pdfs = discover(args.data.resolve(), args.family or list(pipeline.FAMILIES))
+    if not pdfs:
+        sys.exit(f"⛔ Aucun PDF dans {args.data}/<famille>/")
+    golden_root = args.golden.resolve()
+    baseline_path = args.baseline.resolve()
+    try:
+        baseline = load_baseline(baseline_path)
+    except ValueError as err:
+        sys.exit(f"⛔ {err}")
+
+    workdir = Path(tempfile.mkdtemp(prefix="regression_gate_"))
+    (workdir / "data").symlink_to(args.data.resolve(), target_is_directory=True)
+    cwd = Path.cwd()
+    print(f"▶ {sum(len(v) for v in pdfs.values())} PDF, dossier de travail {workdir}")
+    try:
+        os.chdir(workdir)
+        metrics, _ = run_stages(pdfs, max(1, args.repeat), args.verbose)
+        compared, drifts = compare_outputs(workdir, golden_root)
+    finally:
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    failures = [f"dérive : {d}" for d in drifts]
+    warnings: List[str] = []
+    if baseline is not None and not args.update_baseline:
+        slow, warnings = check_against(baseline, metrics, args.max_slowdown, args.min_delta_ms, args.max_rss_growth)
+        failures += slow
+
+    for message in warnings:
+        print(f"⚠ {message}")
+    for message in failures:
+        print(f"⛔ {message}")
+    if (baseline is None or args.update_baseline) and not drifts:
+        save_baseline(baseline_path, metrics, max(1, args.repeat), baseline)
+        print(f"✔ Baseline {'écrite' if baseline is None else 'mise à jour'} → {args.baseline}")
+    elif args.update_baseline:
+        print("⚠ Baseline non mise à jour : des sorties dérivent")
+    if failures:
+        sys.exit(1)
+    print(f"✅ {compared} sorties identiques aux références, "
+          + ("aucune régression de performance" if baseline is not None and not args.update_baseline
+             else "pas de comparaison de performance"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+router.py
+---------
+Aiguillage automatique des PDF d'un dossier « en vrac » vers le bon parser.
+
+Seule la première page est lue (fitz, sans pdfplumber) et comparée à des
+marqueurs :
+    • "Syllabus / Plan de cours"                        → syllabus_matiere (parse_pdf)
+    • "Syllabus projet" / "1 Matières, formations…"     → syllabus_projet  (get_section_raw_text)
+    • sinon                                             → cours            (pdf_to_json)
+
+Usage :
+    python router.py inbox/                 # affiche la classification
+    python router.py inbox/ --run           # parse directement (via batch_runner)
+    python router.py inbox/ --move          # range les PDF dans data/<famille>/
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse, re, shutil, sys
+
+from batch_runner import INPUT_DIRS, choose_workers, plan_jobs, run
+from pdf_source import PdfSource, open_fitz
+
+# (famille, marqueur) testés dans l'ordre sur le texte de la première page
+MARKERS = [
+    ("syllabus_matiere", re.compile(r"Syllabus\s*/\s*Plan\s+de\s+cours", re.I)),
+    ("syllabus_projet", re.compile(r"Syllabus\s+projet", re.I)),
+    ("syllabus_projet", re.compile(r"1\s+Matières,\s+formations\s+et\s+groupes", re.I)),
+]
+DEFAULT_FAMILY = "cours"
+UNREADABLE = "illisible"
+
+
+def first_page_text(pdf: PdfSource) -> Optional[str]:
+    """Texte de la première page seulement ; None si le PDF ne s'ouvre pas."""
+    try:
+        with open_fitz(pdf) as doc:
+            if len(doc) == 0:
+                return ""
+            return doc.load_page(0).get_text("text") or ""
+    except Exception:
+        return None
+
+
+def classify_text(text: str) -> str:
+    for family, marker in MARKERS:
+        if marker.search(text):
+            return family
+    return DEFAULT_FAMILY
+
+
+def classify(pdf: PdfSource) -> str:
+    """Renvoie la famille du PDF (cours, syllabus_matiere, syllabus_projet ou illisible)."""
+    text = first_page_text(pdf)
+    if text is None:
+        return UNREADABLE
+    return classify_text(text)
+
+
+def route(pdfs: List[Path]) -> Dict[str, List[Path]]:
+    routed: Dict[str, List[Path]] = {}
+    for pdf in pdfs:
+        routed.setdefault(classify(pdf), []).append(pdf)
+    return routed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Aiguillage des PDF par empreinte de première page")
+    ap.add_argument("inbox", type=Path, help="dossier contenant des PDF de toutes familles")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--run", action="store_true", help="parse les PDF avec le parser de leur famille")
+    mode.add_argument("--move", action="store_true", help="déplace les PDF dans data/<famille>/")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    pdfs = sorted(p for p in args.inbox.rglob("*") if p.suffix.lower() == ".pdf")
+    if not pdfs:
+        sys.exit(f"❌ Aucun PDF trouvé dans {args.inbox.resolve()}")
+
+    routed = route(pdfs)
+    for family, files in sorted(routed.items()):
+        print(f"{family:<17} {len(files)} PDF")
+    for pdf in routed.get(UNREADABLE, []):
+        print(f"⛔ PDF illisible : {pdf}")
+
+    if args.move:
+        skipped = 0
+        for family, files in routed.items():
+            if family == UNREADABLE:
+                continue
+            INPUT_DIRS[family].mkdir(parents=True, exist_ok=True)
+            for pdf in files:
+                dest = INPUT_DIRS[family] / pdf.name
+                if dest.exists():               # jamais écraser un document d'entrée
+                    print(f"⚠ {dest} existe déjà : {pdf} laissé en place")
+                    skipped += 1
+                    continue
+                shutil.move(str(pdf), dest)
+        print("✔ PDF rangés dans data/" + (f" ({skipped} laissé(s) en place)" if skipped else ""))
+    elif args.run:
+        files: List[Tuple[str, Path]] = [(fam, p) for fam, ps in routed.items() if fam != UNREADABLE for p in ps]
+        jobs = plan_jobs(files)
+        errors = run(jobs, choose_workers(jobs, args.workers))
+        print(f"Terminé, {errors} erreur(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+supervisor.py
+-------------
+Exécution surveillée des documents : chaque job tourne dans un processus
+worker dont le parent surveille la durée (horloge murale) et la mémoire
+résidente (/proc/<pid>/status, VmRSS).
+
+• Dépassement de --timeout ou de --max-rss, ou mort du worker (segfault) :
+  le worker est tué puis remplacé, le PDF est déplacé dans
+  quarantine/<famille>/ avec un rapport <nom>.json (motif, limite, durée,
+  pic mémoire, pages, sha256, dernière erreur), et le batch continue.
+• Les workers sont réutilisés d'un document à l'autre tant qu'ils restent
+  dans leur budget : pas de coût de démarrage par document.
+• Un worker (re)lancé exécute son initializer (imports lourds) avant de
+  recevoir un job : ce coût n'est pas décompté du --timeout.
+
+Utilisé par batch_runner.py (--timeout / --max-rss).
+
+Usage :
+    python supervisor.py                   # liste la quarantaine
+    python supervisor.py --release docker.pdf   # remet un PDF dans data/<famille>/
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from multiprocessing.connection import wait as wait_connections
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+import argparse, hashlib, json, multiprocessing as mp, shutil, time, traceback
+
+from atomic_io import atomic_write_text
+
+QUARANTINE_DIR = Path("quarantine")
+POLL_SECONDS = 0.1
+
+
+@dataclass
+class Budget:
+    seconds: Optional[float] = None     # horloge murale par document
+    rss_mb: Optional[float] = None      # mémoire résidente max du worker
+
+    def __bool__(self) -> bool:
+        return self.seconds is not None or self.rss_mb is not None
+
+
+@dataclass
+class Outcome:
+    job: Any
+    status: str                         # ok | error | timeout | rss | crash
+    result: Any = None
+    error: str = ""
+    trace: str = ""
+    elapsed: float = 0.0
+    peak_rss_mb: float = 0.0
+
+    @property
+    def breached(self) -> bool:
+        return self.status in ("timeout", "rss", "crash")
+
+
+def rss_mb(pid: int) -> float:
+    """Mémoire résidente d'un processus (Mio) ; 0 si inconnue."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+# ── Côté worker ───────────────────────────────────────────────────────────────
+def _worker_main(conn, initializer: Optional[Callable[[], None]]) -> None:
+    if initializer:
+        initializer()
+    conn.send("ready")
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        if msg is None:
+            return
+        fn, arg = msg
+        try:
+            conn.send(("ok", fn(arg), "", ""))
+        except Exception as err:
+            conn.send(("error", None, f"{type(err).__name__}: {err}", traceback.format_exc(limit=8)))
+
+
+@dataclass
+class _Slot:
+    process: Any
+    conn: Any
+    job: Any = None
+    started: float = 0.0
+    peak: float = 0.0
+
+
+# ── Pool surveillé ────────────────────────────────────────────────────────────
+class SupervisedPool:
+    """Pool de workers à budget ; ``run`` renvoie un Outcome par job, dans l'ordre de fin."""
+
+    def __init__(self, workers: int, budget: Budget, initializer: Optional[Callable[[], None]] = None):
+        self.workers = max(1, workers)
+        self.budget = budget
+        self.initializer = initializer
+        self.slots: List[_Slot] = [self._spawn() for _ in range(self.workers)]
+        for slot in self.slots:
+            self._await_ready(slot)
+
+    def _spawn(self) -> _Slot:
+        parent, child = mp.Pipe()
+        proc = mp.Process(target=_worker_main, args=(child, self.initializer), daemon=True)
+        proc.start()
+        child.close()
+        return _Slot(proc, parent)
+
+    @staticmethod
+    def _await_ready(slot: _Slot) -> None:
+        """Attend la fin de l'initializer : son coût n'entre pas dans le budget du premier job."""
+        try:
+            slot.conn.recv()
+        except (EOFError, OSError):
+            pass          # worker mort à l'initialisation : le premier job le signalera (crash)
+
+    def _replace(self, slot: _Slot) -> None:
+        if slot.process.is_alive():
+            slot.process.kill()
+        slot.process.join()
+        slot.conn.close()
+        fresh = self._spawn()
+        self._await_ready(fresh)
+        slot.process, slot.conn, slot.job = fresh.process, fresh.conn, None
+
+    def close(self) -> None:
+        for slot in self.slots:
+            try:
+                slot.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            slot.process.join(timeout=5)
+            if slot.process.is_alive():
+                slot.process.kill()
+
+    def __enter__(self) -> "SupervisedPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def run(self, fn: Callable[[Any], Any], jobs: Iterable[Any],
+            skip: Optional[Callable[[Any], bool]] = None) -> Iterator[Outcome]:
+        """Exécute fn(job) pour chaque job ; ``skip(job)`` est évalué juste avant l'envoi."""
+        todo = iter(jobs)
+        exhausted = False
+        while True:
+            for slot in self.slots:
+                while slot.job is None and not exhausted:
+                    job = next(todo, None)
+                    if job is None:
+                        exhausted = True
+                    elif not (skip and skip(job)):
+                        slot.job, slot.started, slot.peak = job, time.monotonic(), 0.0
+                        slot.conn.send((fn, job))
+            busy = [s for s in self.slots if s.job is not None]
+            if not busy:
+                return
+
+            ready = wait_connections([s.conn for s in busy], timeout=POLL_SECONDS)
+            now = time.monotonic()
+            for slot in busy:
+                elapsed = now - slot.started
+                if slot.conn in ready:
+                    try:
+                        status, result, error, trace = slot.conn.recv()
+                    except (EOFError, OSError):
+                        slot.process.join(timeout=1)
+                        code = slot.process.exitcode
+                        yield Outcome(slot.job, "crash", error=f"worker mort (code {code})",
+                                      elapsed=elapsed, peak_rss_mb=slot.peak)
+                        self._replace(slot)
+                        continue
+                    yield Outcome(slot.job, status, result, error, trace, elapsed, slot.peak)
+                    slot.job = None
+                    continue
+
+                slot.peak = max(slot.peak, rss_mb(slot.process.pid))
+                if self.budget.seconds is not None and elapsed > self.budget.seconds:
+                    yield Outcome(slot.job, "timeout", error=f"plus de {self.budget.seconds:g}s",
+                                  elapsed=elapsed, peak_rss_mb=slot.peak)
+                    self._replace(slot)
+                elif self.budget.rss_mb is not None and slot.peak > self.budget.rss_mb:
+                    yield Outcome(slot.job, "rss", error=f"plus de {self.budget.rss_mb:g} Mio",
+                                  elapsed=elapsed, peak_rss_mb=slot.peak)
+                    self._replace(slot)
+
+
+# ── Quarantaine ───────────────────────────────────────────────────────────────
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def quarantine(pdf: Path, family: str, outcome: Outcome, budget: Budget,
+               pages: Optional[int] = None, dest: Path = QUARANTINE_DIR) -> Path:
+    """Déplace le PDF dans dest/<famille>/ et écrit son rapport ; renvoie le chemin du rapport."""
+    target_dir = Path(dest) / family
+    target_dir.mkdir(parents=True, exist_ok=True)
+    record = {
+        "source": str(pdf),
+        "family": family,
+        "reason": outcome.status,
+        "detail": outcome.error,
+        "limits": {"seconds": budget.seconds, "rss_mb": budget.rss_mb},
+        "elapsed_s": round(outcome.elapsed, 2),
+        "peak_rss_mb": round(outcome.peak_rss_mb, 1),
+        "pages": pages,
+        "size_bytes": pdf.stat().st_size if pdf.exists() else None,
+        "sha256": _sha256(pdf) if pdf.exists() else None,
+        "job": getattr(outcome.job, "label", lambda: str(outcome.job))(),
+        "traceback": outcome.trace,
+        "quarantined_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    if pdf.exists():
+        shutil.move(str(pdf), target_dir / pdf.name)
+    report = target_dir / f"{pdf.name}.json"
+    atomic_write_text(report, json.dumps(record, ensure_ascii=False, indent=2))
+    return report
+
+
+def list_quarantine(dest: Path = QUARANTINE_DIR) -> List[dict]:
+    return [json.loads(p.read_text(encoding="utf-8")) for p in sorted(Path(dest).glob("*/*.pdf.json"))]
+
+
+def release(name: str, dest: Path = QUARANTINE_DIR) -> Path:
+    """Remet un PDF en quarantaine à son emplacement d'origine et supprime son rapport."""
+    for report in Path(dest).glob(f"*/{name}.json"):
+        record = json.loads(report.read_text(encoding="utf-8"))
+        source = Path(record["source"])
+        source.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(report.with_suffix("")), source)
+        report.unlink()
+        return source
+    raise FileNotFoundError(f"{name} n'est pas en quarantaine")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="PDF mis en quarantaine par les budgets de batch_runner")
+    ap.add_argument("--dir", type=Path, default=QUARANTINE_DIR)
+    ap.add_argument("--release", metavar="PDF", help="remet ce PDF dans son dossier d'origine")
+    args = ap.parse_args()
+
+    if args.release:
+        print(f"✔ {args.release} → {release(args.release, args.dir)}")
+        return
+    records = list_quarantine(args.dir)
+    if not records:
+        print("(quarantaine vide)")
+    for r in records:
+        print(f"{r['quarantined_at']}  {r['family']:<17} {Path(r['source']).name:<40} "
+              f"{r['reason']:<8} {r['elapsed_s']:>7.1f}s {r['peak_rss_mb']:>7.0f} Mio  {r['detail']}")
+
+
+if __name__ == "__main__":
+    main()
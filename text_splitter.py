@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+text_splitter.py
+----------------
+Découpe des valeurs longues de syllabus (« Programme détaillé », « Ouvrages
+de référence », « Descriptif détaillé »…) en parties d'au plus N tokens,
+aux frontières de lignes, de puces et de phrases, pour les chunkers
+chunking_syllabus_matière et chunking_syllabus_projet.
+
+• Les tokens sont estimés (≈ 4 caractères par token) : pas de tokenizer requis.
+• Les parties sont équilibrées : une valeur de 1,5 × N tokens donne deux
+  parties d'environ 0,75 × N, pas N + 0,5 × N — les lots d'embeddings se
+  remplissent plus régulièrement.
+• Une phrase plus longue que N est coupée entre deux mots.
+
+Usage :
+    python text_splitter.py output/syllabus_projet/chunks/drl_chunks.json --max-tokens 128
+"""
+
+from typing import List, Tuple
+import argparse, json, math, re
+
+CHARS_PER_TOKEN = 4
+DEFAULT_MAX_TOKENS = 256
+
+# Fin de phrase suivie d'un début plausible (majuscule, chiffre, puce)
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+(?=[\"«(\[A-ZÀ-ÖØ-Þ0-9•▪◦●\-–])")
+# Puce en début de ligne ou au milieu d'une ligne aplatie (« … • Identifier … »)
+_BULLET = re.compile(r"\s+(?=[•▪◦●]\s*\S|[-–]\s+\S|o\s+[A-ZÀ-ÖØ-Þ])")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+def _units(text: str) -> List[Tuple[str, str]]:
+    """(séparateur, fragment) : lignes, puis puces, puis phrases."""
+    units: List[Tuple[str, str]] = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        first = True
+        for piece in _BULLET.split(line):
+            for sentence in _SENTENCE_END.split(piece):
+                sentence = sentence.strip()
+                if sentence:
+                    units.append(("\n" if first else " ", sentence))
+                    first = False
+    return units
+
+
+def _cut_words(sep: str, text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """Coupe un fragment trop long entre deux mots (ou en plein mot s'il le faut)."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    out: List[Tuple[str, str]] = []
+    current = ""
+    for word in text.split(" "):
+        while len(word) > limit:
+            if current:
+                out.append((sep if not out else " ", current))
+                current = ""
+            out.append((sep if not out else " ", word[:limit]))
+            word = word[limit:]
+        candidate = f"{current} {word}" if current else word
+        if len(candidate) > limit and current:
+            out.append((sep if not out else " ", current))
+            current = word
+        else:
+            current = candidate
+    if current:
+        out.append((sep if not out else " ", current))
+    return out
+
+
+def split_text(text: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> List[str]:
+    """Parties de `text` d'au plus `max_tokens` tokens estimés ; [text] si elle tient déjà."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    units: List[Tuple[str, str]] = []
+    for sep, unit in _units(text):
+        if estimate_tokens(unit) > max_tokens:
+            units.extend(_cut_words(sep, unit, max_tokens))
+        else:
+            units.append((sep, unit))
+    if not units:
+        return [text]
+
+    # Nombre minimal de parties (remplissage glouton au maximum), puis plus
+    # petite capacité qui tient dans ce nombre : parties les plus égales possible.
+    limit = max_tokens * CHARS_PER_TOKEN
+    n_parts = len(_pack(units, limit))
+    low, high = math.ceil(sum(len(u) + 1 for _, u in units) / n_parts), limit
+    while low < high:
+        mid = (low + high) // 2
+        if len(_pack(units, mid)) <= n_parts:
+            high = mid
+        else:
+            low = mid + 1
+    parts = _pack(units, high)
+    return parts if len(parts) > 1 else [text]        # espaces de remplissage seuls : texte intact
+
+
+def _pack(units: List[Tuple[str, str]], capacity: int) -> List[str]:
+    """Regroupe les fragments dans l'ordre, en parties d'au plus `capacity` caractères."""
+    parts: List[str] = []
+    current = ""
+    for sep, unit in units:
+        candidate = f"{current}{sep}{unit}" if current else unit
+        if current and len(candidate) > capacity:
+            parts.append(current)
+            current = unit
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_field(prefix: str, value: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> List[str]:
+    """Contenus « <prefix><partie> », le préfixe (« Champ: ») comptant dans le budget."""
+    budget = max(16, max_tokens - estimate_tokens(prefix))
+    return [prefix + part for part in split_text(value, budget)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Aperçu du découpage des chunks longs")
+    ap.add_argument("chunks", help="fichier *_chunks.json")
+    ap.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    args = ap.parse_args()
+    with open(args.chunks, encoding="utf-8") as f:
+        chunks = json.load(f)
+    for i, chunk in enumerate(chunks):
+        parts = split_text(chunk["content"], args.max_tokens)
+        if len(parts) > 1:
+            sizes = ", ".join(str(estimate_tokens(p)) for p in parts)
+            print(f"chunk {i} ({estimate_tokens(chunk['content'])} tokens) → {len(parts)} parties : {sizes}")
+
+
+if __name__ == "__main__":
+    main()
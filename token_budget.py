@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+token_budget.py
+---------------
+Estimation du nombre de tokens des chunks et plan des lots d'embedding,
+avant d'envoyer quoi que ce soit :
+
+• estimateurs : "chars" (≈ 4 caractères par token, celui de text_splitter),
+  "words" (mots et ponctuation, plus précis sur le français), ou
+  "tokenizer:<fichier tokenizer.json>" (bibliothèque tokenizers, optionnelle) ;
+• cache des comptes par hash du texte, par estimateur
+  (.cache/token_counts/<estimateur>.json) : un second passage ne recompte
+  que les textes nouveaux ;
+• plan de lots : rangement « best fit decreasing » sous --max-batch-tokens
+  et --max-batch-items ; les chunks au-delà de --max-item-tokens sont signalés
+  (ils seraient tronqués par le modèle) ;
+• rapport par document et total (tokens, lots, remplissage, coût, durée au
+  débit --tpm / --rpm), affiché et écrit en JSON.
+
+Usage :
+    python token_budget.py output/syllabus_*/chunks/*_chunks.json output/cours/chunk/*_chunks.json
+    python token_budget.py output/cours/chunk/*_chunks.json --estimator tokenizer:models/tokenizer.json \\
+        --max-batch-tokens 8000 --max-batch-items 96 --max-item-tokens 512 --price-per-mtok 0.02
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import argparse, bisect, hashlib, json, math, re, sys, time
+
+from atomic_io import atomic_write_text
+from chunk_store import chunk_id_for, chunker_files
+from text_splitter import estimate_tokens
+
+CACHE_DIR = Path(".cache/token_counts")
+REPORT_PATH = Path("output/token_report.json")
+_WORDS = re.compile(r"\w+|[^\w\s]")
+_SLUG = re.compile(r"[^\w.-]+")
+
+
+# ── Estimateurs ───────────────────────────────────────────────────────────────
+def count_words(text: str) -> int:
+    """Un token par tranche de 4 caractères de chaque mot, plus un par signe de ponctuation."""
+    return sum(math.ceil(len(tok) / 4) for tok in _WORDS.findall(text))
+
+
+def load_counter(spec: str) -> Callable[[str], int]:
+    if spec == "chars":
+        return estimate_tokens
+    if spec == "words":
+        return count_words
+    if spec.startswith("tokenizer:"):
+        try:
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ImportError("--estimator tokenizer:… demande la bibliothèque tokenizers (pip install tokenizers)")
+        tokenizer = Tokenizer.from_file(spec.split(":", 1)[1])
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+    raise ValueError(f"Estimateur inconnu : {spec} (chars, words ou tokenizer:<fichier>)")
+
+
+class TokenCounter:
+    """Estimateur + cache persistant {hash du texte: nombre de tokens}."""
+
+    def __init__(self, spec: str = "words", cache_dir: Optional[Path] = CACHE_DIR):
+        self.spec = spec
+        self.count_fn = load_counter(spec)
+        self.path = Path(cache_dir) / (_SLUG.sub("_", spec) + ".json") if cache_dir else None
+        self.cache: Dict[str, int] = {}
+        if self.path and self.path.exists():
+            self.cache = json.loads(self.path.read_text(encoding="utf-8"))
+        self.hits = self.misses = 0
+        self._dirty = False
+
+    def count(self, text: str) -> int:
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+        n = self.cache.get(key)
+        if n is None:
+            n = self.cache[key] = self.count_fn(text)
+            self.misses += 1
+            self._dirty = True
+        else:
+            self.hits += 1
+        return n
+
+    def save(self) -> None:
+        if self.path and self._dirty:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.path, json.dumps(self.cache, separators=(",", ":")))
+            self._dirty = False
+
+
+# ── Plan des lots ─────────────────────────────────────────────────────────────
+def plan_batches(items: Sequence[Tuple[str, int]], max_batch_tokens: int,
+                 max_batch_items: int) -> List[List[Tuple[str, int]]]:
+    """
+    Range les (identifiant, tokens) en lots (best fit decreasing) sans dépasser
+    max_batch_tokens ni max_batch_items ; un élément plus gros que max_batch_tokens
+    part seul dans son lot.
+    """
+    batches: List[List[Tuple[str, int]]] = []
+    open_rooms: List[Tuple[int, int]] = []      # (tokens disponibles, n° de lot), trié
+    for item in sorted(items, key=lambda it: it[1], reverse=True):
+        pos = bisect.bisect_left(open_rooms, (item[1], -1))
+        if pos < len(open_rooms):
+            free, b = open_rooms.pop(pos)
+            batches[b].append(item)
+            free -= item[1]
+        else:
+            b = len(batches)
+            batches.append([item])
+            free = max(0, max_batch_tokens - item[1])
+        if free > 0 and len(batches[b]) < max_batch_items:
+            bisect.insort(open_rooms, (free, b))
+    return batches
+
+
+# ── Rapport ───────────────────────────────────────────────────────────────────
+def build_report(files: Sequence[Path], counter: TokenCounter, max_batch_tokens: int, max_batch_items: int,
+                 max_item_tokens: int, price_per_mtok: float, tpm: Optional[int], rpm: Optional[int]) -> Dict:
+    documents: Dict[str, Dict] = {}
+    items: List[Tuple[str, int]] = []
+    for path in files:
+        chunks = json.loads(Path(path).read_text(encoding="utf-8"))
+        doc = chunk_id_for(path, 0).rsplit(":", 1)[0]
+        counts = [(chunk_id_for(path, rank), counter.count(c["content"]))
+                  for rank, c in enumerate(chunks) if c.get("content")]
+        if not counts:
+            continue
+        tokens = [n for _, n in counts]
+        documents[doc] = {"chunks": len(counts), "tokens": sum(tokens), "max_chunk_tokens": max(tokens),
+                          "over_item_limit": sum(n > max_item_tokens for n in tokens),
+                          "cost": round(sum(tokens) / 1e6 * price_per_mtok, 6)}
+        items.extend(counts)
+
+    batches = plan_batches(items, max_batch_tokens, max_batch_items)
+    total_tokens = sum(n for _, n in items)
+    minutes = [m for m in (total_tokens / tpm if tpm else None, len(batches) / rpm if rpm else None) if m is not None]
+    fills = [sum(n for _, n in b) / max_batch_tokens for b in batches]
+    return {
+        "estimator": counter.spec,
+        "limits": {"max_batch_tokens": max_batch_tokens, "max_batch_items": max_batch_items,
+                   "max_item_tokens": max_item_tokens, "tpm": tpm, "rpm": rpm},
+        "total": {"documents": len(documents), "chunks": len(items), "tokens": total_tokens,
+                  "over_item_limit": sum(d["over_item_limit"] for d in documents.values()),
+                  "batches": len(batches),
+                  "mean_batch_fill": round(sum(fills) / len(fills), 3) if fills else 0.0,
+                  "cost": round(total_tokens / 1e6 * price_per_mtok, 6),
+                  "minutes_at_rate_limit": round(max(minutes), 2) if minutes else None},
+        "documents": documents,
+        "batches": [[cid for cid, _ in b] for b in batches],
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Estimation des tokens et plan des lots d'embedding")
+    ap.add_argument("files", nargs="+", type=Path, help="fichiers *_chunks.json")
+    ap.add_argument("--estimator", default="words", help='"chars", "words" ou "tokenizer:<tokenizer.json>"')
+    ap.add_argument("--max-batch-tokens", type=int, default=8000, help="tokens max par requête")
+    ap.add_argument("--max-batch-items", type=int, default=96, help="chunks max par requête")
+    ap.add_argument("--max-item-tokens", type=int, default=512, help="contexte max du modèle par chunk")
+    ap.add_argument("--price-per-mtok", type=float, default=0.0, help="prix par million de tokens")
+    ap.add_argument("--tpm", type=int, default=None, help="limite de tokens par minute")
+    ap.add_argument("--rpm", type=int, default=None, help="limite de requêtes par minute")
+    ap.add_argument("--report", type=Path, default=REPORT_PATH)
+    ap.add_argument("--no-cache", action="store_true")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    try:
+        counter = TokenCounter(args.estimator, None if args.no_cache else CACHE_DIR)
+    except (ImportError, ValueError) as err:
+        sys.exit(f"⛔ {err}")
+    report = build_report(chunker_files(args.files), counter, args.max_batch_tokens, args.max_batch_items,
+                          args.max_item_tokens, args.price_per_mtok, args.tpm, args.rpm)
+    counter.save()
+    args.report.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(args.report, json.dumps(report, ensure_ascii=False, indent=2))
+
+    print(f"{'document':<48} {'chunks':>7} {'tokens':>9} {'max':>6} {'> limite':>9}")
+    for doc, d in sorted(report["documents"].items(), key=lambda kv: -kv[1]["tokens"]):
+        print(f"{doc:<48} {d['chunks']:>7} {d['tokens']:>9} {d['max_chunk_tokens']:>6} {d['over_item_limit']:>9}")
+    t = report["total"]
+    print(f"✅ {t['chunks']} chunks, {t['tokens']} tokens ({counter.spec}), {t['batches']} lots "
+          f"remplis à {t['mean_batch_fill']:.0%}, coût {t['cost']:.4f}"
+          + (f", ≥ {t['minutes_at_rate_limit']} min au débit limite" if t["minutes_at_rate_limit"] is not None else "")
+          + f" — cache {counter.hits}/{counter.hits + counter.misses}, {time.perf_counter() - t0:.2f}s → {args.report}")
+    if t["over_item_limit"]:
+        print(f"⚠ {t['over_item_limit']} chunk(s) au-delà de {args.max_item_tokens} tokens seraient tronqués")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+warehouse.py
+------------
+Entrepôt SQLite des champs structurés des syllabus, pour répondre aux
+questions analytiques en SQL au lieu de parcourir les JSON.
+
+Sources :
+    output/syllabus_matiere/*.json   (parse_pdf)
+    output_clean_json/*.json         (parse_final_data complété ; à défaut output/syllabus_projet/*.json)
+
+Tables :
+    documents    un syllabus (famille, nom, sha256 du JSON chargé)
+    courses      syllabus matière : Matière, Code, Semestre, Ects, Coef, Volume…
+                 (durées et nombres convertis en REAL : « 12,00 h » → 12.0)
+    controls     cases « Contrôle de connaissances » (type, coché)
+    sessions     lignes de « Contenu détaillé des séances »
+    competences  compétences RNCP
+    projects     syllabus projet : matière liée, charge, type de sujet, soutenance
+    deliverables livrables et étapes de suivi
+    fields       tous les champs feuilles (section, champ, valeur, nombre, page)
+    text_fts     FTS5 sur les champs longs (objectifs, programme, séances…)
+
+• Chargement incrémental : un JSON dont le sha256 n'a pas changé est sauté ;
+  un JSON modifié voit ses lignes remplacées ; un JSON disparu est retiré.
+• Insertion en masse (executemany) dans une seule transaction.
+
+Usage :
+    python warehouse.py load
+    python warehouse.py sql "SELECT matiere, ects FROM courses WHERE type_examen = 'QCM' AND ects > 1"
+    python warehouse.py search "docker compose"
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import argparse, hashlib, json, re, sqlite3, sys, time
+
+DB_PATH = Path("output/warehouse.sqlite")
+SOURCES = {
+    "syllabus_matiere": [Path("output/syllabus_matiere")],
+    "syllabus_projet": [Path("output_clean_json"), Path("output/syllabus_projet")],
+}
+LONG_TEXT_MIN = 40          # un champ de cette longueur ou plus va dans text_fts
+
+SCHEMA = """
+PRAGMA foreign_keys = ON;
+CREATE TABLE IF NOT EXISTS documents (
+    id        INTEGER PRIMARY KEY,
+    family    TEXT NOT NULL,
+    name      TEXT NOT NULL,
+    source    TEXT NOT NULL,
+    sha256    TEXT NOT NULL,
+    loaded_at REAL NOT NULL,
+    UNIQUE (family, name)
+);
+CREATE TABLE IF NOT EXISTS courses (
+    document_id      INTEGER PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,
+    matiere          TEXT,
+    intitule         TEXT,
+    code             TEXT,
+    cursus           TEXT,
+    semestre         TEXT,
+    responsable      TEXT,
+    mail_responsable TEXT,
+    charge_h         REAL,
+    ects             REAL,
+    coef             REAL,
+    volume_h         REAL,
+    type_examen      TEXT,
+    duree_examen_h   REAL
+);
+CREATE TABLE IF NOT EXISTS controls (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    kind        TEXT NOT NULL,
+    checked     INTEGER NOT NULL,
+    PRIMARY KEY (document_id, kind)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    rank        INTEGER NOT NULL,
+    seance      TEXT,
+    themes      TEXT,
+    travail     TEXT,
+    refs        TEXT,
+    evaluation  TEXT,
+    page        INTEGER,
+    PRIMARY KEY (document_id, rank)
+);
+CREATE TABLE IF NOT EXISTS competences (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    rank        INTEGER NOT NULL,
+    titre       TEXT,
+    competence  TEXT,
+    rncp        TEXT,
+    page        INTEGER,
+    PRIMARY KEY (document_id, rank)
+);
+CREATE TABLE IF NOT EXISTS projects (
+    document_id        INTEGER PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,
+    matiere            TEXT,
+    formations         TEXT,
+    taille_groupe      TEXT,
+    charge_h           REAL,
+    type_sujet         TEXT,
+    duree_presentation TEXT,
+    audience           TEXT,
+    type_presentation  TEXT
+);
+CREATE TABLE IF NOT EXISTS deliverables (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    rank        INTEGER NOT NULL,
+    text        TEXT NOT NULL,
+    page        INTEGER,
+    PRIMARY KEY (document_id, rank)
+);
+CREATE TABLE IF NOT EXISTS fields (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    section     TEXT NOT NULL,
+    field       TEXT NOT NULL,
+    value       TEXT,
+    number      REAL,
+    page        INTEGER
+);
+CREATE INDEX IF NOT EXISTS courses_semestre ON courses(semestre);
+CREATE INDEX IF NOT EXISTS courses_ects ON courses(ects);
+CREATE INDEX IF NOT EXISTS courses_examen ON courses(type_examen);
+CREATE INDEX IF NOT EXISTS controls_kind ON controls(kind, checked);
+CREATE INDEX IF NOT EXISTS competences_rncp ON competences(rncp);
+CREATE INDEX IF NOT EXISTS fields_doc ON fields(document_id);
+CREATE INDEX IF NOT EXISTS fields_field ON fields(field, number);
+CREATE VIRTUAL TABLE IF NOT EXISTS text_fts USING fts5(
+    section, field, value, document_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Champ JSON → colonne typée (« # » : valeur numérique)
+COURSE_COLUMNS = {
+    ("Détails du syllabus", "Matière"): "matiere",
+    ("Détails du syllabus", "Intitulé"): "intitule",
+    ("Détails du syllabus", "Code"): "code",
+    ("Détails du syllabus", "Cursus"): "cursus",
+    ("Détails du syllabus", "Semestre"): "semestre",
+    ("Détails du syllabus", "Responsable du cours"): "responsable",
+    ("Détails du syllabus", "Mail du responsable du cours"): "mail_responsable",
+    ("Détails du syllabus", "Charge de travail de l'étudiant"): "#charge_h",
+    ("Détails du syllabus", "Ects"): "#ects",
+    ("Détails du syllabus", "Coef"): "#coef",
+    ("Détails du syllabus", "Volume"): "#volume_h",
+    ("Evaluation finale", "Type d'examen"): "type_examen",
+    ("Evaluation finale", "Durée"): "#duree_examen_h",
+}
+PROJECT_COLUMNS = {
+    ("1 Matières, formations et groupes", "Matière liée au projet"): "matiere",
+    ("1 Matières, formations et groupes", "Formations"): "formations",
+    ("1 Matières, formations et groupes", "Nombre d'étudiant par groupe"): "taille_groupe",
+    ("1 Matières, formations et groupes", "Charge de travail estimée par étudiant"): "#charge_h",
+    ("2 Sujet(s) du projet", "Type de sujet"): "type_sujet",
+    ("5 Soutenance", "Durée de présentation par groupe"): "duree_presentation",
+    ("5 Soutenance", "Audience"): "audience",
+    ("5 Soutenance", "Type de présentation"): "type_presentation",
+}
+SESSION_COLUMNS = {"Séances": "seance", "Thèmes": "themes", "Travail à domicile": "travail",
+                   "Références": "refs", "Evaluation": "evaluation"}
+CONTROLS_FIELD = ("Détails du syllabus", "Contrôle de connaissances")
+SESSIONS_SECTION = "Contenu détaillé des séances"
+COMPETENCES_SECTION = "Compétences professionnelles à développer ou à acquérir"
+DELIVERABLES_SECTION = "4 Livrables et étapes de suivi"
+
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+_RNCP = re.compile(r"RNCP\w+")
+
+
+# ── Conversion ────────────────────────────────────────────────────────────────
+def to_number(value: Any) -> Optional[float]:
+    """« 6,00 h » → 6.0, « 2 » → 2.0 ; None pour un texte qui n'est pas une quantité."""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = value.strip()
+    if not text or len(text) > 20:
+        return None
+    m = _NUMBER.search(text)
+    return float(m.group().replace(",", ".")) if m else None
+
+
+def _leaf(node: Any) -> Tuple[Any, Optional[int]]:
+    return node.get("value"), node.get("page")
+
+
+def _is_leaf(node: Any) -> bool:
+    return isinstance(node, dict) and {"value", "page"} <= node.keys()
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return str(value)
+
+
+def iter_fields(data: Dict[str, Any]) -> Iterable[Tuple[str, str, Any, Optional[int]]]:
+    """(section, champ, valeur, page) pour chaque feuille hors listes (séances, livrables…)."""
+    for section, body in data.items():
+        if section == "_meta":
+            continue
+        if _is_leaf(body):
+            yield (section, section) + _leaf(body)
+        elif isinstance(body, dict):
+            for field, node in body.items():
+                if _is_leaf(node):
+                    yield (section, field) + _leaf(node)
+
+
+def _typed_row(data: Dict[str, Any], columns: Dict[Tuple[str, str], str]) -> Dict[str, Any]:
+    row: Dict[str, Any] = {}
+    for (section, field), column in columns.items():
+        node = (data.get(section) or {}).get(field)
+        value = node.get("value") if _is_leaf(node) else None
+        if column.startswith("#"):
+            row[column[1:]] = to_number(value)
+        else:
+            row[column] = value if value not in ("", None) else None
+    return row
+
+
+# ── Entrepôt ──────────────────────────────────────────────────────────────────
+class Warehouse:
+    def __init__(self, db_path: Path = DB_PATH):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "Warehouse":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- chargement -------------------------------------------------------------
+    def _delete(self, doc_id: int) -> None:
+        self.conn.execute("DELETE FROM text_fts WHERE document_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))   # le reste en cascade
+
+    def _insert(self, family: str, name: str, source: Path, sha: str, data: Dict[str, Any]) -> int:
+        c = self.conn
+        doc_id = c.execute("INSERT INTO documents(family, name, source, sha256, loaded_at) VALUES (?, ?, ?, ?, ?)",
+                           (family, name, str(source), sha, time.time())).lastrowid
+
+        fields = [(doc_id, s, f, _text(v), to_number(v), p) for s, f, v, p in iter_fields(data)]
+        c.executemany("INSERT INTO fields VALUES (?, ?, ?, ?, ?, ?)", fields)
+        fts = [(s, f, v, doc_id) for _, s, f, v, _, _ in fields if len(v) >= LONG_TEXT_MIN]
+
+        if family == "syllabus_matiere":
+            row = _typed_row(data, COURSE_COLUMNS)
+            c.execute(f"INSERT INTO courses(document_id, {', '.join(row)}) VALUES (?{', ?' * len(row)})",
+                      (doc_id, *row.values()))
+            section, field = CONTROLS_FIELD
+            controls = ((data.get(section) or {}).get(field) or {}).get("value")
+            if isinstance(controls, dict):
+                c.executemany("INSERT INTO controls VALUES (?, ?, ?)",
+                              [(doc_id, kind, int(bool(v))) for kind, v in controls.items()])
+
+            sessions = []
+            for rank, item in enumerate(data.get(SESSIONS_SECTION) or []):
+                cols = {col: (item.get(key) or {}).get("value") for key, col in SESSION_COLUMNS.items()}
+                page = next((n.get("page") for n in item.values() if _is_leaf(n)), None)
+                sessions.append((doc_id, rank, *cols.values(), page))
+                fts += [(SESSIONS_SECTION, key, v, doc_id) for key, v in zip(SESSION_COLUMNS, cols.values())
+                        if isinstance(v, str) and len(v) >= LONG_TEXT_MIN]
+            c.executemany("INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", sessions)
+
+            competences = []
+            for rank, item in enumerate(data.get(COMPETENCES_SECTION) or []):
+                titre = (item.get("Titre") or {}).get("value")
+                comp = (item.get("Compétence") or {}).get("value")
+                rncp = _RNCP.search(comp or titre or "")
+                page = next((n.get("page") for n in item.values() if _is_leaf(n)), None)
+                competences.append((doc_id, rank, titre, comp, rncp.group() if rncp else None, page))
+            c.executemany("INSERT INTO competences VALUES (?, ?, ?, ?, ?, ?)", competences)
+        else:
+            row = _typed_row(data, PROJECT_COLUMNS)
+            c.execute(f"INSERT INTO projects(document_id, {', '.join(row)}) VALUES (?{', ?' * len(row)})",
+                      (doc_id, *row.values()))
+            deliverables = [(doc_id, rank, item["value"], item.get("page"))
+                            for rank, item in enumerate(data.get(DELIVERABLES_SECTION) or [])
+                            if _is_leaf(item) and item["value"]]
+            c.executemany("INSERT INTO deliverables VALUES (?, ?, ?, ?)", deliverables)
+            fts += [(DELIVERABLES_SECTION, "", text, doc_id) for _, _, text, _ in deliverables
+                    if len(text) >= LONG_TEXT_MIN]
+
+        c.executemany("INSERT INTO text_fts(section, field, value, document_id) VALUES (?, ?, ?, ?)", fts)
+        return doc_id
+
+    def load(self, files: Dict[str, List[Path]], prune: bool = True) -> Dict[str, int]:
+        """Charge {famille: [JSON…]} ; renvoie les compteurs inserted / updated / unchanged / removed."""
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        with self.conn:
+            for family, paths in files.items():
+                known = {r["name"]: (r["id"], r["sha256"]) for r in
+                         self.conn.execute("SELECT id, name, sha256 FROM documents WHERE family = ?", (family,))}
+                seen = set()
+                for path in paths:
+                    raw = path.read_bytes()
+                    sha = hashlib.sha256(raw).hexdigest()
+                    name = path.stem
+                    seen.add(name)
+                    if name in known and known[name][1] == sha:
+                        stats["unchanged"] += 1
+                        continue
+                    if name in known:
+                        self._delete(known[name][0])
+                        stats["updated"] += 1
+                    else:
+                        stats["inserted"] += 1
+                    self._insert(family, name, path, sha, json.loads(raw))
+                if prune:
+                    for name in known.keys() - seen:
+                        self._delete(known[name][0])
+                        stats["removed"] += 1
+        return stats
+
+    # -- lecture ----------------------------------------------------------------
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        return self.conn.execute(sql, tuple(params)).fetchall()
+
+    def search(self, text: str, limit: int = 20) -> List[sqlite3.Row]:
+        """Recherche plein texte (FTS5) ; renvoie document, section, champ et extrait."""
+        return self.conn.execute(
+            "SELECT d.family, d.name, t.section, t.field, "
+            "snippet(text_fts, 2, '[', ']', '…', 12) AS extrait "
+            "FROM text_fts t JOIN documents d ON d.id = t.document_id "
+            "WHERE text_fts MATCH ? ORDER BY rank LIMIT ?", (text, limit)).fetchall()
+
+
+def source_files() -> Dict[str, List[Path]]:
+    """JSON à charger par famille ; pour les projets, la version nettoyée si elle existe."""
+    files: Dict[str, List[Path]] = {}
+    for family, dirs in SOURCES.items():
+        by_name: Dict[str, Path] = {}
+        for d in reversed(dirs):           # le premier dossier listé l'emporte
+            by_name.update({p.stem: p for p in d.glob("*.json")})
+        files[family] = [by_name[n] for n in sorted(by_name)]
+    return files
+
+
+def _print_rows(rows: List[sqlite3.Row]) -> None:
+    if not rows:
+        print("(aucune ligne)")
+        return
+    cols = rows[0].keys()
+    print(" | ".join(cols))
+    for r in rows:
+        print(" | ".join("" if r[c] is None else str(r[c]).replace("\n", " ")[:80] for c in cols))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Entrepôt SQLite des syllabus")
+    ap.add_argument("--db", type=Path, default=DB_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ld = sub.add_parser("load", help="charge (incrémentalement) les JSON de syllabus")
+    ld.add_argument("--no-prune", action="store_true", help="garde les documents dont le JSON a disparu")
+    q = sub.add_parser("sql", help="exécute une requête SQL")
+    q.add_argument("query")
+    s = sub.add_parser("search", help="recherche plein texte (syntaxe FTS5)")
+    s.add_argument("text")
+    s.add_argument("-n", type=int, default=20)
+    args = ap.parse_args()
+
+    with Warehouse(args.db) as wh:
+        t0 = time.perf_counter()
+        try:
+            if args.cmd == "load":
+                stats = wh.load(source_files(), prune=not args.no_prune)
+                print(f"✅ {args.db} : " + ", ".join(f"{v} {k}" for k, v in stats.items())
+                      + f" ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+                return
+            rows = wh.query(args.query) if args.cmd == "sql" else wh.search(args.text, args.n)
+        except sqlite3.Error as err:
+            sys.exit(f"⛔ {err}")
+        _print_rows(rows)
+        print(f"({len(rows)} ligne(s), {(time.perf_counter() - t0) * 1000:.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+watcher.py
+----------
+Démon de surveillance de data/cours, data/syllabus_matiere et
+data/syllabus_projet : chaque PDF nouveau ou modifié passe aussitôt par
+parse → clean → chunk (pipeline.py), sans relancer les scripts à la main.
+
+• Réveil par inotify (Linux, via ctypes) ; à défaut, simple scrutation.
+• Anti-rebond : un PDF n'est pris que lorsque sa taille et sa date n'ont pas
+  bougé depuis QUIET secondes et qu'il se termine par %%EOF (copie finie).
+• Seuls les fichiers nouveaux ou dont (taille, mtime) a changé sont envoyés ;
+  pipeline_state saute en plus les étapes déjà faites sur le même hash.
+• Un PDF en échec (ou perdu avec un pool cassé) est renvoyé, jusqu'à
+  MAX_ATTEMPTS fois pour une même version du fichier.
+• Les workers sont des processus lancés une fois pour toutes, modules de
+  parsing et base d'état déjà chargés : pas d'import de pdfplumber/fitz par
+  fichier.
+
+Usage :
+    python watcher.py                      # surveille data/, Ctrl-C pour arrêter
+    python watcher.py --workers 2 --quiet 0.5
+    python watcher.py --families syllabus_projet --poll
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse, ctypes, os, select, time
+
+from pipeline import FAMILIES, FAMILY_DIRS
+
+QUIET = 0.5            # secondes sans changement avant de traiter un fichier
+POLL_SECONDS = 0.25    # intervalle de scrutation (ou délai max d'attente inotify)
+EOF_TAIL = 1024        # octets relus en fin de fichier pour chercher %%EOF
+MAX_ATTEMPTS = 3       # envois d'une même version d'un PDF avant abandon
+
+Signature = Tuple[int, int]   # (taille, mtime_ns)
+
+
+# ── Réveil inotify ────────────────────────────────────────────────────────────
+IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE = 0x2, 0x8, 0x80, 0x100
+
+
+class Inotify:
+    """inotify minimal : ne sert qu'à réveiller la boucle, le contenu des événements est ignoré."""
+
+    def __init__(self, dirs: List[Path]):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        for d in dirs:
+            if libc.inotify_add_watch(self.fd, str(d).encode(), mask) < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {d}")
+
+    def wait(self, timeout: float) -> None:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+
+def open_inotify(dirs: List[Path]) -> Optional[Inotify]:
+    try:
+        return Inotify(dirs)
+    except (OSError, AttributeError):
+        return None
+
+
+# ── Workers chauds ────────────────────────────────────────────────────────────
+_store = None
+
+
+def _warm() -> None:
+    """Initialisation d'un worker : imports lourds et connexion SQLite, une seule fois."""
+    global _store
+    import importlib
+    # fitz, pdfplumber et ftfy ne sont importés par les parsers qu'au premier
+    # document : on les charge ici pour que ce coût ne tombe pas sur le premier fichier traité
+    for name in ("fitz", "pdfplumber", "ftfy",
+                 "parser_cours", "parser_syllabus_matiere", "parser_syllabus_projet",
+                 "cleaning_json_syllabus_projet", "chunking_cours", "chunking_syllabus_matière",
+                 "chunking_syllabus_projet"):
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass          # l'erreur remontera à l'étape concernée, pour le document concerné
+    from pipeline_state import StateStore
+    _store = StateStore()
+
+
+def _process(family: str, pdf: str) -> Tuple[int, int, Optional[str], float]:
+    from pipeline_state import process_document
+    t0 = time.perf_counter()
+    ran, skipped, error = process_document(_store, Path(pdf), family)
+    return ran, skipped, error, time.perf_counter() - t0
+
+
+# ── Détection des fichiers prêts ──────────────────────────────────────────────
+def is_complete(pdf: Path) -> bool:
+    """Vrai si le PDF se termine par %%EOF (copie ou téléversement terminé)."""
+    try:
+        with open(pdf, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - EOF_TAIL))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+def scan(dirs: Dict[str, Path]) -> Dict[Path, Tuple[str, Signature]]:
+    found: Dict[Path, Tuple[str, Signature]] = {}
+    for family, d in dirs.items():
+        try:
+            entries = list(os.scandir(d))
+        except FileNotFoundError:
+            continue
+        for e in entries:
+            if not e.name.lower().endswith(".pdf") or e.name.startswith((".", "~")) or not e.is_file():
+                continue
+            st = e.stat()
+            found[Path(e.path)] = (family, (st.st_size, st.st_mtime_ns))
+    return found
+
+
+class Watcher:
+    def __init__(self, families: List[str], workers: int, quiet: float = QUIET, poll: bool = False):
+        self.dirs = {fam: FAMILY_DIRS[fam] for fam in families}
+        for d in self.dirs.values():
+            d.mkdir(parents=True, exist_ok=True)
+        self.quiet = quiet
+        self.notify = None if poll else open_inotify(list(self.dirs.values()))
+        self.workers = workers
+        self.pool = self._start_pool()
+        self.seen: Dict[Path, Tuple[Signature, float]] = {}     # dernière signature vue, depuis quand
+        self.done: Dict[Path, Signature] = {}                   # signature au dernier envoi
+        self.attempts: Dict[Path, Tuple[Signature, int]] = {}   # envois de cette signature
+        self.running: Dict[Path, Tuple[Future, float, ProcessPoolExecutor]] = {}
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        """Lance et initialise tous les workers tout de suite, pas au premier fichier."""
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm)
+        for fut in [pool.submit(time.sleep, 0.1) for _ in range(self.workers)]:
+            fut.result()
+        return pool
+
+    def tick(self) -> None:
+        now = time.monotonic()
+        for pdf, (family, sig) in scan(self.dirs).items():
+            prev = self.seen.get(pdf)
+            if prev is None or prev[0] != sig:
+                self.seen[pdf] = (sig, now)      # vient de changer : on attend le calme
+                continue
+            if self.done.get(pdf) == sig or pdf in self.running:
+                continue
+            if now - prev[1] < self.quiet or not is_complete(pdf):
+                continue
+            last_sig, count = self.attempts.get(pdf, (None, 0))
+            count = count + 1 if last_sig == sig else 1
+            if count > MAX_ATTEMPTS:
+                print(f"⛔ {pdf.name} : abandon après {MAX_ATTEMPTS} essais (en attente d'une nouvelle version)",
+                      flush=True)
+                self.done[pdf] = sig
+                continue
+            try:
+                fut = self.pool.submit(_process, family, str(pdf))
+            except BrokenProcessPool:
+                self._restart_pool(self.pool)
+                fut = self.pool.submit(_process, family, str(pdf))
+            self.attempts[pdf] = (sig, count)
+            self.done[pdf] = sig
+            self.running[pdf] = (fut, now, self.pool)
+
+        for pdf, (fut, started, pool) in list(self.running.items()):
+            if not fut.done():
+                continue
+            del self.running[pdf]
+            try:
+                ran, skipped, error, duration = fut.result()
+            except BrokenProcessPool:
+                # Un PDF a tué son worker : tous les travaux du pool sont perdus,
+                # y compris ceux des autres fichiers, renvoyés au prochain tour
+                print(f"⛔ {pdf.name} : pool de workers cassé", flush=True)
+                self.done.pop(pdf, None)
+                self._restart_pool(pool)
+                continue
+            except Exception as err:
+                print(f"⛔ {pdf.name} : {err}", flush=True)
+                self.done.pop(pdf, None)
+                continue
+            latency = time.monotonic() - started + self.quiet
+            if error:
+                print(f"⛔ {pdf.name} : {error}", flush=True)
+                self.done.pop(pdf, None)
+            elif ran:
+                print(f"✅ {pdf.name}  ({ran} étape(s) en {duration:.2f}s, ~{latency:.1f}s depuis le dépôt)",
+                      flush=True)
+
+    def _restart_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Remplace le pool cassé, une seule fois même si plusieurs de ses travaux le signalent."""
+        if broken is not self.pool:
+            return
+        print("⚠ Pool de workers cassé, redémarrage", flush=True)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = self._start_pool()
+
+    def run(self) -> None:
+        mode = "inotify" if self.notify else f"scrutation {POLL_SECONDS}s"
+        print(f"👀 Surveillance de {', '.join(str(d) for d in self.dirs.values())} ({mode})", flush=True)
+        try:
+            while True:
+                self.tick()
+                if self.notify and not self.running and not self._settling():
+                    self.notify.wait(5.0)
+                elif self.notify:
+                    self.notify.wait(POLL_SECONDS)
+                else:
+                    time.sleep(POLL_SECONDS)
+        except KeyboardInterrupt:
+            print("Arrêt demandé, fin des traitements en cours…")
+        finally:
+            self.pool.shutdown(wait=True)
+
+    def _settling(self) -> bool:
+        """Vrai si un fichier attend encore la fin de sa période de calme."""
+        return any(self.done.get(pdf) != sig for pdf, (sig, _) in self.seen.items())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Surveillance de data/ et traitement incrémental")
+    ap.add_argument("--families", nargs="+", choices=FAMILIES, default=list(FAMILIES))
+    ap.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)))
+    ap.add_argument("--quiet", type=float, default=QUIET, help="secondes de calme avant traitement")
+    ap.add_argument("--poll", action="store_true", help="scrutation seule, sans inotify")
+    args = ap.parse_args()
+    Watcher(args.families, args.workers, args.quiet, args.poll).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+work_queue.py
+-------------
+File de travaux sur un système de fichiers partagé (NFS), sans broker :
+plusieurs processus / machines tirent des PDF et exécutent la chaîne
+(pipeline.run_all : parsers, cleaning_json_syllabus_projet, chunkers).
+
+Dossier de file :
+    pending/<id>.json               travaux en attente
+    leased/<id>@<jeton>.json        travaux pris par un worker (bail)
+    done/<id>.json                  terminés (sorties + worker + durée)
+    failed/<id>.json                abandonnés après MAX_ATTEMPTS essais
+
+• Prise d'un travail : rename pending → leased, atomique ; un seul worker gagne.
+  Le fichier est touché avant le rename : le bail part déjà frais.
+• Battement de cœur : le worker touche (mtime) son fichier de bail toutes les
+  LEASE/3 secondes. Un bail dont le mtime a plus de LEASE secondes est expiré :
+  n'importe quel worker le remet dans pending (rename, là encore atomique).
+• Clôture : rename leased/<id>@<jeton>.json → .closing (hors de portée de reap),
+  puis écriture dans done/ ou pending/.
+• Un worker qui a perdu son bail (fichier absent) ne peut plus le clore ;
+  les sorties sont de toute façon écrites atomiquement (atomic_io).
+
+Usage :
+    python work_queue.py enqueue /mnt/nfs/queue data/syllabus_projet/*.pdf
+    python work_queue.py worker  /mnt/nfs/queue [--lease 120] [--exit-when-idle]
+    python work_queue.py status  /mnt/nfs/queue
+    python work_queue.py demo --workers 4 --jobs 40     # test local, travaux factices
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse, hashlib, json, os, socket, subprocess, sys, tempfile, threading, time, uuid
+
+from atomic_io import atomic_write_text
+
+LEASE_SECONDS = 120
+POLL_SECONDS = 2.0
+MAX_ATTEMPTS = 3
+STATES = ("pending", "leased", "done", "failed")
+
+
+def job_id_for(pdf: Path) -> str:
+    return hashlib.sha1(str(Path(pdf).resolve()).encode("utf-8")).hexdigest()[:16]
+
+
+class WorkQueue:
+    def __init__(self, root: Path, lease: float = LEASE_SECONDS):
+        self.root = Path(root)
+        self.lease = lease
+        for state in STATES:
+            (self.root / state).mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, state: str) -> Path:
+        return self.root / state
+
+    # -- production -------------------------------------------------------------
+    def enqueue(self, payload: Dict[str, Any], job_id: str, force: bool = False) -> bool:
+        """Ajoute un travail ; False s'il existe déjà (sauf force)."""
+        if not force and self.find(job_id):
+            return False
+        job = {"id": job_id, "attempts": 0, "enqueued_at": time.time(), **payload}
+        atomic_write_text(self._dir("pending") / f"{job_id}.json", json.dumps(job, ensure_ascii=False))
+        return True
+
+    def find(self, job_id: str) -> Optional[str]:
+        """État courant d'un travail (None s'il est inconnu)."""
+        for state in STATES:
+            if state == "leased":
+                if any(self._dir(state).glob(f"{job_id}@*.json")):
+                    return state
+            elif (self._dir(state) / f"{job_id}.json").exists():
+                return state
+        return None
+
+    def counts(self) -> Dict[str, int]:
+        return {state: sum(1 for _ in self._dir(state).glob("*.json")) for state in STATES}
+
+    # -- consommation -----------------------------------------------------------
+    def claim(self, worker: str) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """Prend le plus ancien travail disponible ; (chemin du bail, travail) ou None."""
+        for path in sorted(self._dir("pending").glob("*.json"), key=lambda p: p.stat().st_mtime
+                           if p.exists() else 0):
+            token = f"{worker}-{uuid.uuid4().hex[:8]}"
+            leased = self._dir("leased") / f"{path.stem}@{token}.json"
+            try:
+                # Le bail démarre AVANT le rename (qui conserve le mtime) : reap ne
+                # peut pas voir un bail expiré entre le rename et la prise effective
+                os.utime(path)
+                os.rename(path, leased)
+                job = json.loads(leased.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                continue            # un autre worker l'a pris (ou reap l'a repris)
+            job["attempts"] = job.get("attempts", 0) + 1
+            job["worker"] = worker
+            atomic_write_text(leased, json.dumps(job, ensure_ascii=False))
+            return leased, job
+        return None
+
+    def heartbeat(self, leased: Path) -> bool:
+        """Prolonge le bail ; False s'il a été perdu."""
+        try:
+            os.utime(leased)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _close(self, leased: Path, state: str, job: Dict[str, Any]) -> bool:
+        job_id = leased.stem.split("@", 1)[0]
+        # Le bail est d'abord retiré de leased/*.json par un rename atomique : si
+        # reap l'a déjà repris, on perd ici ; sinon reap ne le voit plus
+        closing = leased.with_suffix(".closing")
+        try:
+            os.rename(leased, closing)
+        except FileNotFoundError:
+            return False
+        atomic_write_text(self._dir(state) / f"{job_id}.json", json.dumps(job, ensure_ascii=False))
+        closing.unlink()
+        return True
+
+    def complete(self, leased: Path, job: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        job.update(result, finished_at=time.time())
+        return self._close(leased, "done", job)
+
+    def fail(self, leased: Path, job: Dict[str, Any], error: str) -> bool:
+        """Remet en attente, ou classe en échec après MAX_ATTEMPTS essais."""
+        job["last_error"] = error
+        state = "failed" if job.get("attempts", 0) >= MAX_ATTEMPTS else "pending"
+        return self._close(leased, state, job)
+
+    def reap(self) -> int:
+        """Remet en attente les baux expirés ; renvoie leur nombre."""
+        now = time.time()
+        reaped = 0
+        for leased in self._dir("leased").glob("*.json"):
+            try:
+                expired = now - leased.stat().st_mtime > self.lease
+            except FileNotFoundError:
+                continue
+            if not expired:
+                continue
+            job_id = leased.stem.split("@", 1)[0]
+            try:
+                job = json.loads(leased.read_text(encoding="utf-8"))
+                state = "failed" if job.get("attempts", 0) >= MAX_ATTEMPTS else "pending"
+                os.rename(leased, self._dir(state) / f"{job_id}.json")
+                reaped += 1
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return reaped
+
+
+# ── Exécution d'un travail ────────────────────────────────────────────────────
+def execute(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Exécute un travail et renvoie le résultat à enregistrer dans done/."""
+    t0 = time.perf_counter()
+    if job.get("task") == "noop":               # travaux factices (démo / tests)
+        time.sleep(job.get("seconds", 0.05))
+        outputs: List[str] = []
+    else:
+        from pipeline import run_all
+        outputs = [str(p) for p in run_all(Path(job["pdf"]), job.get("family"))]
+    return {"outputs": outputs, "duration": time.perf_counter() - t0}
+
+
+def _heartbeat_loop(queue: WorkQueue, leased: Path, stop: threading.Event) -> None:
+    while not stop.wait(queue.lease / 3):
+        if not queue.heartbeat(leased):
+            return
+
+
+def work(queue: WorkQueue, worker: str, exit_when_idle: bool = False) -> int:
+    """Boucle d'un worker ; renvoie le nombre de travaux terminés."""
+    done = 0
+    while True:
+        queue.reap()
+        claimed = queue.claim(worker)
+        if claimed is None:
+            if exit_when_idle and not queue.counts()["leased"]:
+                return done
+            time.sleep(POLL_SECONDS)
+            continue
+
+        leased, job = claimed
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat_loop, args=(queue, leased, stop), daemon=True)
+        beat.start()
+        try:
+            result = execute(job)
+        except Exception as err:
+            stop.set()
+            queue.fail(leased, job, f"{type(err).__name__}: {err}")
+            print(f"⛔ [{worker}] {job.get('pdf', job['id'])} : {err}", flush=True)
+            continue
+        stop.set()
+        if queue.complete(leased, job, result):
+            done += 1
+            print(f"✅ [{worker}] {job.get('pdf', job['id'])}  ({result['duration']:.1f}s)", flush=True)
+        else:
+            print(f"⚠ [{worker}] bail perdu pour {job['id']}", flush=True)
+
+
+# ── Démo locale ───────────────────────────────────────────────────────────────
+def demo(workers: int, jobs: int) -> None:
+    """Lance plusieurs processus worker sur une file temporaire de travaux factices."""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = WorkQueue(Path(tmp), lease=5)
+        for i in range(jobs):
+            queue.enqueue({"task": "noop", "seconds": 0.05}, f"noop{i:05d}")
+        t0 = time.perf_counter()
+        procs = [subprocess.Popen([sys.executable, __file__, "worker", tmp, "--lease", "5",
+                                   "--exit-when-idle", "--name", f"w{n}"], stdout=subprocess.DEVNULL)
+                 for n in range(workers)]
+        for p in procs:
+            p.wait()
+        elapsed = time.perf_counter() - t0
+
+        done = [json.loads(p.read_text(encoding="utf-8")) for p in (Path(tmp) / "done").glob("*.json")]
+        per_worker: Dict[str, int] = {}
+        for job in done:
+            per_worker[job["worker"]] = per_worker.get(job["worker"], 0) + 1
+        print(f"{len(done)}/{jobs} travaux terminés en {elapsed:.1f}s, état final {queue.counts()}")
+        print("par worker :", dict(sorted(per_worker.items())))
+        if len(done) != jobs:
+            sys.exit("❌ Travaux manquants")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="File de travaux sur système de fichiers partagé")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    e = sub.add_parser("enqueue")
+    e.add_argument("queue", type=Path)
+    e.add_argument("pdfs", nargs="+", type=Path)
+    e.add_argument("--force", action="store_true", help="ré-enfile même si déjà connu")
+    w = sub.add_parser("worker")
+    w.add_argument("queue", type=Path)
+    w.add_argument("--lease", type=float, default=LEASE_SECONDS)
+    w.add_argument("--exit-when-idle", action="store_true")
+    w.add_argument("--name", default=f"{socket.gethostname()}-{os.getpid()}")
+    s = sub.add_parser("status")
+    s.add_argument("queue", type=Path)
+    d = sub.add_parser("demo")
+    d.add_argument("--workers", type=int, default=4)
+    d.add_argument("--jobs", type=int, default=40)
+    args = ap.parse_args()
+
+    if args.cmd == "enqueue":
+        from pipeline import family_of
+        queue = WorkQueue(args.queue)
+        added = 0
+        for pdf in args.pdfs:
+            try:
+                family = family_of(pdf)
+            except ValueError:
+                from router import classify
+                family = classify(pdf)
+            added += queue.enqueue({"pdf": str(pdf.resolve()), "family": family}, job_id_for(pdf), args.force)
+        print(f"✔ {added} travail(aux) ajouté(s), état {queue.counts()}")
+    elif args.cmd == "worker":
+        n = work(WorkQueue(args.queue, args.lease), args.name, args.exit_when_idle)
+        print(f"[{args.name}] {n} travail(aux) terminé(s)")
+    elif args.cmd == "status":
+        print(WorkQueue(args.queue).counts())
+    else:
+        demo(args.workers, args.jobs)
+
+
+if __name__ == "__main__":
+    main()